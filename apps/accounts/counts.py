@@ -0,0 +1,22 @@
+# apps/accounts/counts.py
+
+from django.core.cache import cache
+
+
+# プロフィールの件数キャッシュ（投稿・削除時に signals で消す）
+PROFILE_COUNT_TIMEOUT = 60 * 10
+
+PROFILE_COUNT_KINDS = ("vehicles", "posts", "entries")
+
+
+def profile_count_key(kind: str, user_id: int) -> str:
+    return f"profile_count:{kind}:{user_id}"
+
+
+def invalidate_profile_counts(user_id: int, *kinds: str) -> None:
+    """
+    user_id の件数キャッシュを消す（kinds 省略で全部）
+    """
+    if not user_id:
+        return
+    cache.delete_many([profile_count_key(k, user_id) for k in (kinds or PROFILE_COUNT_KINDS)])
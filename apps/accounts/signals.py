@@ -1,13 +1,101 @@
 # apps/accounts/signals.py
 
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import Profile
+from apps.common import versions
+from apps.common.page_cache import purge_pages
+from apps.events.models import Event, EventEntry
+from apps.posts.models import Post
+from apps.vehicles.models import UserVehicle
+
+from .counts import invalidate_profile_counts
+from .models import Profile, User
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.get_or_create(user=instance)
+
+
+# ----------------------------
+# プロフィール件数キャッシュの消し込み
+# ----------------------------
+@receiver(post_save, sender=UserVehicle)
+@receiver(post_delete, sender=UserVehicle)
+def invalidate_vehicle_count(sender, instance, created=False, **kwargs):
+    # 更新（created=False の post_save）では件数は変わらない
+    if kwargs.get("signal") is post_save and not created:
+        return
+    # 車両削除でエントリーも CASCADE で消えるので entries も消す
+    invalidate_profile_counts(instance.owner_id, "vehicles", "entries")
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_count(sender, instance, created=False, **kwargs):
+    if kwargs.get("signal") is post_save and not created:
+        return
+    invalidate_profile_counts(instance.author_id, "posts")
+
+
+@receiver(post_save, sender=EventEntry)
+@receiver(post_delete, sender=EventEntry)
+def invalidate_entry_count(sender, instance, created=False, **kwargs):
+    if kwargs.get("signal") is post_save and not created:
+        return
+    if EventEntry.vehicle.is_cached(instance):
+        owner_id = instance.vehicle.owner_id
+    else:
+        owner_id = (
+            UserVehicle.objects.filter(id=instance.vehicle_id).values_list("owner_id", flat=True).first()
+        )
+    invalidate_profile_counts(owner_id, "entries")
+
+
+# ----------------------------
+# 未ログイン向けページキャッシュ（apps.common.page_cache）/ 世代番号（apps.common.versions）
+# ----------------------------
+def profile_pages(user_ids):
+    """
+    プロフィールページの [(url_name, kwargs), ...]（車両・投稿・エントリーの変更で他のアプリからも消す）
+    """
+    usernames = User.objects.filter(id__in={u for u in user_ids if u}).values_list("username", flat=True)
+    return [("profile_detail", {"username": name}) for name in usernames]
+
+
+def _login_only(sender, update_fields) -> bool:
+    """
+    ログインのたびに Django が User を update_fields=["last_login"] で保存する。表示は変わらない
+    """
+    return sender is User and update_fields is not None and set(update_fields) == {"last_login"}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def page_cache_profile(sender, instance, update_fields=None, **kwargs):
+    # ユーザー名・アイコンは車両 / 投稿 / 主催イベントの詳細にも出るので、そちらの世代も作り直す
+    # （世代の時刻が Last-Modified になるので、消さないと If-Modified-Since で古い名前のまま 304 になる）
+    if _login_only(sender, update_fields):
+        return
+    user_id = instance.id if sender is User else instance.user_id
+    pages = profile_pages([user_id])
+    pages += [("vehicle_detail", {"pk": pk}) for pk in UserVehicle.objects.filter(owner_id=user_id).values_list("id", flat=True)]
+    pages += [("post_detail", {"pk": pk}) for pk in Post.objects.filter(author_id=user_id).values_list("id", flat=True)]
+    pages += [("event_detail", {"event_id": pk}) for pk in Event.objects.filter(organizer_id=user_id).values_list("id", flat=True)]
+    purge_pages(pages)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def version_user(sender, instance, **kwargs):
+    if _login_only(sender, kwargs.get("update_fields")):
+        return
+    versions.bump(User, instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def version_profile(sender, instance, **kwargs):
+    versions.bump(User, instance.user_id)
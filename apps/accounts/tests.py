@@ -1,3 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from apps.posts.models import Post
+from apps.vehicles.models import UserVehicle, VehicleModel
+
+from .counts import profile_count_key
+
+
+User = get_user_model()
+
+
+class ProfileCountTests(TestCase):
+    """
+    プロフィールのページング件数キャッシュ（CachedCountPaginator + signals での消し込み）
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("rider", password="pw")
+        cls.model = VehicleModel.objects.create(maker="Honda", name="Super Cub", slug="super-cub")
+        Post.objects.create(author=cls.user, title="p", body="b")
+
+    def setUp(self):
+        cache.clear()
+        self.posts_url = reverse("profile_posts", kwargs={"username": self.user.username})
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return [q["sql"] for q in ctx.captured_queries if "COUNT(" in q["sql"].upper()]
+
+    def test_count_is_cached(self):
+        self.assertTrue(self._count_queries(self.posts_url))
+        self.assertEqual(cache.get(profile_count_key("posts", self.user.id)), 1)
+        self.assertEqual(self._count_queries(self.posts_url), [])
+
+    def test_invalidated_on_create_and_delete(self):
+        key = profile_count_key("posts", self.user.id)
+        self.client.get(self.posts_url)
+
+        post = Post.objects.create(author=self.user, title="p2", body="b")
+        self.assertIsNone(cache.get(key))
+        self.client.get(self.posts_url)
+        self.assertEqual(cache.get(key), 2)
+
+        post.delete()
+        self.assertIsNone(cache.get(key))
+        self.client.get(self.posts_url)
+        self.assertEqual(cache.get(key), 1)
+
+    def test_edit_keeps_count(self):
+        key = profile_count_key("posts", self.user.id)
+        self.client.get(self.posts_url)
+
+        post = Post.objects.get(author=self.user)
+        post.title = "edited"
+        post.save()
+        self.assertEqual(cache.get(key), 1)
+
+    def test_vehicle_delete_clears_entries_too(self):
+        # 車両を消すとエントリーも CASCADE で消える
+        vehicle = UserVehicle.objects.create(owner=self.user, model=self.model, title="カブ")
+        cache.set(profile_count_key("vehicles", self.user.id), 1)
+        cache.set(profile_count_key("entries", self.user.id), 1)
+
+        vehicle.delete()
+        self.assertIsNone(cache.get(profile_count_key("vehicles", self.user.id)))
+        self.assertIsNone(cache.get(profile_count_key("entries", self.user.id)))
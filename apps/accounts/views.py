@@ -3,6 +3,7 @@
 from django.contrib.auth import get_user_model, login
 from django.contrib.auth.decorators import login_required
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.db import transaction
 from django.db.models import Count
 from django.http import Http404
@@ -10,13 +11,18 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib import messages
 
 from apps.interactions.models import Reaction, ReactionType
+from apps.vehicles.cards import VehicleCard
 from apps.vehicles.models import UserVehicle
+from apps.posts.cards import PostCard
 from apps.posts.models import Post
+from apps.events.cards import EntryCard
 from apps.events.models import EventEntry  # ✅ 参加履歴用
 
 from .forms import SignupForm, ProfileUpdateForm, UserUpdateForm
+from .counts import PROFILE_COUNT_TIMEOUT, profile_count_key
 from .models import Profile
-from django.core.paginator import Paginator
+from apps.common.page_cache import anonymous_page_cache
+from apps.common.pagination import CachedCountPaginator
 
 
 User = get_user_model()
@@ -75,6 +81,7 @@ def account_edit(request):
 # ----------------------------
 # Public profile page
 # ----------------------------
+@anonymous_page_cache
 def profile_detail(request, username: str):
     """
     公開プロフィール:
@@ -93,38 +100,27 @@ def profile_detail(request, username: str):
     # 表示名のフォールバック
     display_name = profile.display_name.strip() if profile.display_name else user.username
 
-    # 車両：main_imageだけで軽く
-    vehicles = (
-        UserVehicle.objects
-        .filter(owner=user)
-        .select_related("model", "main_image")
-        .order_by("-created_at")[:12]
+    # 車両 / 投稿：カードに要る列だけ（apps.*.cards）
+    vehicles = VehicleCard.fetch(
+        UserVehicle.objects.filter(owner=user).order_by("-created_at")[:12]
     )
-
-    # 投稿：main_imageだけで軽く
-    posts = (
-        Post.objects
-        .filter(author=user)
-        .select_related("main_image")
-        .order_by("-created_at")[:12]
+    posts = PostCard.fetch(
+        Post.objects.filter(author=user).order_by("-created_at")[:12]
     )
 
     # ✅ イベント参加履歴（Entry）
-    # EventEntry: event + vehicle をまとめて取得（vehicle.main_image を使う）
-    entries = (
-        EventEntry.objects
-        .filter(vehicle__owner=user)
-        .select_related(
-            "event",
-            "vehicle",
-            "vehicle__model",
-            "vehicle__main_image",
-        )
-        .order_by("-created_at")[:30]
+    # イベント名 + 参加車両のカード（vehicle.main_image を使う）を1クエリで
+    entries = EntryCard.fetch(
+        EventEntry.objects.filter(vehicle__owner=user).order_by("-created_at")[:30]
     )
 
     # 参加イベント数 / エントリー数の簡易集計（任意で表示に使える）
-    entry_count = EventEntry.objects.filter(vehicle__owner=user).count()
+    # ✅ エントリー数は profile_entries のページングと同じキャッシュを使う
+    entry_count = cache.get_or_set(
+        profile_count_key("entries", user.id),
+        EventEntry.objects.filter(vehicle__owner=user).count,
+        PROFILE_COUNT_TIMEOUT,
+    )
     event_count = (
         EventEntry.objects.filter(vehicle__owner=user)
         .values("event_id").distinct().count()
@@ -162,12 +158,16 @@ def profile_vehicles(request, username: str):
     qs = (
         UserVehicle.objects
         .filter(owner=user)
-        .select_related("model", "main_image")
         .order_by("-created_at")
     )
 
-    paginator = Paginator(qs, 24)  # 1ページ24件
+    paginator = CachedCountPaginator(
+        qs, 24,  # 1ページ24件
+        cache_key=profile_count_key("vehicles", user.id),
+        timeout=PROFILE_COUNT_TIMEOUT,
+    )
     page_obj = paginator.get_page(request.GET.get("page"))
+    page_obj.object_list = VehicleCard.fetch(page_obj.object_list)
 
     return render(request, "accounts/profile_vehicles.html", {
         "profile_user": user,
@@ -184,12 +184,16 @@ def profile_posts(request, username: str):
     qs = (
         Post.objects
         .filter(author=user)
-        .select_related("main_image")
         .order_by("-created_at")
     )
 
-    paginator = Paginator(qs, 24)
+    paginator = CachedCountPaginator(
+        qs, 24,
+        cache_key=profile_count_key("posts", user.id),
+        timeout=PROFILE_COUNT_TIMEOUT,
+    )
     page_obj = paginator.get_page(request.GET.get("page"))
+    page_obj.object_list = PostCard.fetch(page_obj.object_list)
 
     return render(request, "accounts/profile_posts.html", {
         "profile_user": user,
@@ -206,12 +210,16 @@ def profile_entries(request, username: str):
     qs = (
         EventEntry.objects
         .filter(vehicle__owner=user)
-        .select_related("event", "vehicle", "vehicle__model", "vehicle__main_image")
         .order_by("-created_at")
     )
 
-    paginator = Paginator(qs, 30)  # entriesは30件/ページでも見やすい
+    paginator = CachedCountPaginator(
+        qs, 30,  # entriesは30件/ページでも見やすい
+        cache_key=profile_count_key("entries", user.id),
+        timeout=PROFILE_COUNT_TIMEOUT,
+    )
     page_obj = paginator.get_page(request.GET.get("page"))
+    page_obj.object_list = EntryCard.fetch(page_obj.object_list)
 
     return render(request, "accounts/profile_entries.html", {
         "profile_user": user,
@@ -0,0 +1,297 @@
+# apps/common/cache.py
+
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+# ----------------------------
+# 設定
+# ----------------------------
+def _shared():
+    return caches[getattr(settings, "TIERED_CACHE", "default")]
+
+
+def _local_timeout() -> float:
+    """
+    settings.TIERED_CACHE_LOCAL_TIMEOUT（既定 5 秒）
+    プロセス内の値は他プロセスの invalidate が届かないので、ずれてよい秒数にする
+    """
+    return float(getattr(settings, "TIERED_CACHE_LOCAL_TIMEOUT", 5))
+
+
+def _local_maxsize() -> int:
+    return int(getattr(settings, "TIERED_CACHE_LOCAL_MAXSIZE", 512))
+
+
+# 作っている最中のロックの寿命 / 他の人が作り終わるのを待つ上限（秒）
+LOCK_TIMEOUT = 30
+WAIT_TIMEOUT = 3.0
+WAIT_STEP = 0.05
+
+# XFetch の β（大きいほど早めに作り直す）
+DEFAULT_BETA = 1.0
+
+# stale になってから古い値を返してよい秒数
+DEFAULT_STALE_TTL = 60
+
+
+class Entry(NamedTuple):
+    value: Any
+    expires_at: float  # これを過ぎたら stale（作り直し対象。stale_ttl の間は古い値を返せる）
+    delta: float       # 前回作るのにかかった秒数（XFetch 用）
+
+
+# ----------------------------
+# プロセス内 LRU（1段目）
+# ----------------------------
+class LocalLRU:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Entry]:
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            local_expires, entry = item
+            if now >= local_expires or now >= entry.expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Entry, timeout: float) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + timeout, entry)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+local = LocalLRU(_local_maxsize())
+
+# 同じプロセス内の同時ビルドは threading.Lock で1本にまとめる
+# キーごとに Lock を作ると増え続けるので、ハッシュで固定数に振り分ける
+_build_locks = [threading.Lock() for _ in range(64)]
+
+
+def _build_lock(key: str) -> threading.Lock:
+    return _build_locks[hash(key) % len(_build_locks)]
+
+
+def _lock_key(key: str) -> str:
+    return f"tc:lock:{key}"
+
+
+def _data_key(key: str) -> str:
+    return f"tc:{key}"
+
+
+def _generation_key(key: str) -> str:
+    return f"tc:gen:{key}"
+
+
+def _generation(shared, key: str):
+    """
+    expire / delete のたびに変わる値（無ければ None）
+    作り始めと書き込む前で違っていたら、作っている間に中身が変わったので書かない
+    """
+    try:
+        return shared.get(_generation_key(key))
+    except Exception:
+        return None
+
+
+def _invalidate(shared, key: str) -> None:
+    try:
+        shared.set(_generation_key(key), time.time_ns(), None)
+    except Exception:
+        pass
+
+
+# ----------------------------
+# 本体
+# ----------------------------
+def _should_refresh(entry: Entry, beta: float, now: float) -> bool:
+    """
+    XFetch（確率的に早めの作り直し）
+    期限が近いほど、作るのに時間がかかるものほど、早めに誰か1人が作り直す
+    """
+    if now >= entry.expires_at:
+        return True
+    return now - entry.delta * beta * math.log(random.random() or 1e-12) >= entry.expires_at
+
+
+def _build(key: str, builder: Callable, timeout: int, stale_ttl: int, local_timeout: float) -> Entry:
+    shared = _shared()
+    generation = _generation(shared, key)
+    started = time.time()
+    value = builder()
+    now = time.time()
+    entry = Entry(value=value, expires_at=now + timeout, delta=now - started)
+
+    # ✅ 作っている間に expire / delete されていたら、作り始める前のデータかもしれないので入れない
+    #    （入れると消し込みが取り消される。値はこの呼び出しにだけ返す）
+    if _generation(shared, key) != generation:
+        return entry
+    try:
+        shared.set(_data_key(key), entry, timeout + stale_ttl)
+    except Exception:
+        pass
+    local.set(key, entry, min(local_timeout, timeout))
+    return entry
+
+
+def _try_lock(shared, key: str) -> bool:
+    """
+    作り直しのロック（キャッシュの add）。キャッシュが落ちていたらロックなしで自分で作る
+    """
+    try:
+        return bool(shared.add(_lock_key(key), 1, LOCK_TIMEOUT))
+    except Exception:
+        return True
+
+
+def _unlock(shared, key: str) -> None:
+    try:
+        shared.delete(_lock_key(key))
+    except Exception:
+        pass
+
+
+def get_or_build(
+    key: str,
+    builder: Callable[[], Any],
+    *,
+    timeout: int = 300,
+    stale_ttl: int = DEFAULT_STALE_TTL,
+    local_timeout: Optional[float] = None,
+    beta: float = DEFAULT_BETA,
+) -> Any:
+    """
+    key の値を返す。無ければ builder() で作って入れる
+    - 1段目: プロセス内 LRU（local_timeout 秒。DB にもキャッシュサーバーにも行かない）
+    - 2段目: Django のキャッシュ（timeout 秒で stale、その後 stale_ttl 秒は古い値を返せる）
+    - 期限前でも XFetch で確率的に1人が早めに作り直す
+    - 作り直しは1人だけ（キャッシュの add をロックに使う）。他の人は
+        stale があればそれを返す（stale-while-revalidate）
+        無ければ作り終わるまで少し待つ（WAIT_TIMEOUT 秒で諦めて自分で作る）
+    - 作っている間に expire / delete されたら、作った値は入れない（消し込みの方が勝つ）
+    """
+    if local_timeout is None:
+        local_timeout = _local_timeout()
+
+    entry = local.get(key)
+    if entry is not None:
+        return entry.value
+
+    shared = _shared()
+    now = time.time()
+    try:
+        entry = shared.get(_data_key(key))
+    except Exception:
+        return builder()
+
+    if entry is not None and not _should_refresh(entry, beta, now):
+        local.set(key, entry, min(local_timeout, entry.expires_at - now))
+        return entry.value
+
+    lock = _build_lock(key)
+    if entry is not None:
+        # stale がある: 同じプロセスで誰かが作り直し中なら待たずに古い値
+        if not lock.acquire(blocking=False):
+            return entry.value
+    else:
+        lock.acquire()
+
+    try:
+        # 待っている間に同じプロセスの誰かが作っていればそれを使う
+        fresh = local.get(key)
+        if fresh is not None:
+            return fresh.value
+
+        if _try_lock(shared, key):
+            try:
+                return _build(key, builder, timeout, stale_ttl, local_timeout).value
+            finally:
+                _unlock(shared, key)
+
+        # 他のプロセスが作っている
+        if entry is not None:
+            return entry.value
+
+        deadline = time.time() + WAIT_TIMEOUT
+        while time.time() < deadline:
+            time.sleep(WAIT_STEP)
+            try:
+                entry = shared.get(_data_key(key))
+            except Exception:
+                break
+            if entry is not None:
+                local.set(key, entry, min(local_timeout, max(0.0, entry.expires_at - time.time())))
+                return entry.value
+
+        return _build(key, builder, timeout, stale_ttl, local_timeout).value
+    finally:
+        lock.release()
+
+
+def peek(key: str) -> Any:
+    """
+    今入っている値（stale でも）。無ければ None。作り直しはしない
+    """
+    entry = local.get(key)
+    if entry is None:
+        try:
+            entry = _shared().get(_data_key(key))
+        except Exception:
+            return None
+    return entry.value if entry is not None else None
+
+
+def expire(key: str, *, stale_ttl: int = DEFAULT_STALE_TTL) -> None:
+    """
+    stale にする（次に読んだ1人が作り直し、その間は他の人に古い値を返す）
+    中身が変わったときの通常の消し方。このプロセスの LRU からは消す
+    """
+    local.delete(key)
+    shared = _shared()
+    _invalidate(shared, key)
+    try:
+        entry = shared.get(_data_key(key))
+        if entry is not None:
+            shared.set(_data_key(key), entry._replace(expires_at=0.0), stale_ttl)
+    except Exception:
+        pass
+
+
+def delete(key: str) -> None:
+    """
+    古い値も含めて消す（古い値を見せてはいけないとき）
+    """
+    local.delete(key)
+    shared = _shared()
+    _invalidate(shared, key)
+    try:
+        shared.delete(_data_key(key))
+    except Exception:
+        pass
+
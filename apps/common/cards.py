@@ -0,0 +1,186 @@
+# apps/common/cards.py
+
+from typing import List, Optional, Tuple
+
+from django.utils import timezone, translation
+
+
+# ----------------------------
+# 一覧カード用の軽い読み取り専用オブジェクト
+# ----------------------------
+# 一覧（カード）で使うのはタイトル・サムネ・作者・数くらいなので、
+# モデルインスタンス（description / specs / body なども全部持つ）ではなく
+# .values() で必要な列だけ取り、__slots__ のクラスに詰める
+#
+# テンプレからはモデルと同じ名前（v.title / v.main_image.thumb.url / v.owner.username …）で読める
+# ✅ 保存・関連のたどり（v.images.all など）はできない。詳細ページはモデルのまま使う
+
+class ImageRef:
+    """
+    画像1枚ぶん（FieldFile の代わり）。URL は作るときに解決しておく
+    名前が空なら偽（テンプレの {% if v.main_image.thumb %} がモデルと同じように動く）
+    """
+    __slots__ = ("url",)
+
+    def __init__(self, url: str = ""):
+        self.url = url
+
+    def __bool__(self) -> bool:
+        return bool(self.url)
+
+    def __str__(self) -> str:
+        return self.url
+
+
+class CardImage:
+    """
+    main_image の代わり（image / thumb だけ）
+    """
+    __slots__ = ("id", "image", "thumb")
+
+    def __init__(self, id: int, image: ImageRef, thumb: ImageRef):
+        self.id = id
+        self.image = image
+        self.thumb = thumb
+
+
+class UserRef:
+    """
+    owner / author の代わり（id と username だけ）
+    """
+    __slots__ = ("id", "username")
+
+    def __init__(self, id: int, username: str):
+        self.id = id
+        self.username = username
+
+    @property
+    def pk(self) -> int:
+        return self.id
+
+    def __str__(self) -> str:
+        return self.username
+
+
+def image_url(model, field_name: str, name: Optional[str]) -> ImageRef:
+    """
+    model.field_name の storage で name の URL を作る（空なら空の ImageRef）
+    """
+    if not name:
+        return ImageRef()
+    return ImageRef(model._meta.get_field(field_name).storage.url(name))
+
+
+def card_image(model, row: dict, prefix: str, *, thumb: bool = True) -> Optional[CardImage]:
+    """
+    row の {prefix}_id / {prefix}__image / {prefix}__thumb から CardImage を作る（無ければ None）
+    thumb=False はサムネ列の無いモデル用（PostImage）
+    """
+    pk = row[f"{prefix}_id"]
+    if pk is None:
+        return None
+    return CardImage(
+        pk,
+        image_url(model, "image", row[f"{prefix}__image"]),
+        image_url(model, "thumb", row[f"{prefix}__thumb"]) if thumb else ImageRef(),
+    )
+
+
+def image_columns(prefix: str, *, thumb: bool = True) -> Tuple[str, ...]:
+    cols = (f"{prefix}_id", f"{prefix}__image")
+    return cols + (f"{prefix}__thumb",) if thumb else cols
+
+
+class Card:
+    """
+    カードの基底
+    - source_model: 元のモデル（リアクション集計の ContentType などに使う）
+    - columns: .values() に渡す列
+    - from_row(row): 1行 → カード
+
+    like_count / fav_count / user_like / user_fav は attach_reaction_summaries が埋める
+    """
+    __slots__ = ("id", "created_at", "like_count", "fav_count", "user_like", "user_fav")
+
+    source_model = None
+    columns: Tuple[str, ...] = ("id", "created_at")
+
+    def __init__(self, id: int, created_at=None):
+        self.id = id
+        self.created_at = created_at
+        self.like_count = 0
+        self.fav_count = 0
+        self.user_like = False
+        self.user_fav = False
+
+    @property
+    def pk(self) -> int:
+        return self.id
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Card":
+        raise NotImplementedError
+
+    def key_parts(self) -> Tuple:
+        """
+        カード HTML のキャッシュキーに混ぜる値（cached_cards タグ）
+        自分の世代番号では追えない、関連先の表示値（作者名など）を返す
+        """
+        return ()
+
+    @classmethod
+    def fetch(cls, queryset) -> List["Card"]:
+        """
+        queryset（絞り込み・並び・スライス済みでよい）から必要な列だけ取ってカードにする
+        select_related は要らない（columns の __ で JOIN される）
+        """
+        return [cls.from_row(row) for row in queryset.values(*cls.columns)]
+
+
+def model_of(obj):
+    """
+    カードなら元のモデル、モデルインスタンスならそのクラス
+    """
+    return getattr(obj, "source_model", None) or type(obj)
+
+
+# ----------------------------
+# カード HTML が変わったかの判定材料（cached_cards タグ / 一覧 JSON の ETag）
+# ----------------------------
+def thumbnail_url(obj) -> str:
+    """
+    カードに出る画像の URL（サムネがあればサムネ、無ければ元画像）
+    """
+    image = getattr(obj, "main_image", None)
+    if not image:
+        return ""
+    for attr in ("thumb", "image"):
+        f = getattr(image, attr, None)
+        if f:
+            try:
+                return f.url
+            except ValueError:
+                pass
+    return ""
+
+
+def cache_parts(obj) -> Tuple:
+    """
+    カード1枚ぶん: obj（世代番号になる）+ サムネ + like 数 + 自分が付けたか + key_parts()
+    """
+    key_parts = getattr(obj, "key_parts", None)
+    return (
+        obj,
+        thumbnail_url(obj),
+        getattr(obj, "like_count", ""),
+        getattr(obj, "user_like", False),
+        getattr(obj, "user_fav", False),
+        *(key_parts() if key_parts else ()),
+    )
+
+
+def render_parts() -> Tuple:
+    """
+    描画する側の条件（日時の表示は言語とタイムゾーンで変わる）
+    """
+    return translation.get_language(), timezone.get_current_timezone_name()
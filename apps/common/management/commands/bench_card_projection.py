@@ -0,0 +1,121 @@
+import gc
+import pickle
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.posts.cards import PostCard
+from apps.posts.models import Post
+from apps.vehicles.cards import VehicleCard
+from apps.vehicles.models import UserVehicle, VehicleModel
+
+
+User = get_user_model()
+
+BENCH_PREFIX = "bench_cards_"
+
+# 実データに近い「重い」列（一覧では使わないもの）
+DESCRIPTION = "カスタム内容の説明。" * 80
+SUMMARY = "ボアアップ / マフラー / サス交換。" * 20
+SPECS = {f"spec_{i}": "x" * 40 for i in range(40)}
+BODY = "ツーリングの記録。" * 200
+
+
+def _measure(fn, repeat: int):
+    """
+    fn() を repeat 回まわした時間の中央値（ms）と、1回ぶんのメモリ（tracemalloc の peak / 残った分, KiB）
+    """
+    fn()  # ContentType などを温める
+
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return statistics.median(times), peak / 1024, current / 1024, result
+
+
+class Command(BaseCommand):
+    help = (
+        "一覧の取り方（モデルインスタンス + select_related / カード）の時間とメモリを比べる。"
+        f"データは {BENCH_PREFIX}* のユーザーで作成し、終了時に削除する。"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000, help="車両 / 投稿それぞれの件数")
+        parser.add_argument("--page", type=int, default=24, help="1ページ（カード一覧1回）の件数")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows, page, repeat = options["rows"], options["page"], options["repeat"]
+
+        self._seed(rows)
+        try:
+            # 一覧と同じ並び（*_feed_idx を使う）。先頭は作ったばかりのベンチ用データ
+            vehicles = UserVehicle.objects.order_by("-created_at", "-id")
+            posts = Post.objects.order_by("-created_at", "-id")
+
+            cases = [
+                ("vehicles", vehicles, ("model", "owner", "main_image"), VehicleCard),
+                ("posts", posts, ("author", "main_image"), PostCard),
+            ]
+            self.stdout.write(
+                f"{'case':18s} {'how':9s} {'ms':>9s} {'peak KiB':>10s} {'kept KiB':>10s} {'pickle B':>10s}"
+            )
+            for label, qs, related, card in cases:
+                for n in (page, rows):
+                    for how, fn in (
+                        ("instances", lambda qs=qs, n=n, related=related: list(qs.select_related(*related)[:n])),
+                        ("cards", lambda qs=qs, n=n, card=card: card.fetch(qs[:n])),
+                    ):
+                        ms, peak, kept, result = _measure(fn, repeat if n == page else max(1, repeat // 10))
+                        size = len(pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+                        self.stdout.write(
+                            f"{f'{label} x{n}':18s} {how:9s} {ms:9.2f} {peak:10.1f} {kept:10.1f} {size:10d}"
+                        )
+        finally:
+            self._cleanup()
+
+    def _seed(self, rows: int):
+        self._cleanup()
+        owner = User.objects.create(username=f"{BENCH_PREFIX}owner")
+        model, _ = VehicleModel.objects.get_or_create(
+            slug=f"{BENCH_PREFIX}model", defaults={"maker": "Bench", "name": "Model"}
+        )
+        with transaction.atomic():
+            UserVehicle.objects.bulk_create(
+                [
+                    UserVehicle(
+                        owner=owner,
+                        model=model,
+                        title=f"bench vehicle {i}",
+                        description=DESCRIPTION,
+                        custom_summary=SUMMARY,
+                        specs=SPECS,
+                    )
+                    for i in range(rows)
+                ],
+                batch_size=500,
+            )
+            Post.objects.bulk_create(
+                [Post(author=owner, title=f"bench post {i}", body=BODY) for i in range(rows)],
+                batch_size=500,
+            )
+
+    def _cleanup(self):
+        with transaction.atomic():
+            UserVehicle.objects.filter(owner__username__startswith=BENCH_PREFIX).delete()
+            Post.objects.filter(author__username__startswith=BENCH_PREFIX).delete()
+            User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+            VehicleModel.objects.filter(slug__startswith=BENCH_PREFIX).delete()
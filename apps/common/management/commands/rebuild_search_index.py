@@ -0,0 +1,29 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.search import rebuild, searchable_models
+
+
+class Command(BaseCommand):
+    help = "サイト内検索の索引（SearchDocument）を作り直す"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            help="app_label.Model（省略で全部） 例: vehicles.UserVehicle",
+        )
+
+    def handle(self, *args, **options):
+        models = []
+        for label in options["models"]:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError):
+                raise CommandError(f"Unknown model: {label}")
+            if model not in searchable_models():
+                raise CommandError(f"Not searchable: {label}")
+            models.append(model)
+
+        n = rebuild(models or None)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {n} object(s)."))
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# 全文索引は DB ごとに別物なので RunPython で張り分ける
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE common_searchdocument_fts USING fts5(
+        title_tokens, body_tokens,
+        content='common_searchdocument', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER common_searchdocument_ai AFTER INSERT ON common_searchdocument BEGIN
+        INSERT INTO common_searchdocument_fts(rowid, title_tokens, body_tokens)
+        VALUES (new.id, new.title_tokens, new.body_tokens);
+    END
+    """,
+    """
+    CREATE TRIGGER common_searchdocument_ad AFTER DELETE ON common_searchdocument BEGIN
+        INSERT INTO common_searchdocument_fts(common_searchdocument_fts, rowid, title_tokens, body_tokens)
+        VALUES ('delete', old.id, old.title_tokens, old.body_tokens);
+    END
+    """,
+    """
+    CREATE TRIGGER common_searchdocument_au AFTER UPDATE ON common_searchdocument BEGIN
+        INSERT INTO common_searchdocument_fts(common_searchdocument_fts, rowid, title_tokens, body_tokens)
+        VALUES ('delete', old.id, old.title_tokens, old.body_tokens);
+        INSERT INTO common_searchdocument_fts(rowid, title_tokens, body_tokens)
+        VALUES (new.id, new.title_tokens, new.body_tokens);
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS common_searchdocument_au",
+    "DROP TRIGGER IF EXISTS common_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS common_searchdocument_ai",
+    "DROP TABLE IF EXISTS common_searchdocument_fts",
+]
+
+# apps.common.search.PG_DOCUMENT_VECTOR と同じ式にすること（式 index を使わせるため）
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX common_searchdocument_tsv_idx ON common_searchdocument USING GIN ((
+        setweight(to_tsvector('simple', title_tokens), 'A') ||
+        setweight(to_tsvector('simple', body_tokens), 'B')
+    ))
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS common_searchdocument_tsv_idx",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        statements = statements_by_vendor.get(schema_editor.connection.vendor, [])
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+create_fulltext_index = _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD})
+drop_fulltext_index = _run({"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRES_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('snippet', models.CharField(blank=True, default='', max_length=300)),
+                ('url', models.CharField(max_length=200)),
+                ('title_tokens', models.TextField(blank=True, default='')),
+                ('body_tokens', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
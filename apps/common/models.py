@@ -15,3 +15,32 @@ class TempUpload(models.Model):
 
     def __str__(self):
         return f"TempUpload({self.id}) {self.purpose}"
+
+
+class SearchDocument(models.Model):
+    """
+    サイト内検索の索引（1オブジェクト = 1行）
+    - *_tokens は bigram に分かち書きした文字列（apps.common.search.tokenize）
+    - 全文索引は DB ごとに migration で張る
+      SQLite: FTS5 の外部コンテンツテーブル + トリガ / PostgreSQL: GIN(to_tsvector)
+    """
+    # 単体 index は unique の先頭でまかなえるので作らない
+    content_type = models.ForeignKey("contenttypes.ContentType", on_delete=models.CASCADE, db_index=False)
+    object_id = models.PositiveBigIntegerField()
+
+    title = models.CharField(max_length=200)
+    snippet = models.CharField(max_length=300, blank=True, default="")
+    url = models.CharField(max_length=200)
+
+    title_tokens = models.TextField(blank=True, default="")
+    body_tokens = models.TextField(blank=True, default="")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["content_type", "object_id"], name="unique_search_document")
+        ]
+
+    def __str__(self):
+        return f"SearchDocument({self.content_type_id}:{self.object_id}) {self.title}"
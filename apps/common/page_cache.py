@@ -0,0 +1,328 @@
+# apps/common/page_cache.py
+
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .cards import cache_parts, render_parts
+from .ratelimit import session_user_id
+from .versions import get_version, versioned_key
+
+
+def _enabled() -> bool:
+    return getattr(settings, "PAGE_CACHE_ENABLE", True)
+
+
+def _cache():
+    return caches[getattr(settings, "PAGE_CACHE_CACHE", "default")]
+
+
+def _timeout() -> int:
+    """
+    settings.PAGE_CACHE_TIMEOUT（既定 600 秒）
+    変更は purge_page で消すので、これは消し漏れの上限
+    """
+    return int(getattr(settings, "PAGE_CACHE_TIMEOUT", 600))
+
+
+def _max_age() -> int:
+    """
+    settings.PAGE_CACHE_MAX_AGE（既定 60 秒）
+    ブラウザ / CDN 側は purge できないので短めに
+    """
+    return int(getattr(settings, "PAGE_CACHE_MAX_AGE", 60))
+
+
+# ----------------------------
+# キー
+# ----------------------------
+# ページ = (url_name, URL の kwargs)。クエリ文字列違い・別の include 先も同じページとして消せるように、
+# ページごとの世代（generation）をキーに混ぜる。purge は世代を消すだけ
+def _page_id(url_name: str, kwargs: dict) -> str:
+    raw = url_name + "|" + "|".join(f"{k}={kwargs[k]}" for k in sorted(kwargs))
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def _generation_key(page_id: str) -> str:
+    return f"page:gen:{page_id}"
+
+
+def _response_key(page_id: str, generation: str, request) -> str:
+    path = hashlib.md5(request.get_full_path().encode("utf-8")).hexdigest()
+    return f"page:{page_id}:{generation}:{path}"
+
+
+def _generation(cache, page_id: str) -> str:
+    # ✅ 世代は作った時刻（ns）。purge のたびに作り直されるので、ページが最後に変わった時刻にもなる
+    key = _generation_key(page_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, str(time.time_ns()), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _generation_time(generation) -> Optional[datetime]:
+    try:
+        return datetime.fromtimestamp(int(generation) / 1e9, tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+# ----------------------------
+# 使う側
+# ----------------------------
+def _cacheable_request(request) -> bool:
+    """
+    未ログイン（セッションに user id が無い）の GET / HEAD で、表示待ちの messages も無いときだけ
+    request.user は触らない（= User を引かない）
+    """
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if session_user_id(request) is not None:
+        return False
+    return not len(messages.get_messages(request))
+
+
+def _cacheable_response(request, response) -> bool:
+    """
+    - 200 で、ストリームでないもの
+    - Cookie を付けるもの / CSRF トークンを埋めたもの（{% csrf_token %}）は他人に返せないので入れない
+    """
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        return False
+    return True
+
+
+def _public_headers(response, ttl: Optional[int] = None) -> None:
+    patch_vary_headers(response, ("Cookie",))
+    patch_cache_control(response, public=True, max_age=min(_max_age(), ttl or _max_age()))
+
+
+def anonymous_page_cache(view_func: Optional[Callable] = None, *, timeout: Optional[Callable] = None) -> Callable:
+    """
+    未ログインのアクセスにはレスポンスを丸ごとキャッシュから返すデコレータ
+    - ページは URL 名 + kwargs で識別する（名前付き URL の view にだけ付ける）
+    - 中身が変わったら purge_page("vehicle_detail", pk=...) で消す（各アプリの signals）
+    - ログイン中は毎回描画して Cache-Control: private
+    - 時刻で表示が変わるページ（投票受付中かどうか など）は timeout(request, *args, **kwargs) で
+      次に変わるまでの秒数を返す（None なら PAGE_CACHE_TIMEOUT のまま）。保存時だけ呼ぶ
+
+        @anonymous_page_cache
+        def vehicle_detail(request, pk): ...
+
+        @anonymous_page_cache(timeout=_event_cache_timeout)
+        def event_detail(request, event_id): ...
+    """
+    if view_func is None:
+        return lambda func: anonymous_page_cache(func, timeout=timeout)
+
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        match = getattr(request, "resolver_match", None)
+        if not _enabled() or match is None or not match.url_name or not _cacheable_request(request):
+            response = view_func(request, *args, **kwargs)
+            patch_vary_headers(response, ("Cookie",))
+            if request.method in ("GET", "HEAD"):
+                patch_cache_control(response, private=True)
+            return response
+
+        cache = _cache()
+        page_id = _page_id(match.url_name, match.kwargs)
+        try:
+            key = _response_key(page_id, _generation(cache, page_id), request)
+            cached = cache.get(key)
+        except Exception:
+            key, cached = None, None
+
+        if cached is not None:
+            content, content_type, expires = cached
+            response = HttpResponse(content, content_type=content_type)
+            _public_headers(response, max(1, int(expires - time.time())))
+            return response
+
+        response = view_func(request, *args, **kwargs)
+        if hasattr(response, "render") and callable(response.render):
+            response = response.render()
+
+        if key and _cacheable_response(request, response):
+            ttl = _timeout()
+            if timeout is not None:
+                until_change = timeout(request, *args, **kwargs)
+                if until_change is not None:
+                    ttl = min(ttl, max(1, int(until_change)))
+            try:
+                cache.set(key, (response.content, response["Content-Type"], time.time() + ttl), ttl)
+            except Exception:
+                pass
+            _public_headers(response, ttl)
+        else:
+            patch_vary_headers(response, ("Cookie",))
+        return response
+
+    return _wrapped
+
+
+# ----------------------------
+# 消し込み
+# ----------------------------
+def purge_pages(pages: Iterable[Tuple[str, dict]]) -> None:
+    """
+    [(url_name, kwargs), ...] のキャッシュを commit 後に捨てる（世代を消すだけ）
+    ロールバックされた変更では捨てない
+    """
+    keys = {_generation_key(_page_id(name, kwargs)) for name, kwargs in pages}
+    if not keys:
+        return
+
+    def run():
+        try:
+            _cache().delete_many(list(keys))
+        except Exception:
+            pass
+
+    transaction.on_commit(run)
+
+
+def purge_page(url_name: str, **kwargs) -> None:
+    purge_pages([(url_name, kwargs)])
+
+
+# ----------------------------
+# 条件付き GET（ETag / Last-Modified）
+# ----------------------------
+def page_generation(url_name: str, kwargs: dict) -> str:
+    """
+    ページの今の世代（purge_page で変わる）
+    """
+    return _generation(_cache(), _page_id(url_name, kwargs))
+
+
+# ログイン中の人ごとに変わる、ページ外の表示（navbar の招待数など）。各アプリの ready() で足す
+_viewer_parts: List[Callable] = []
+
+
+def register_viewer_part(func: Callable) -> Callable:
+    """
+    func(user_id) -> ETag に混ぜる値。navbar など全ページに出るもので、ページの世代では変わらないもの
+
+        register_viewer_part(get_invite_count)  # apps.teams
+    """
+    if func not in _viewer_parts:
+        _viewer_parts.append(func)
+    return func
+
+
+def _viewer(request) -> str:
+    """
+    誰向けの HTML か（ログイン中の user id + CSRF cookie）。request.user は触らない
+    ログイン中は navbar に出るもの（User の世代番号 = ユーザー名・アイコン、register_viewer_part の値）も混ぜる
+    ✅ どれもページの世代では変わらないので、入れないと古い navbar のまま 304 になる
+    """
+    csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+    user_id = session_user_id(request)
+    if user_id is None:
+        return f":{csrf}"
+    parts = [user_id, csrf, get_version(get_user_model(), user_id)]
+    parts += [func(user_id) for func in _viewer_parts]
+    return ":".join(str(p) for p in parts)
+
+
+def conditional_page(validators: Callable) -> Callable:
+    """
+    ETag / Last-Modified を付け、ブラウザの再検証（If-None-Match / If-Modified-Since）が
+    一致すれば 304 を返すデコレータ。304 のときは view もページキャッシュも通らない（描画しない）
+
+    validators(request, *args, **kwargs) -> (last_modified or None, 追加の材料のタプル)
+    - ETag: ページの世代 + 見ている人 + last_modified + 追加の材料
+      表示に関わる変更は purge の signals（各アプリの signals.py）で世代が変わるのでそのまま拾える
+      purge されないもの（ログイン中の navbar など）は追加の材料に世代番号（apps.common.versions）を入れる
+    - Last-Modified: last_modified（updated_at など）と、ページの世代を作った時刻の新しい方
+      ✅ いいね / 投票などは updated_at を触らないが、purge で世代が作り直されるので時刻も進む
+         （If-Modified-Since だけで再検証するクライアントにも、件数が変わったページは 200 を返す）
+      ✅ ログイン中は付けない（navbar の招待数などは時刻で追えないので ETag だけにする）
+      ✅ If-None-Match が来ていればそちらだけで判定する（ブラウザは両方送る）
+
+        @conditional_page(_vehicle_validators)
+        @anonymous_page_cache
+        def vehicle_detail(request, pk): ...
+    """
+    def decorator(view_func: Callable) -> Callable:
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            match = getattr(request, "resolver_match", None)
+            if (
+                match is None or not match.url_name
+                or request.method not in ("GET", "HEAD")
+                or len(messages.get_messages(request))
+            ):
+                return view_func(request, *args, **kwargs)
+
+            try:
+                generation = page_generation(match.url_name, match.kwargs)
+                modified, parts = validators(request, *args, **kwargs)
+            except Exception:
+                return view_func(request, *args, **kwargs)
+
+            raw = "|".join(
+                [generation, _viewer(request), modified.isoformat() if modified else ""]
+                + [str(p) for p in parts]
+            )
+            etag = quote_etag(hashlib.md5(raw.encode("utf-8")).hexdigest())
+            timestamp = None
+            if session_user_id(request) is None:
+                times = [t for t in (modified, _generation_time(generation)) if t is not None]
+                timestamp = int(max(times).timestamp()) if times else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            else:
+                # Cache-Control はブラウザが 200 のときのものを使い続ける（public かどうかはここでは分からない）
+                patch_vary_headers(response, ("Cookie",))
+
+            response.setdefault("ETag", etag)
+            if timestamp is not None:
+                response.setdefault("Last-Modified", http_date(timestamp))
+            return response
+
+        return _wrapped
+
+    return decorator
+
+
+def cards_etag(name: str, items, *extra) -> str:
+    """
+    カード一覧（無限スクロールの JSON など）の ETag
+    各カードの世代番号 + サムネ + like 数（cached_cards のキーと同じ材料）+ extra（次の cursor など）
+    """
+    parts = [*render_parts(), *extra]
+    for obj in items:
+        parts += cache_parts(obj)
+    return quote_etag(versioned_key(name, *parts))
+
+
+def not_modified(request, etag: str):
+    """
+    If-None-Match が etag と一致すれば 304（ETag 付き）、しなければ None
+    中身を読んでからでないと ETag が決まらない JSON 用。描画（render_to_string）の前に呼ぶ
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response["ETag"] = etag
+    return response
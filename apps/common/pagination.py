@@ -0,0 +1,111 @@
+# apps/common/pagination.py
+
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    """
+    (created_at, id) → URL に載せられる文字列
+    """
+    raw = json.dumps([created_at.isoformat(), pk]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """
+    encode_cursor の逆。壊れていたら None（= 先頭ページ扱い）
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, pk = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(pk)
+    except Exception:
+        return None
+
+
+def keyset_page(queryset, cursor: Optional[str], per_page: int, *, fetch=list) -> Tuple[List, Optional[str]]:
+    """
+    新着順（created_at DESC, id DESC）の keyset ページング
+    - OFFSET を使わないので、何ページ目でも index を1回たどるだけ
+    - (created_at, id) の複合 index が前提（UserVehicle / Post の *_feed_idx）
+    - per_page + 1 件取って、次があるかを判定する
+    - fetch: スライス済みの queryset → list（カードで取るなら VehicleCard.fetch など）
+
+    戻り値: (このページの要素, 次ページの cursor or None)
+    """
+    qs = queryset.order_by("-created_at", "-id")
+
+    position = decode_cursor(cursor)
+    if position:
+        created_at, pk = position
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    items = fetch(qs[: per_page + 1])
+    if len(items) <= per_page:
+        return items, None
+
+    items = items[:per_page]
+    last = items[-1]
+    return items, encode_cursor(last.created_at, last.id)
+
+
+class CachedCountPaginator(Paginator):
+    """
+    COUNT(*) を毎回投げない Paginator
+    - cache_key があればキャッシュの件数を使う（無ければ数えて timeout 秒キャッシュ）
+    - PostgreSQL で planner の見積りが PAGINATOR_ESTIMATE_THRESHOLD 件以上なら、
+      正確な COUNT をやめて見積りを使う（ページ数は「だいたい」で十分なので）
+
+    キャッシュの消し込みは呼び出し側の責任（例: apps.accounts.signals）
+    """
+
+    def __init__(self, object_list, per_page, *, cache_key: Optional[str] = None, timeout: int = 600, **kwargs):
+        self.cache_key = cache_key
+        self.timeout = timeout
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self) -> int:
+        if self.cache_key:
+            cached = cache.get(self.cache_key)
+            if cached is not None:
+                return cached
+
+        n = estimated_count(self.object_list)
+        if n is None:
+            n = super().count
+
+        if self.cache_key:
+            cache.set(self.cache_key, n, self.timeout)
+        return n
+
+
+def estimated_count(queryset) -> Optional[int]:
+    """
+    PostgreSQL の planner 見積り（EXPLAIN の Plan Rows）が
+    settings.PAGINATOR_ESTIMATE_THRESHOLD（既定 100000）以上ならその値、それ以外は None
+    SQLite などでは常に None（= 正確に数える）
+    """
+    if connection.vendor != "postgresql" or not hasattr(queryset, "explain"):
+        return None
+
+    threshold = int(getattr(settings, "PAGINATOR_ESTIMATE_THRESHOLD", 100_000))
+    try:
+        plan = json.loads(queryset.order_by().values("pk").explain(format="json"))
+        rows = int(plan[0]["Plan"]["Plan Rows"])
+    except Exception:
+        return None
+
+    return rows if rows >= threshold else None
@@ -0,0 +1,233 @@
+# apps/common/ratelimit.py
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+
+
+# キャッシュが使えないとき用（プロセス内だけで数える）。窓ごとのキーなので古いものから捨てる
+_LOCAL_MAX_KEYS = 10_000
+
+
+class _LocalCounters:
+    """
+    キャッシュと同じ get_many / add / incr / decr だけを持つ、上限付きの dict
+    """
+
+    def __init__(self, max_keys: int):
+        self._data: "OrderedDict[str, int]" = OrderedDict()
+        self._max_keys = max_keys
+
+    def get_many(self, keys):
+        return {k: self._data[k] for k in keys if k in self._data}
+
+    def add(self, key, value, timeout=None):
+        if key in self._data:
+            return False
+        self._data[key] = value
+        while len(self._data) > self._max_keys:
+            self._data.popitem(last=False)
+        return True
+
+    def incr(self, key, delta=1):
+        if key not in self._data:
+            raise ValueError(key)
+        self._data[key] += delta
+        return self._data[key]
+
+    def decr(self, key, delta=1):
+        return self.incr(key, -delta)
+
+    def __len__(self):
+        return len(self._data)
+
+
+_local_counters = _LocalCounters(_LOCAL_MAX_KEYS)
+_local_lock = threading.Lock()
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """
+    "30/m" → (30, 60)
+    単位: s / m / h / d（"10/5m" のように数字も付けられる）
+    """
+    num, period = rate.split("/")
+    unit = period[-1]
+    mult = int(period[:-1] or 1)
+    seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}[unit]
+    return int(num), mult * seconds
+
+
+def _enabled() -> bool:
+    return getattr(settings, "RATELIMIT_ENABLE", True)
+
+
+def _cache():
+    return caches[getattr(settings, "RATELIMIT_CACHE", "default")]
+
+
+# ----------------------------
+# スライディングウィンドウ（前の窓の件数を経過時間で薄めて、今の窓の件数に足す）
+# 数えるのは cache.add + cache.incr だけ（どちらも原子的）なので、同時リクエストでも上限を超えない
+# ----------------------------
+class Bucket(NamedTuple):
+    key: str
+    capacity: int
+    period: int
+
+
+def _window_keys(bucket: Bucket, now: float) -> Tuple[str, str, float]:
+    """
+    (前の窓のキー, 今の窓のキー, 今の窓に入ってからの秒数)
+    """
+    index = int(now // bucket.period)
+    return f"{bucket.key}:{index - 1}", f"{bucket.key}:{index}", now - index * bucket.period
+
+
+def _wait(bucket: Bucket, prev: int, curr: int, elapsed: float) -> float:
+    """
+    前の窓 prev 件・今の窓 curr 件のとき、もう1件入れられるまでの秒数（0 なら今入る）
+    """
+    room = bucket.capacity - 1
+    period = bucket.period
+    if prev * (1 - elapsed / period) + curr <= room:
+        return 0.0
+    if curr <= room:
+        # 前の窓の重みが減るのを待つ
+        return max(period * (1 - (room - curr) / prev) - elapsed, 0.001)
+    # 今の窓だけで一杯 → 次の窓で、今の窓の重みが減るのを待つ
+    return (period - elapsed) + period * (1 - room / curr)
+
+
+def _hit(store, buckets, now: float, *, spend: bool = True) -> float:
+    """
+    全部のバケツに空きがあれば（spend なら）全部に1件足して 0、どれかが一杯なら何も足さずに待ち秒数
+    ✅ 足した後にもう一度見て、同時に来た分で超えていたら全部戻して断る
+    """
+    windows = [(bucket, *_window_keys(bucket, now)) for bucket in buckets]
+    counts = store.get_many([k for _, prev_key, curr_key, _ in windows for k in (prev_key, curr_key)])
+
+    wait = max(
+        (
+            _wait(bucket, counts.get(prev_key, 0), counts.get(curr_key, 0), elapsed)
+            for bucket, prev_key, curr_key, elapsed in windows
+        ),
+        default=0.0,
+    )
+    if wait or not spend:
+        return wait
+
+    spent = []
+    for bucket, prev_key, curr_key, elapsed in windows:
+        store.add(curr_key, 0, timeout=bucket.period * 2)
+        curr = store.incr(curr_key)
+        spent.append(curr_key)
+        wait = _wait(bucket, counts.get(prev_key, 0), curr - 1, elapsed)
+        if wait:
+            for key in spent:
+                store.decr(key)
+            return wait
+    return 0.0
+
+
+def _check(buckets, now: float, *, spend: bool = True) -> float:
+    """
+    キャッシュ（redis / memcached など）で数える。キャッシュが落ちていたらプロセス内で数える
+    """
+    try:
+        return _hit(_cache(), buckets, now, spend=spend)
+    except Exception:
+        pass
+    with _local_lock:
+        return _hit(_local_counters, buckets, now, spend=spend)
+
+
+def client_ip(request) -> str:
+    """
+    settings.RATELIMIT_IP_META（例: "HTTP_X_REAL_IP"）があればそれを使う
+    プロキシの内側で動かすときだけ設定すること（偽装できるヘッダなので）
+    """
+    meta_key = getattr(settings, "RATELIMIT_IP_META", None)
+    if meta_key and request.META.get(meta_key):
+        return request.META[meta_key].split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def session_user_id(request) -> Optional[str]:
+    """
+    request.user を触らずに（= User を引かずに）ログイン中の user id を取る
+    """
+    session = getattr(request, "session", None)
+    if session is None:
+        return None
+    return session.get(SESSION_KEY)
+
+
+def _too_many(request, retry_after: float):
+    seconds = max(1, math.ceil(retry_after))
+    if request.content_type == "application/json" or request.headers.get("Accept", "").startswith("application/json"):
+        response = JsonResponse({"error": "rate_limited", "retry_after": seconds}, status=429)
+    else:
+        response = HttpResponse("リクエストが多すぎます。しばらくしてからお試しください。", status=429)
+    response["Retry-After"] = str(seconds)
+    return response
+
+
+def rate_limit(
+    group: str,
+    *,
+    user_rate: str = "60/m",
+    ip_rate: str = "120/m",
+    methods: Tuple[str, ...] = ("POST",),
+) -> Callable:
+    """
+    IP ごと・ユーザーごとに流量を制限するデコレータ
+    超えたら 429（Retry-After 付き）を返す
+
+    ✅ login_required / require_POST より外側（一番上）に付ける。断るのは認証より前
+       - methods 以外（GET など）は数えずに通す（require_POST が 405 にする）
+       - IP はセッションより先に見る。一杯なら DB に行かずに断る（未ログインの連打もここで止まる）
+       - ログイン中ならユーザーも見る。セッションは読むが User は引かない
+       - 両方に空きがあるときだけ両方に足す（ユーザーで断ったら IP の分も使わない）
+
+        @rate_limit("reaction", user_rate="30/m", ip_rate="120/m")
+        @login_required
+        @require_POST
+        def toggle_reaction(request): ...
+    """
+    user_capacity, user_period = parse_rate(user_rate)
+    ip_capacity, ip_period = parse_rate(ip_rate)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if _enabled() and request.method in methods:
+                now = time.time()
+                ip_bucket = Bucket(f"rl:{group}:ip:{client_ip(request)}", ip_capacity, ip_period)
+
+                wait = _check([ip_bucket], now, spend=False)
+                if wait:
+                    return _too_many(request, wait)
+
+                buckets = [ip_bucket]
+                user_id = session_user_id(request)
+                if user_id is not None:
+                    buckets.append(Bucket(f"rl:{group}:user:{user_id}", user_capacity, user_period))
+
+                wait = _check(buckets, now)
+                if wait:
+                    return _too_many(request, wait)
+
+            return view_func(request, *args, **kwargs)
+
+        return _wrapped
+
+    return decorator
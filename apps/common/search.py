@@ -0,0 +1,292 @@
+# apps/common/search.py
+
+import re
+import unicodedata
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+
+from .models import SearchDocument
+
+
+# ----------------------------
+# tokenizer（日本語向け 文字 bigram）
+# ----------------------------
+# 記号・空白・"_" で区切る（"_" は FTS5 / PostgreSQL でも区切り文字扱い）
+_WORD = re.compile(r"[^\W_]+")
+
+# 長文は先頭だけ索引する（投稿本文が極端に長いとき用）
+MAX_INDEX_CHARS = 20000
+
+
+def normalize(text: str) -> str:
+    """
+    NFKC（全角英数 → 半角、半角カナ → 全角）+ 小文字化
+    """
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def bigrams(text: str) -> List[str]:
+    """
+    "スーパーカブ C125" → ["スー", "ーパ", "パー", "ーカ", "カブ", "c1", "12", "25"]
+    1文字だけの語はそのまま 1-gram で残す
+    """
+    tokens = []
+    for word in _WORD.findall(normalize(text)[:MAX_INDEX_CHARS]):
+        if len(word) == 1:
+            tokens.append(word)
+            continue
+        tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def tokenize(*texts: str) -> str:
+    """
+    索引用（空白区切り）。DB 側のトークナイザは空白で切るだけで済む
+    """
+    return " ".join(t for text in texts for t in bigrams(text))
+
+
+# ----------------------------
+# 検索対象の登録
+# ----------------------------
+class SearchEntry(NamedTuple):
+    title: str
+    body: str
+    url: str
+
+
+# "app_label.model" → instance から SearchEntry を作る関数（索引しないなら None）
+_builders: Dict[str, Callable] = {}
+
+
+def register(label: str):
+    def decorator(func):
+        _builders[label] = func
+        return func
+    return decorator
+
+
+def _join(*parts) -> str:
+    return "\n".join(p for p in parts if p)
+
+
+@register("vehicles.uservehicle")
+def _vehicle_entry(vehicle) -> Optional[SearchEntry]:
+    from apps.vehicles.models import VehiclePart
+
+    # ✅ パーツの品番・メーカー・部品名も車両の本文に入れる（"PE22" で車両が見つかる）
+    parts = (
+        VehiclePart.objects
+        .filter(vehicle_id=vehicle.id)
+        .select_related("part", "maker")
+    )
+    part_lines = [
+        " ".join(filter(None, [vp.display_part_name(), vp.maker.name if vp.maker_id else "", vp.model_number]))
+        for vp in parts
+    ]
+
+    return SearchEntry(
+        title=vehicle.title,
+        body=_join(
+            f"{vehicle.model.maker} {vehicle.model.name}",
+            vehicle.description,
+            vehicle.custom_summary,
+            *part_lines,
+        ),
+        url=reverse("vehicle_detail", args=[vehicle.id]),
+    )
+
+
+@register("posts.post")
+def _post_entry(post) -> Optional[SearchEntry]:
+    tags = [t.name for t in post.tags.all()]
+    return SearchEntry(
+        title=post.title,
+        body=_join(post.body, " ".join(tags)),
+        url=reverse("post_detail", args=[post.id]),
+    )
+
+
+@register("teams.team")
+def _team_entry(team) -> Optional[SearchEntry]:
+    # 非公開・削除済みは索引から外す
+    if not (team.is_public and team.is_active):
+        return None
+    tags = [t.name for t in team.tags.all()]
+    return SearchEntry(
+        title=team.name,
+        body=_join(team.description, " ".join(tags)),
+        url=reverse("team_detail", args=[team.id]),
+    )
+
+
+def searchable_models() -> List:
+    from django.apps import apps
+    return [apps.get_model(label) for label in _builders]
+
+
+def _label(model) -> str:
+    return f"{model._meta.app_label}.{model._meta.model_name}"
+
+
+# ----------------------------
+# 索引の更新
+# ----------------------------
+def index_object(instance) -> bool:
+    """
+    1件を索引に入れ直す（対象外なら消す）
+    戻り値: 索引に入ったか
+    """
+    build = _builders.get(_label(instance))
+    if build is None:
+        return False
+
+    ct = ContentType.objects.get_for_model(instance)
+    entry = build(instance)
+    if entry is None:
+        SearchDocument.objects.filter(content_type=ct, object_id=instance.pk).delete()
+        return False
+
+    SearchDocument.objects.update_or_create(
+        content_type=ct,
+        object_id=instance.pk,
+        defaults={
+            "title": entry.title[:200],
+            "snippet": " ".join(entry.body.split())[:300],
+            "url": entry.url,
+            "title_tokens": tokenize(entry.title),
+            "body_tokens": tokenize(entry.body),
+        },
+    )
+    return True
+
+
+def unindex_object(model, pk) -> None:
+    ct = ContentType.objects.get_for_model(model)
+    SearchDocument.objects.filter(content_type=ct, object_id=pk).delete()
+
+
+def schedule_index(model, pk) -> None:
+    """
+    commit 後に索引を更新する（ロールバックされた保存は索引しない）
+    同じ transaction で何度保存されても、commit 時点の内容で作り直す
+    """
+    def run():
+        instance = model._default_manager.filter(pk=pk).first()
+        if instance is None:
+            unindex_object(model, pk)
+        else:
+            index_object(instance)
+
+    transaction.on_commit(run)
+
+
+def rebuild(models: Iterable = None, *, chunk_size: int = 500) -> int:
+    """
+    全件作り直し（rebuild_search_index コマンド用）
+    戻り値: 索引したオブジェクト数
+    """
+    n = 0
+    for model in models or searchable_models():
+        ct = ContentType.objects.get_for_model(model)
+        with transaction.atomic():
+            SearchDocument.objects.filter(content_type=ct).delete()
+            for instance in model._default_manager.order_by("pk").iterator(chunk_size=chunk_size):
+                n += index_object(instance)
+    return n
+
+
+# ----------------------------
+# 検索
+# ----------------------------
+# 0002_searchdocument の GIN 式 index と同じ式にすること
+PG_DOCUMENT_VECTOR = (
+    "setweight(to_tsvector('simple', title_tokens), 'A') || "
+    "setweight(to_tsvector('simple', body_tokens), 'B')"
+)
+
+
+def _query_tokens(q: str) -> List[str]:
+    return list(dict.fromkeys(bigrams(q)))
+
+
+def search_ids(q: str, *, content_types: Iterable = None, limit: int = 50) -> List[int]:
+    """
+    q に当てはまる SearchDocument の id をスコア順で返す
+    - 全トークンを含むもの（AND）だけ
+    - 1文字の検索語は前方一致（"カ" → "カブ" "カス" ...）
+    """
+    tokens = _query_tokens(q)
+    if not tokens:
+        return []
+    ct_ids = [getattr(ct, "pk", ct) for ct in (content_types or [])]
+
+    if connection.vendor == "sqlite":
+        return _search_sqlite(tokens, ct_ids, limit)
+    if connection.vendor == "postgresql":
+        return _search_postgresql(tokens, ct_ids, limit)
+    return _search_generic(tokens, ct_ids, limit)
+
+
+def _ct_filter_sql(ct_ids: List[int]):
+    if not ct_ids:
+        return "", []
+    return f" AND d.content_type_id IN ({', '.join(['%s'] * len(ct_ids))})", list(ct_ids)
+
+
+def _search_sqlite(tokens: List[str], ct_ids: List[int], limit: int) -> List[int]:
+    # FTS5: "ab" "bc" は AND、"a"* は前方一致。タイトル一致を 5倍に重み付け
+    terms = [f'"{t}"*' if len(t) == 1 else f'"{t}"' for t in tokens]
+    ct_sql, ct_params = _ct_filter_sql(ct_ids)
+    sql = (
+        "SELECT d.id FROM common_searchdocument_fts f "
+        "JOIN common_searchdocument d ON d.id = f.rowid "
+        "WHERE common_searchdocument_fts MATCH %s" + ct_sql + " "
+        "ORDER BY bm25(common_searchdocument_fts, 5.0, 1.0) "
+        "LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [" ".join(terms), *ct_params, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_postgresql(tokens: List[str], ct_ids: List[int], limit: int) -> List[int]:
+    # トークンは記号を含まないので、そのまま tsquery に並べてよい
+    query = " & ".join(f"{t}:*" if len(t) == 1 else t for t in tokens)
+    ct_sql, ct_params = _ct_filter_sql(ct_ids)
+    sql = (
+        f"SELECT d.id FROM common_searchdocument d, to_tsquery('simple', %s) q "
+        f"WHERE ({PG_DOCUMENT_VECTOR}) @@ q" + ct_sql + " "
+        f"ORDER BY ts_rank({PG_DOCUMENT_VECTOR}, q) DESC, d.id DESC "
+        f"LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [query, *ct_params, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_generic(tokens: List[str], ct_ids: List[int], limit: int) -> List[int]:
+    # 全文索引の無い DB 用（LIKE になるので件数が増えたら遅い）
+    qs = SearchDocument.objects.all()
+    if ct_ids:
+        qs = qs.filter(content_type_id__in=ct_ids)
+    for t in tokens:
+        qs = qs.filter(Q(title_tokens__contains=t) | Q(body_tokens__contains=t))
+    return list(qs.order_by("-updated_at").values_list("id", flat=True)[:limit])
+
+
+def search(q: str, *, models: Iterable = None, limit: int = 50) -> List[SearchDocument]:
+    """
+    スコア順の SearchDocument（content_type は select 済み）
+    """
+    content_types = None
+    if models:
+        content_types = list(ContentType.objects.get_for_models(*models).values())
+
+    ids = search_ids(q, content_types=content_types, limit=limit)
+    by_id = SearchDocument.objects.select_related("content_type").in_bulk(ids)
+    return [by_id[i] for i in ids if i in by_id]
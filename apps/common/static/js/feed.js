@@ -0,0 +1,78 @@
+// static/js/feed.js
+// 一覧の「もっと見る」/ 無限スクロール（keyset cursor で次ページを取りに行く）
+(() => {
+  "use strict";
+
+  async function loadMore(link) {
+    if (link.dataset.loading === "1") return;
+    link.dataset.loading = "1";
+
+    const url = new URL(link.dataset.feedUrl, window.location.origin);
+    url.searchParams.set("cursor", link.dataset.cursor);
+
+    try {
+      const res = await fetch(url, { headers: { Accept: "application/json" } });
+      if (!res.ok) return;
+
+      const data = await res.json();
+      const target = document.querySelector(link.dataset.target);
+      if (target && data.html) {
+        const tpl = document.createElement("template");
+        tpl.innerHTML = data.html;
+        const added = Array.from(tpl.content.children);
+        target.append(tpl.content);
+        if (window.bindReactions) window.bindReactions(target);
+        // 足したカードだけ自分の状態を取りに行く
+        if (window.hydrateReactions && target.hasAttribute("data-hydrate-reactions")) {
+          window.hydrateReactions(added);
+        }
+      }
+
+      if (data.next_cursor) {
+        link.dataset.cursor = data.next_cursor;
+        link.setAttribute("href", "?cursor=" + data.next_cursor);
+        // まだ画面内にいれば続けて読む（observe し直すと判定がもう一度走る）
+        if (link._io) {
+          link._io.unobserve(link);
+          link._io.observe(link);
+        }
+      } else {
+        link.closest(".feed-more")?.remove();
+      }
+    } finally {
+      link.dataset.loading = "0";
+    }
+  }
+
+  function bind(container = document) {
+    container.querySelectorAll(".js-feed-more").forEach((link) => {
+      if (link.dataset.bound === "1") return;
+      link.dataset.bound = "1";
+
+      // ✅ base.html のページ遷移アニメーション（a の click を全部拾う）より先に止める
+      link.addEventListener("click", (e) => {
+        e.preventDefault();
+        e.stopImmediatePropagation();
+        loadMore(link);
+      });
+
+      // 画面下に近づいたら自動で読む
+      if ("IntersectionObserver" in window) {
+        const io = new IntersectionObserver((entries) => {
+          entries.forEach((entry) => {
+            if (!entry.isIntersecting) return;
+            if (!link.isConnected) {
+              io.disconnect();
+              return;
+            }
+            loadMore(link);
+          });
+        }, { rootMargin: "400px 0px" });
+        io.observe(link);
+        link._io = io;
+      }
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", () => bind());
+})();
@@ -31,6 +31,11 @@
       body: JSON.stringify(payload),
     });
 
+    if (res.status === 429) {
+      alert("操作が多すぎます。少し待ってからお試しください");
+      return;
+    }
+
     if (!res.ok) {
       // 401/403/400 など
       alert("ログインが必要か、エラーが発生しました");
@@ -60,9 +65,74 @@
     });
   }
 
-  // 初期bind
-  document.addEventListener("DOMContentLoaded", () => bind());
+  // 一覧のボタン / カードの数（.js-react-state）をまとめて最新状態に（/reactions/state/ へ1リクエスト）
+  // container は要素か、要素の配列（無限スクロールで足したカードだけ、など）
+  async function hydrate(container = document) {
+    const roots = container instanceof Node ? [container] : Array.from(container);
+    const buttons = roots.flatMap((root) => [
+      ...(root.matches?.(".js-react, .js-react-state") ? [root] : []),
+      ...root.querySelectorAll(".js-react, .js-react-state"),
+    ]);
+    if (!buttons.length) return;
+
+    const key = (app, model, id) => `${app}.${model}.${id}`;
+    const targets = [];
+    const seen = new Set();
+    buttons.forEach((btn) => {
+      const k = key(btn.dataset.app, btn.dataset.model, btn.dataset.objectId);
+      if (seen.has(k)) return;
+      seen.add(k);
+      targets.push({
+        app_label: btn.dataset.app,
+        model: btn.dataset.model,
+        object_id: btn.dataset.objectId,
+      });
+    });
+
+    const res = await fetch("/reactions/state/", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "X-CSRFToken": getCookie("csrftoken"),
+      },
+      body: JSON.stringify({ targets }),
+    });
+    if (!res.ok) return;
+
+    const data = await res.json();
+    const states = {};
+    (data.results || []).forEach((r) => {
+      states[key(r.app_label, r.model, r.object_id)] = r;
+    });
+
+    buttons.forEach((btn) => {
+      const st = states[key(btn.dataset.app, btn.dataset.model, btn.dataset.objectId)];
+      if (!st) return;
+      const rt = btn.dataset.reaction;
+
+      const countEl = btn.querySelector(".js-count");
+      if (countEl && st.counts && typeof st.counts[rt] !== "undefined") {
+        countEl.textContent = st.counts[rt];
+      }
+      if (st.active && typeof st.active[rt] !== "undefined") {
+        if (btn.classList.contains("js-react")) {
+          btn.style.opacity = st.active[rt] ? "1.0" : "0.6";
+        } else {
+          // カードの数: 自分が付けていれば太字（トップのスライダーと同じ）
+          btn.style.fontWeight = st.active[rt] ? "bold" : "";
+        }
+      }
+    });
+  }
+
+  // 初期bind / ログイン中の一覧（data-hydrate-reactions）は自分の状態を入れる
+  // ✅ カードの HTML はユーザー共通でキャッシュしているので、自分の状態はここで付ける
+  document.addEventListener("DOMContentLoaded", () => {
+    bind();
+    document.querySelectorAll("[data-hydrate-reactions]").forEach((grid) => hydrate(grid));
+  });
 
   // 他のJSから再bindしたいとき用（AJAXでボタン追加とか）
   window.bindReactions = bind;
+  window.hydrateReactions = hydrate;
 })();
@@ -0,0 +1,111 @@
+// static/js/typeahead.js
+// マスタ選択の入力補完（vehicles/widgets/typeahead.html と組み合わせる）
+(() => {
+  "use strict";
+
+  function init(root) {
+    const input = root.querySelector(".js-typeahead-input");
+    const hidden = root.querySelector(".js-typeahead-value");
+    const list = root.querySelector(".js-typeahead-list");
+    if (!input || !hidden || !list) return;
+
+    let timer = null;
+    let items = [];
+    let active = -1;
+    let seq = 0;
+
+    function close() {
+      list.hidden = true;
+      active = -1;
+    }
+
+    function paint() {
+      Array.from(list.children).forEach((li, i) => {
+        li.style.background = (i === active) ? "#f2f2f2" : "";
+      });
+    }
+
+    function choose(item) {
+      hidden.value = String(item.id);
+      input.value = item.name;
+      close();
+      hidden.dispatchEvent(new Event("change", { bubbles: true }));
+    }
+
+    function render() {
+      list.innerHTML = "";
+      items.forEach((item) => {
+        const li = document.createElement("li");
+        li.textContent = item.name;
+        li.style.cssText = "padding:6px 10px; cursor:pointer;";
+        // blur より先に選ばせる
+        li.addEventListener("mousedown", (e) => {
+          e.preventDefault();
+          choose(item);
+        });
+        list.appendChild(li);
+      });
+      list.hidden = items.length === 0;
+      active = -1;
+    }
+
+    async function fetchItems() {
+      const q = input.value.trim();
+      if (!q) {
+        items = [];
+        render();
+        return;
+      }
+      const url = new URL(root.dataset.url, window.location.origin);
+      url.searchParams.set("q", q);
+      url.searchParams.set("kind", root.dataset.kind);
+
+      const mySeq = ++seq;
+      const res = await fetch(url.toString(), { headers: { Accept: "application/json" } });
+      if (!res.ok || mySeq !== seq) return;  // 古いレスポンスは捨てる
+      const data = await res.json();
+      items = data.results || [];
+      render();
+    }
+
+    input.addEventListener("input", () => {
+      // 入力し直したら選択は解除（候補から選び直してもらう）
+      hidden.value = "";
+      clearTimeout(timer);
+      timer = setTimeout(fetchItems, 150);
+    });
+
+    input.addEventListener("keydown", (e) => {
+      if (list.hidden) return;
+      if (e.key === "ArrowDown") {
+        e.preventDefault();
+        active = Math.min(active + 1, items.length - 1);
+        paint();
+      } else if (e.key === "ArrowUp") {
+        e.preventDefault();
+        active = Math.max(active - 1, 0);
+        paint();
+      } else if (e.key === "Enter" && active >= 0) {
+        e.preventDefault();
+        choose(items[active]);
+      } else if (e.key === "Escape") {
+        close();
+      }
+    });
+
+    input.addEventListener("blur", close);
+  }
+
+  function bind(container = document) {
+    container.querySelectorAll(".js-typeahead").forEach((root) => {
+      if (root.dataset.bound === "1") return;
+      root.dataset.bound = "1";
+      init(root);
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", () => bind());
+
+  // AJAX で差し替えたフォーム用
+  window.bindTypeahead = bind;
+})();
@@ -1,6 +1,10 @@
 # apps/common/templatetags/common_extras.py
 
 from django import template
+from django.conf import settings
+from django.core.cache import caches
+from apps.common.cards import cache_parts, render_parts
+from apps.common.versions import versioned_key, versioned_keys
 
 register = template.Library()
 
@@ -9,3 +13,128 @@ def get_item(d, key):
     if not d:
         return None
     return d.get(key)
+
+
+# ----------------------------
+# 世代番号つきの断片キャッシュ
+# ----------------------------
+class VersionedCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, name, parts):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.name = name
+        self.parts = parts
+
+    def render(self, context):
+        timeout = self.timeout.resolve(context)
+        name = self.name.resolve(context)
+        parts = [p.resolve(context) for p in self.parts]
+
+        cache = caches[getattr(settings, "VERSION_CACHE", "default")]
+        try:
+            key = versioned_key(name, *parts)
+            html = cache.get(key)
+        except Exception:
+            return self.nodelist.render(context)
+
+        if html is None:
+            html = self.nodelist.render(context)
+            try:
+                cache.set(key, html, int(timeout))
+            except Exception:
+                pass
+        return html
+
+
+@register.tag
+def versioned_cache(parser, token):
+    """
+    中身を「オブジェクトの世代番号」つきのキーでキャッシュする（apps.common.versions）
+    オブジェクトが変わると signals で番号が上がるので、消す処理は書かなくてよい
+
+        {% load common_extras %}
+        {% versioned_cache 600 "vehicle_card" vehicle vehicle.owner %}
+          ...カードの HTML...
+        {% endversioned_cache %}
+
+    ✅ 中で使う値はすべて引数に入れること（入れていない値が変わっても作り直されない）
+       ログイン中のユーザーによって変わる部分（自分が like したか など）は入れない
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' には timeout と名前が必要です")
+
+    nodelist = parser.parse(("endversioned_cache",))
+    parser.delete_first_token()
+    return VersionedCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(b) for b in bits[3:]],
+    )
+
+
+# ----------------------------
+# カード一覧（1枚ずつ HTML をキャッシュ）
+# ----------------------------
+class CachedCardsNode(template.Node):
+    def __init__(self, items, template_name, var):
+        self.items = items
+        self.template_name = template_name
+        self.var = var
+
+    def render(self, context):
+        items = list(self.items.resolve(context) or [])
+        if not items:
+            return ""
+
+        template_name = self.template_name.resolve(context)
+        tpl = context.template.engine.get_template(template_name)
+
+        def render_one(obj):
+            with context.push({self.var: obj}):
+                return tpl.render(context)
+
+        context_parts = render_parts()
+        cache = caches[getattr(settings, "VERSION_CACHE", "default")]
+        try:
+            keys = versioned_keys(
+                f"card:{template_name}", [(*cache_parts(obj), *context_parts) for obj in items]
+            )
+            found = cache.get_many(keys)
+        except Exception:
+            return "".join(render_one(obj) for obj in items)
+
+        html, missing = [], {}
+        for obj, key in zip(items, keys):
+            if key not in found:
+                found[key] = missing[key] = render_one(obj)
+            html.append(found[key])
+
+        if missing:
+            try:
+                cache.set_many(missing, int(getattr(settings, "CARD_CACHE_TIMEOUT", 3600)))
+            except Exception:
+                pass
+        return "".join(html)
+
+
+@register.tag
+def cached_cards(parser, token):
+    """
+    items を1件ずつ template で描画する（{% for %} + {% include %} の代わり）
+    カード1枚ごとの HTML を「オブジェクトの世代番号 + サムネ + like 数」のキーでキャッシュし、
+    同じカードはどのページでも描画し直さない。世代番号も HTML も一覧ぶんまとめて1往復で取る
+
+        {% load common_extras %}
+        {% cached_cards vehicles "vehicles/_vehicle_card.html" as v %}
+
+    ✅ template はログイン中のユーザーで変わらないものにすること（自分が like したか などは出さない）
+       関連先の表示値（作者名など）は item.key_parts() でキーに混ぜる（apps.common.cards.Card）
+    """
+    bits = token.split_contents()
+    if len(bits) != 5 or bits[3] != "as":
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' は {{% {bits[0]} items \"template.html\" as var %}} の形で使います"
+        )
+    return CachedCardsNode(parser.compile_filter(bits[1]), parser.compile_filter(bits[2]), bits[4])
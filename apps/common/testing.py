@@ -0,0 +1,93 @@
+# apps/common/testing.py
+
+import re
+from typing import Iterable, Optional, Sequence, Union
+
+from django.db import connection, transaction
+from django.db.models import QuerySet
+
+
+class QueryPlanAssertionsMixin:
+    """
+    TestCase 用: クエリの実行計画が全件走査になっていないかを確かめる
+    - SQLite: EXPLAIN QUERY PLAN の "SCAN <table>"
+      ✅ "SCAN t USING (COVERING) INDEX x" も index を頭から終わりまで読む全件走査なので失敗にする
+         （絞り込めていれば "SEARCH t USING INDEX x (...)" になる）
+    - PostgreSQL: enable_seqscan=off でも残る "Seq Scan on <table>" と、
+      Index Cond の無い（index を全部読む）"Index Scan / Index Only Scan ... on <table>"
+
+    ORM の queryset だけでなく、本番で流している生 SQL（sql, params）もそのまま EXPLAIN できる
+    """
+
+    _SQLITE_SCAN = re.compile(r"\bSCAN (?:TABLE )?(\w+)")
+    _PG_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+    _PG_INDEX_SCAN = re.compile(r"Index (?:Only )?Scan(?: Backward)? using \w+ on (\w+)")
+
+    def explain(self, query: Union[QuerySet, str], params: Optional[Sequence] = None) -> str:
+        if isinstance(query, QuerySet):
+            return self._explain_queryset(query)
+        return self._explain_sql(query, params or [])
+
+    def _explain_queryset(self, queryset) -> str:
+        if connection.vendor == "postgresql":
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                return queryset.explain()
+        return queryset.explain()
+
+    def _explain_sql(self, sql: str, params) -> str:
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("EXPLAIN " + sql, params)
+                return "\n".join(row[0] for row in cursor.fetchall())
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return "\n".join(row[-1] for row in cursor.fetchall())
+
+    def scanned_tables(self, plan: str) -> set:
+        if connection.vendor != "postgresql":
+            return set(self._SQLITE_SCAN.findall(plan))
+
+        scanned = set(self._PG_SEQ_SCAN.findall(plan))
+        lines = plan.splitlines()
+        for i, line in enumerate(lines):
+            match = self._PG_INDEX_SCAN.search(line)
+            if not match:
+                continue
+            # ノードの詳細行（より深いインデント）に Index Cond が無ければ全件
+            depth = len(line) - len(line.lstrip())
+            details = []
+            for detail in lines[i + 1:]:
+                if len(detail) - len(detail.lstrip()) <= depth or "->" in detail:
+                    break
+                details.append(detail)
+            if not any("Index Cond" in d for d in details):
+                scanned.add(match.group(1))
+        return scanned
+
+    def assertNoTableScan(
+        self,
+        query: Union[QuerySet, str],
+        tables: Iterable[str],
+        msg=None,
+        *,
+        params: Optional[Sequence] = None,
+        allow: Iterable[str] = (),
+    ):
+        """
+        tables（db_table 名）のどれかが全件走査されていたら失敗
+        query は queryset か生 SQL（params 付き）。allow に入れたテーブルだけは走査を許す
+        """
+        plan = self.explain(query, params)
+        scanned = (self.scanned_tables(plan) & set(tables)) - set(allow)
+        if scanned:
+            self.fail(msg or f"table scan on {sorted(scanned)}:\n{plan}")
+
+    def assertUsesIndex(self, query: Union[QuerySet, str], index_name, msg=None, *, params=None):
+        """
+        実行計画に index_name が出てくること（想定した index で引けているか）
+        """
+        plan = self.explain(query, params)
+        if index_name not in plan:
+            self.fail(msg or f"index {index_name} not used:\n{plan}")
@@ -0,0 +1,458 @@
+import io
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from apps.interactions.models import ReactionType
+from apps.interactions.services import toggle_reaction
+from apps.posts.models import Post, Tag
+from apps.teams.models import MembershipStatus, Team, TeamMembership
+from apps.vehicles.cards import VehicleCard
+from apps.vehicles.models import Maker, Part, PartCategory, UserVehicle, VehicleImage, VehicleModel, VehiclePart
+
+from . import cache as tiered
+from . import versions
+from .page_cache import page_generation
+from .pagination import decode_cursor, encode_cursor, keyset_page
+from .search import bigrams, normalize, search
+from .testing import QueryPlanAssertionsMixin
+
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    """
+    未ログイン向けページキャッシュ（apps.common.page_cache）と signals の消し込み
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", password="pw")
+        cls.model = VehicleModel.objects.create(maker="Honda", name="Super Cub", slug="super-cub")
+        cls.vehicle = UserVehicle.objects.create(owner=cls.owner, model=cls.model, title="最初のタイトル")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_hit_until_purged(self):
+        url = reverse("vehicle_detail", kwargs={"pk": self.vehicle.pk})
+        self.assertContains(self.client.get(url), "最初のタイトル")
+
+        # signal を通らない更新はキャッシュに出ない
+        UserVehicle.objects.filter(pk=self.vehicle.pk).update(title="裏で変えたタイトル")
+        self.assertContains(self.client.get(url), "最初のタイトル")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle = UserVehicle.objects.get(pk=self.vehicle.pk)
+            vehicle.title = "保存したタイトル"
+            vehicle.save()
+        self.assertContains(self.client.get(url), "保存したタイトル")
+
+    def test_logged_in_is_not_cached(self):
+        url = reverse("vehicle_detail", kwargs={"pk": self.vehicle.pk})
+        self.client.force_login(self.owner)
+        response = self.client.get(url)
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_login_keeps_profile_page(self):
+        kwargs = {"username": self.owner.username}
+        before = page_generation("profile_detail", kwargs)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(self.client.login(username="owner", password="pw"))
+        self.assertEqual(page_generation("profile_detail", kwargs), before)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner.first_name = "Taro"
+            self.owner.save()
+        self.assertNotEqual(page_generation("profile_detail", kwargs), before)
+
+
+class VersionSignalTests(TestCase):
+    """
+    世代番号（apps.common.versions）を上げる signals
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("rider", password="pw")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_login_keeps_user_version(self):
+        before = versions.get_version(User, self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(self.client.login(username="rider", password="pw"))
+        self.assertEqual(versions.get_version(User, self.user.pk), before)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = "Taro"
+            self.user.save()
+        self.assertNotEqual(versions.get_version(User, self.user.pk), before)
+
+
+class ConditionalGetTests(TestCase):
+    """
+    詳細ページの ETag と 304（apps.common.page_cache.conditional_page）
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", password="pw")
+        cls.viewer = User.objects.create_user("viewer", password="pw")
+        cls.model = VehicleModel.objects.create(maker="Honda", name="Super Cub", slug="super-cub")
+        cls.vehicle = UserVehicle.objects.create(owner=cls.owner, model=cls.model, title="カブ")
+        cls.post = Post.objects.create(author=cls.owner, vehicle=cls.vehicle, title="整備記録", body="本文")
+        cls.tag = Tag.objects.create(name="整備", slug="maintenance")
+
+        category = PartCategory.objects.create(name="マフラー", slug="muffler")
+        cls.part = Part.objects.create(category=category, name="スリップオン", slug="slip-on")
+        cls.maker = Maker.objects.create(name="キタコ", slug="kitaco")
+
+    def setUp(self):
+        cache.clear()
+        self.vehicle_url = reverse("vehicle_detail", kwargs={"pk": self.vehicle.pk})
+        self.post_url = reverse("post_detail", kwargs={"pk": self.post.pk})
+        # CSRF cookie を受け取っておく（cookie も ETag の材料なので、1回目と2回目で変わる）
+        self.client.get(self.vehicle_url)
+        self.client.get(self.post_url)
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_not_modified(self):
+        etag = self.etag(self.vehicle_url)
+        response = self.client.get(self.vehicle_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_etag_is_stable(self):
+        self.assertEqual(self.etag(self.vehicle_url), self.etag(self.vehicle_url))
+        self.assertEqual(self.etag(self.post_url), self.etag(self.post_url))
+
+    def test_part_and_image_change_etag(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+
+        buf = io.BytesIO()
+        Image.new("RGB", (8, 8)).save(buf, "JPEG")
+        upload = SimpleUploadedFile("test.jpg", buf.getvalue(), content_type="image/jpeg")
+
+        before = self.etag(self.vehicle_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            VehiclePart.objects.create(vehicle=self.vehicle, part=self.part, maker=self.maker)
+        after_part = self.etag(self.vehicle_url)
+        self.assertNotEqual(after_part, before)
+
+        with override_settings(MEDIA_ROOT=media_root), self.captureOnCommitCallbacks(execute=True):
+            VehicleImage.objects.create(vehicle=self.vehicle, image=upload)
+        self.assertNotEqual(self.etag(self.vehicle_url), after_part)
+
+    def test_tag_change_etag(self):
+        before = self.etag(self.post_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add(self.tag)
+        self.assertNotEqual(self.etag(self.post_url), before)
+
+    def test_owner_login_keeps_etag(self):
+        before = self.etag(self.vehicle_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(self.client_class().login(username="owner", password="pw"))
+        self.assertEqual(self.etag(self.vehicle_url), before)
+
+    def test_invite_changes_viewer_etag(self):
+        team = Team.objects.create(owner=self.owner, name="カブ部")
+        self.client.force_login(self.viewer)
+        self.client.get(self.vehicle_url)  # ログインで CSRF トークンが入れ替わる
+        before = self.etag(self.vehicle_url)
+        self.assertEqual(self.etag(self.vehicle_url), before)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TeamMembership.objects.create(
+                team=team, user=self.viewer, status=MembershipStatus.INVITED, invited_by=self.owner
+            )
+        after = self.etag(self.vehicle_url)
+        self.assertNotEqual(after, before)
+        self.assertEqual(self.client.get(self.vehicle_url, HTTP_IF_NONE_MATCH=before).status_code, 200)
+
+
+    def revalidate_by_date(self, url):
+        """
+        If-None-Match を送らず If-Modified-Since だけで再検証する（世代を作る時刻は 5 秒先にする）
+        """
+        last_modified = self.client.get(url)["Last-Modified"]
+        return last_modified, lambda: self._get_later(url, last_modified)
+
+    def _get_later(self, url, last_modified):
+        with mock.patch("time.time_ns", return_value=time.time_ns() + 5 * 10**9):
+            return self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    def test_if_modified_since_not_modified(self):
+        _, get = self.revalidate_by_date(self.vehicle_url)
+        self.assertEqual(get().status_code, 304)
+
+    def test_reaction_advances_last_modified(self):
+        # いいねは updated_at を触らないが、ページの世代が作り直されるので Last-Modified も進む
+        before, get = self.revalidate_by_date(self.vehicle_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            toggle_reaction(self.viewer, ContentType.objects.get_for_model(UserVehicle), self.vehicle.id, ReactionType.LIKE)
+        response = get()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["Last-Modified"], before)
+
+    def test_owner_rename_advances_last_modified(self):
+        _, get = self.revalidate_by_date(self.post_url)
+        self.owner.username = "owner2"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner.save()
+        self.assertEqual(get().status_code, 200)
+
+    def test_logged_in_has_no_last_modified(self):
+        # navbar（招待数など）は時刻で追えないので、ログイン中は ETag だけ
+        self.client.force_login(self.viewer)
+        response = self.client.get(self.vehicle_url)
+        self.assertIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+
+
+class CachedCardsTests(TestCase):
+    """
+    {% cached_cards %}: カード HTML は世代番号 / like 数 / key_parts が変わったときだけ描き直す
+    """
+
+    TEMPLATE = Template(
+        '{% load common_extras %}{% cached_cards items "vehicles/_vehicle_card.html" as v %}'
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("owner", password="pw")
+        model = VehicleModel.objects.create(maker="Honda", name="Super Cub", slug="super-cub")
+        cls.vehicle = UserVehicle.objects.create(owner=owner, model=model, title="カブ")
+
+    def setUp(self):
+        cache.clear()
+        self.card = VehicleCard.fetch(UserVehicle.objects.filter(pk=self.vehicle.pk))[0]
+
+    def render(self):
+        return self.TEMPLATE.render(Context({"items": [self.card]}))
+
+    def test_reuses_html_until_version_bump(self):
+        self.assertIn("カブ", self.render())
+
+        # 世代番号が同じなら（保存の signals が来ていなければ）キャッシュの HTML のまま
+        self.card.title = "ハンターカブ"
+        self.assertNotIn("ハンターカブ", self.render())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            versions.bump(UserVehicle, self.vehicle.pk)
+        self.assertIn("ハンターカブ", self.render())
+
+    def test_like_count_change_rerenders(self):
+        self.card.like_count = 1
+        self.assertIn('<span class="js-count">1</span>', self.render())
+        self.card.like_count = 2
+        self.assertIn('<span class="js-count">2</span>', self.render())
+
+    def test_owner_rename_rerenders(self):
+        self.render()
+        self.card.owner.username = "renamed"
+        self.assertIn("renamed", self.render())
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    新着順の keyset ページング（apps.common.pagination.keyset_page）
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user("author", password="pw")
+        Post.objects.bulk_create([Post(author=author, title=f"p{i}", body="b") for i in range(7)])
+        # 同じ created_at が並ぶ（bulk 投入など）。id で順番が決まること
+        same = timezone.now() - timedelta(hours=1)
+        ids = list(Post.objects.order_by("id").values_list("id", flat=True))
+        Post.objects.filter(id__in=ids[:5]).update(created_at=same)
+        Post.objects.filter(id__in=ids[5:]).update(created_at=same + timedelta(minutes=1))
+
+    def test_cursor_round_trip(self):
+        created_at = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(created_at, 42)), (created_at, 42))
+        self.assertIsNone(decode_cursor("not-a-cursor"))
+        self.assertIsNone(decode_cursor(None))
+
+    def test_pages_walk_ties_without_gaps(self):
+        expected = list(Post.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            items, cursor = keyset_page(Post.objects.all(), cursor, 3)
+            seen += [p.id for p in items]
+            pages += 1
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+    def test_last_full_page_has_no_cursor(self):
+        items, cursor = keyset_page(Post.objects.all(), None, 7)
+        self.assertEqual(len(items), 7)
+        self.assertIsNone(cursor)
+
+
+class SearchTokenizerTests(SimpleTestCase):
+    """
+    日本語向け bigram（apps.common.search）
+    """
+
+    def test_bigrams(self):
+        self.assertEqual(
+            bigrams("スーパーカブ C125"),
+            ["スー", "ーパ", "パー", "ーカ", "カブ", "c1", "12", "25"],
+        )
+        # 1文字の語は 1-gram、記号と "_" は区切り
+        self.assertEqual(bigrams("カ・ブ_ab"), ["カ", "ブ", "ab"])
+
+    def test_normalize(self):
+        self.assertEqual(normalize("ＣＴ１２５"), "ct125")
+        self.assertEqual(normalize("ｶﾌﾞ"), "カブ")
+        self.assertEqual(bigrams("ＣＴ１２５"), bigrams("ct125"))
+
+
+class SearchIndexTests(TestCase):
+    """
+    索引の更新（signals → commit 後に作り直し）と並び順
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="pw")
+
+    def create_post(self, title, body="本文"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(author=self.author, title=title, body=body)
+
+    def titles(self, q):
+        return [d.title for d in search(q, models=[Post])]
+
+    def test_reindexed_on_save_and_delete(self):
+        post = self.create_post("スーパーカブ110")
+        self.assertEqual(self.titles("スーパーカブ"), [post.title])
+        self.assertEqual(self.titles("ｽｰﾊﾟｰｶﾌﾞ"), [post.title])  # 半角カナでも
+
+        post.title = "ハンターカブ"
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        self.assertEqual(self.titles("スーパー"), [])
+        self.assertEqual(self.titles("ハンター"), [post.title])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        self.assertEqual(self.titles("ハンター"), [])
+
+    def test_tag_change_reindexes_post(self):
+        post = self.create_post("整備記録")
+        with self.captureOnCommitCallbacks(execute=True):
+            post.tags.add(Tag.objects.create(name="マフラー交換", slug="muffler"))
+        self.assertEqual(self.titles("マフラー"), [post.title])
+
+    def test_all_terms_must_match(self):
+        self.create_post("カブ 整備")
+        self.create_post("カブ ツーリング")
+        self.assertEqual(self.titles("カブ ツーリング"), ["カブ ツーリング"])
+
+    @skipUnless(connection.vendor in ("sqlite", "postgresql"), "全文索引（FTS5 / tsvector）の順位")
+    def test_title_match_ranks_first(self):
+        self.create_post("ツーリング日記", body="マフラーを替えた")
+        self.create_post("マフラー交換", body="ツーリング前に")
+        self.assertEqual(self.titles("マフラー"), ["マフラー交換", "ツーリング日記"])
+
+
+class TieredCacheTests(SimpleTestCase):
+    """
+    2段キャッシュ（apps.common.cache.get_or_build）の消し込みと、キャッシュが落ちているとき
+    """
+
+    key = "tests:tiered"
+
+    def setUp(self):
+        cache.clear()
+        tiered.local.clear()
+
+    def test_builds_once(self):
+        builder = mock.Mock(return_value=1)
+        self.assertEqual(tiered.get_or_build(self.key, builder), 1)
+        self.assertEqual(tiered.get_or_build(self.key, builder), 1)
+        self.assertEqual(builder.call_count, 1)
+
+    def test_expire_during_build_is_not_undone(self):
+        # 作っている最中に中身が変わって expire された → 作った値（古いデータ）は入れない
+        tiered.get_or_build(self.key, lambda: "old")
+        tiered.expire(self.key)
+
+        def build_while_changed():
+            tiered.expire(self.key)
+            return "built-before-change"
+
+        self.assertEqual(tiered.get_or_build(self.key, build_while_changed), "built-before-change")
+        self.assertEqual(tiered.get_or_build(self.key, lambda: "new"), "new")
+
+    def test_delete_during_build_is_not_undone(self):
+        def build_while_deleted():
+            tiered.delete(self.key)
+            return "built-before-change"
+
+        tiered.get_or_build(self.key, build_while_deleted)
+        self.assertIsNone(tiered.peek(self.key))
+
+    def test_lock_errors_fall_back_to_build(self):
+        with mock.patch.object(cache, "add", side_effect=ConnectionError), \
+                mock.patch.object(cache, "delete", side_effect=ConnectionError):
+            self.assertEqual(tiered.get_or_build(self.key, lambda: 1), 1)
+
+
+class QueryPlanParsingTests(QueryPlanAssertionsMixin, SimpleTestCase):
+    """
+    EXPLAIN の読み方（どれを全件走査とみなすか）
+    """
+
+    def test_sqlite_index_scans_count_as_scans(self):
+        plan = "\n".join([
+            "SCAN reaction USING COVERING INDEX reaction_target_idx",
+            "SCAN counter USING INDEX counter_idx",
+            "SEARCH vote USING INDEX vote_idx (event_id=? AND user_id=?)",
+            "SCAN CONSTANT ROW",
+        ])
+        self.assertEqual(self.scanned_tables(plan), {"reaction", "counter", "CONSTANT"})
+
+    def test_postgresql_index_scan_without_condition(self):
+        plan = "\n".join([
+            "Nested Loop  (cost=0.29..16.34 rows=1 width=8)",
+            "  ->  Index Only Scan using reaction_target_idx on reaction  (cost=0.29..8.30 rows=1 width=8)",
+            "        Index Cond: ((content_type_id = 1) AND (object_id = 2))",
+            "  ->  Index Scan using counter_pkey on counter  (cost=0.15..8.17 rows=1 width=8)",
+            "        Filter: (shard = 0)",
+            "  ->  Seq Scan on vote  (cost=0.00..1.01 rows=1 width=8)",
+        ])
+        with mock.patch("apps.common.testing.connection", SimpleNamespace(vendor="postgresql")):
+            self.assertEqual(self.scanned_tables(plan), {"counter", "vote"})
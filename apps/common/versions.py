@@ -0,0 +1,149 @@
+# apps/common/versions.py
+
+import hashlib
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import models, transaction
+
+
+# ----------------------------
+# モデルインスタンスごとの世代番号
+# ----------------------------
+# 中身が変わったら signals で番号を上げる。キャッシュのキーに番号を混ぜておけば、
+# 古いキーは読まれなくなって timeout で消える（個別の delete を書かなくてよい）
+#
+# 番号が消えていた（evict された）ときは今の時刻（ns）から始め直す。
+# 1 から振り直すと、消える前と同じ番号になって古い断片を拾うことがあるので
+
+def _cache():
+    return caches[getattr(settings, "VERSION_CACHE", "default")]
+
+
+def _label(model) -> str:
+    # proxy モデルでも同じ番号を見る
+    return model._meta.concrete_model._meta.label_lower
+
+
+def version_key(model, pk) -> str:
+    return f"ver:{_label(model)}:{pk}"
+
+
+def _fresh() -> int:
+    return time.time_ns()
+
+
+def _start(cache, key: str) -> int:
+    # 同時に振っても add で1つに決まる
+    cache.add(key, _fresh(), timeout=None)
+    return cache.get(key) or _fresh()
+
+
+def _incr(cache, key: str) -> int:
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _fresh()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def get_versions(targets: Iterable[Tuple[type, int]]) -> Dict[Tuple[str, int], int]:
+    """
+    [(model, pk), ...] の番号を1往復で返す {(label, pk): version}
+    無いものはここで振る
+    """
+    keys = {version_key(model, pk): (_label(model), pk) for model, pk in targets}
+    if not keys:
+        return {}
+
+    cache = _cache()
+    found = cache.get_many(list(keys))
+    for key in keys.keys() - found.keys():
+        found[key] = _start(cache, key)
+
+    return {keys[k]: v for k, v in found.items()}
+
+
+def get_version(model, pk) -> int:
+    return get_versions([(model, pk)])[(_label(model), pk)]
+
+
+def bump(model, pk) -> None:
+    """
+    commit 後に番号を上げる（ロールバックされた変更では上げない）
+    """
+    if pk is None:
+        return
+    key = version_key(model, pk)
+
+    transaction.on_commit(lambda: _incr(_cache(), key))
+
+
+# ----------------------------
+# 名前付きの世代番号（モデルに紐づかないもの: マスタのカタログ、typeahead の索引など）
+# プロセス内に丸ごと持っているものを「番号が進んでいたら作り直す」ために使う
+# ----------------------------
+def get_stamp(key: str) -> int:
+    """
+    key の今の番号（無ければここで振る）
+    """
+    cache = _cache()
+    version = cache.get(key)
+    return _start(cache, key) if version is None else version
+
+
+def bump_stamp(key: str) -> int:
+    """
+    key の番号を上げて、上げた後の番号を返す（呼ぶ側で commit 後に呼ぶこと）
+    """
+    return _incr(_cache(), key)
+
+
+# ----------------------------
+# キーを作る
+# ----------------------------
+def _identity(part):
+    """
+    世代番号を持つもの → (model, pk)。モデルインスタンスとカード（apps.common.cards）が対象
+    """
+    if isinstance(part, models.Model):
+        return (type(part), part.pk) if part.pk is not None else None
+    model = getattr(part, "source_model", None)
+    if model is not None and getattr(part, "pk", None) is not None:
+        return model, part.pk
+    return None
+
+
+def versioned_keys(name: str, rows: Iterable[Sequence]) -> List[str]:
+    """
+    versioned_key の複数版（カード一覧など）。全行ぶんの番号を1往復でまとめて取る
+    """
+    rows = [list(parts) for parts in rows]
+    identities = [[_identity(p) for p in parts] for parts in rows]
+    versions = get_versions({ident for idents in identities for ident in idents if ident})
+
+    keys = []
+    for parts, idents in zip(rows, identities):
+        raw = []
+        for p, ident in zip(parts, idents):
+            if ident:
+                model, pk = ident
+                raw.append(f"{_label(model)}.{pk}.{versions[(_label(model), pk)]}")
+            else:
+                raw.append(str(p))
+        digest = hashlib.md5("|".join(raw).encode("utf-8")).hexdigest()
+        keys.append(f"vc:{name}:{digest}")
+    return keys
+
+
+def versioned_key(name: str, *parts) -> str:
+    """
+    name + 部品から キーを作る。部品がモデルインスタンス（またはカード）なら (label, pk, 世代番号) を混ぜる
+    それ以外（サムネイルの URL など）は文字列にして混ぜる。番号は1往復でまとめて取る
+
+        versioned_key("vehicle_card", vehicle, vehicle.owner)
+    """
+    return versioned_keys(name, [parts])[0]
@@ -0,0 +1,76 @@
+# apps/events/cards.py
+
+from apps.common.cards import Card, UserRef, card_image, image_columns
+from apps.vehicles.cards import ModelRef, VehicleCard
+from apps.vehicles.models import VehicleImage
+
+from .models import Event, EventEntry
+
+
+class TeamRef:
+    """
+    organizer_team の代わり（名前だけ）
+    """
+    __slots__ = ("id", "name")
+
+    def __init__(self, id: int, name: str):
+        self.id = id
+        self.name = name
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class EventCard(Card):
+    """
+    イベントカード（トップのスライダー）。description / スポンサー情報は読まない
+    """
+    __slots__ = ("title", "organizer", "organizer_team")
+
+    source_model = Event
+    columns = Card.columns + (
+        "title",
+        "organizer_id", "organizer__username",
+        "organizer_team_id", "organizer_team__name",
+    )
+
+    @classmethod
+    def from_row(cls, row: dict) -> "EventCard":
+        card = cls(row["id"], row["created_at"])
+        card.title = row["title"]
+        card.organizer = UserRef(row["organizer_id"], row["organizer__username"])
+        card.organizer_team = (
+            TeamRef(row["organizer_team_id"], row["organizer_team__name"])
+            if row["organizer_team_id"] else None
+        )
+        return card
+
+
+class EntryCard(Card):
+    """
+    エントリー履歴の1行（プロフィール）: イベント名 + 参加車両のカード
+    """
+    __slots__ = ("event", "vehicle")
+
+    source_model = EventEntry
+    columns = Card.columns + (
+        "event_id", "event__title",
+        "vehicle_id", "vehicle__title", "vehicle__model_id", "vehicle__model__maker", "vehicle__model__name",
+        *image_columns("vehicle__main_image"),
+    )
+
+    @classmethod
+    def from_row(cls, row: dict) -> "EntryCard":
+        card = cls(row["id"], row["created_at"])
+
+        card.event = EventCard(row["event_id"])
+        card.event.title = row["event__title"]
+
+        vehicle = VehicleCard(row["vehicle_id"])
+        vehicle.title = row["vehicle__title"]
+        vehicle.model = ModelRef(
+            row["vehicle__model_id"], row["vehicle__model__maker"], row["vehicle__model__name"]
+        )
+        vehicle.main_image = card_image(VehicleImage, row, "vehicle__main_image")
+        card.vehicle = vehicle
+        return card
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_event_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='eventvote',
+            name='event',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='events.event'),
+        ),
+        migrations.AddIndex(
+            model_name='eventvote',
+            index=models.Index(fields=['event', 'user', 'entry'], name='eventvote_event_user_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_eventvote_indexes'),
+        ('teams', '0003_directory_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-starts_at', '-id'], name='event_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['ends_at'], name='event_ended_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['organizer_team', '-starts_at', '-id'], name='event_team_idx'),
+        ),
+    ]
@@ -2,12 +2,55 @@
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Case, Q, Value, When
 from django.utils import timezone
 
 from apps.vehicles.models import UserVehicle
 from apps.teams.models import Team
 
 
+class EventStatus(models.TextChoices):
+    UPCOMING = "upcoming", "Upcoming"  # 開始前
+    ACTIVE = "active", "Open"          # 開催中（投票・エントリー可）
+    ENDED = "ended", "Closed"          # 終了
+
+
+class EventQuerySet(models.QuerySet):
+    """
+    開催状態を SQL で絞る / 付ける（Event.is_active と同じ判定）
+    - upcoming: now < starts_at
+    - active:   starts_at <= now かつ（ends_at なし or now <= ends_at）
+    - ended:    ends_at < now
+    """
+
+    @staticmethod
+    def _status_q(status: str, now) -> Q:
+        if status == EventStatus.UPCOMING:
+            return Q(starts_at__gt=now)
+        if status == EventStatus.ACTIVE:
+            return Q(starts_at__lte=now) & (Q(ends_at__isnull=True) | Q(ends_at__gte=now))
+        if status == EventStatus.ENDED:
+            return Q(ends_at__lt=now)
+        raise ValueError(f"unknown status: {status}")
+
+    def with_status(self, status: str, now=None):
+        return self.filter(self._status_q(status, now or timezone.now()))
+
+    def annotate_status(self, now=None):
+        """
+        status（EventStatus の値）を付ける（一覧で is_active を1件ずつ計算しない）
+        """
+        now = now or timezone.now()
+        return self.annotate(
+            status=Case(
+                When(self._status_q(EventStatus.UPCOMING, now), then=Value(EventStatus.UPCOMING.value)),
+                When(self._status_q(EventStatus.ENDED, now), then=Value(EventStatus.ENDED.value)),
+                default=Value(EventStatus.ACTIVE.value),
+                output_field=models.CharField(),
+            )
+        )
+
+
 class Event(models.Model):
     # 主催者（個人）
     organizer = models.ForeignKey(
@@ -37,12 +80,39 @@ class Event(models.Model):
     is_published = models.BooleanField(default=True)
     winners_public = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     sponsor_name = models.CharField(max_length=120, blank=True, default="")
     sponsor_url = models.URLField(blank=True, default="")
     sponsor_logo = models.ImageField(upload_to="sponsors/%Y/%m/", blank=True, null=True)
     sponsor_message = models.TextField(blank=True, default="")
 
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        # 一覧は公開分しか見ないので、部分 index（is_published=True のみ）にする
+        # （bool を先頭列にすると SQLite では index で絞れない）
+        indexes = [
+            # ✅ 一覧（開催日順）と upcoming / active の範囲絞り込み
+            models.Index(
+                fields=["-starts_at", "-id"],
+                name="event_published_idx",
+                condition=Q(is_published=True),
+            ),
+            # ended（ends_at < now）
+            models.Index(
+                fields=["ends_at"],
+                name="event_ended_idx",
+                condition=Q(is_published=True),
+            ),
+            # 主催チームで絞る
+            models.Index(
+                fields=["organizer_team", "-starts_at", "-id"],
+                name="event_team_idx",
+                condition=Q(is_published=True),
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -57,6 +127,32 @@ class Event(models.Model):
             return False
         return True
 
+    def last_status_change(self, now=None):
+        """
+        is_active が最後に切り替わった時刻（まだ一度も変わっていなければ None）
+        """
+        if not self.is_published:
+            return None
+        now = now or timezone.now()
+        if self.ends_at and now > self.ends_at:
+            return self.ends_at
+        if self.starts_at and now >= self.starts_at:
+            return self.starts_at
+        return None
+
+    def next_status_change(self, now=None):
+        """
+        is_active が次に切り替わる時刻（この先もう変わらなければ None）
+        """
+        if not self.is_published:
+            return None
+        now = now or timezone.now()
+        if self.starts_at and now < self.starts_at:
+            return self.starts_at
+        if self.ends_at and now <= self.ends_at:
+            return self.ends_at
+        return None
+
 
 class EventEntry(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="entries")
@@ -73,7 +169,8 @@ class EventEntry(models.Model):
 
 
 class EventVote(models.Model):
-    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="votes")
+    # event 単体の index は unique / 複合 index の先頭でまかなえるので作らない
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="votes", db_index=False)
     entry = models.ForeignKey(EventEntry, on_delete=models.CASCADE, related_name="votes")
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="event_votes")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -82,6 +179,10 @@ class EventVote(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["event", "entry", "user"], name="unique_vote_per_entry_user")
         ]
+        indexes = [
+            # 「このイベントで自分が投票したエントリー」（_voted_entry_ids）を covering で引く
+            models.Index(fields=["event", "user", "entry"], name="eventvote_event_user_idx"),
+        ]
 
     def __str__(self):
         return f"vote:{self.event_id}:{self.entry_id}:{self.user_id}"
@@ -0,0 +1,66 @@
+# apps/events/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.accounts.signals import profile_pages
+from apps.common import versions
+from apps.common.page_cache import purge_page, purge_pages
+from apps.pages import home_feed
+from apps.vehicles.models import UserVehicle
+
+from .models import Award, Event, EventEntry, EventVote
+
+
+# ----------------------------
+# トップのスナップショット（apps.pages.home_feed）を捨てる
+# ----------------------------
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def home_snapshot_on_change(sender, instance, **kwargs):
+    home_feed.invalidate()
+
+
+# ----------------------------
+# 未ログイン向けページキャッシュ（apps.common.page_cache）の消し込み
+# ----------------------------
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def page_cache_event(sender, instance, **kwargs):
+    # プロフィールのエントリー履歴にイベント名が出る
+    owner_ids = EventEntry.objects.filter(event_id=instance.id).values_list("vehicle__owner_id", flat=True)
+    purge_pages([("event_detail", {"event_id": instance.id})] + profile_pages(owner_ids))
+
+
+@receiver(post_save, sender=EventEntry)
+@receiver(post_delete, sender=EventEntry)
+def page_cache_event_entry(sender, instance, **kwargs):
+    owner_id = UserVehicle.objects.filter(id=instance.vehicle_id).values_list("owner_id", flat=True).first()
+    purge_pages([("event_detail", {"event_id": instance.event_id})] + profile_pages([owner_id]))
+
+
+@receiver(post_save, sender=EventVote)
+@receiver(post_delete, sender=EventVote)
+@receiver(post_save, sender=Award)
+@receiver(post_delete, sender=Award)
+def page_cache_event_child(sender, instance, **kwargs):
+    purge_page("event_detail", event_id=instance.event_id)
+
+
+# ----------------------------
+# 世代番号（apps.common.versions）を上げる（エントリー・投票・表彰の変更でも上げる）
+# ----------------------------
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def version_event(sender, instance, **kwargs):
+    versions.bump(Event, instance.pk)
+
+
+@receiver(post_save, sender=EventEntry)
+@receiver(post_delete, sender=EventEntry)
+@receiver(post_save, sender=EventVote)
+@receiver(post_delete, sender=EventVote)
+@receiver(post_save, sender=Award)
+@receiver(post_delete, sender=Award)
+def version_event_child(sender, instance, **kwargs):
+    versions.bump(Event, instance.event_id)
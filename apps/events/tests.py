@@ -1,3 +1,204 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_max_age
+
+from apps.common.testing import QueryPlanAssertionsMixin
+from apps.vehicles.models import UserVehicle, VehicleModel
+
+from apps.teams.models import Team
+
+from .models import Event, EventEntry, EventStatus, EventVote
+from .views import _entries_with_votes
+
+
+User = get_user_model()
+
+HOT_TABLES = {EventVote._meta.db_table, EventEntry._meta.db_table}
+
+
+class EventVoteQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """
+    EventVote のホットクエリが index を使っているか（EXPLAIN）
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        organizer = User.objects.create_user("organizer", password="pw")
+        model = VehicleModel.objects.create(maker="Honda", name="Super Cub", slug="super-cub")
+        cls.events = Event.objects.bulk_create(
+            [Event(organizer=organizer, title=f"e{i}") for i in range(3)]
+        )
+        cls.users = User.objects.bulk_create([User(username=f"u{i}") for i in range(20)])
+
+        vehicles = UserVehicle.objects.bulk_create(
+            [UserVehicle(owner=u, model=model, title=f"v{u.username}") for u in cls.users]
+        )
+        entries = EventEntry.objects.bulk_create(
+            [EventEntry(event=e, vehicle=v) for e in cls.events for v in vehicles]
+        )
+        EventVote.objects.bulk_create(
+            [
+                EventVote(event_id=entry.event_id, entry=entry, user=u)
+                for entry in entries
+                for u in cls.users[: (entry.vehicle_id % 7) + 1]
+            ]
+        )
+
+        cls.event = cls.events[0]
+        cls.user = cls.users[0]
+        cls.entry = entries[0]
+
+    def test_voted_entry_ids(self):
+        qs = EventVote.objects.filter(event=self.event, user=self.user).values_list("entry_id", flat=True)
+        self.assertNoTableScan(qs, HOT_TABLES)
+        self.assertUsesIndex(qs, "eventvote_event_user_idx")
+
+    def test_vote_toggle_lookup(self):
+        qs = EventVote.objects.filter(event=self.event, entry=self.entry, user=self.user)
+        self.assertNoTableScan(qs, HOT_TABLES)
+
+    def test_entries_with_vote_counts(self):
+        self.assertNoTableScan(_entries_with_votes(self.event), HOT_TABLES)
+
+
+class EventDirectoryTests(TestCase):
+    """
+    イベント一覧の開催状態（SQL の with_status / annotate_status）と絞り込み
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user("organizer", password="pw")
+        cls.team = Team.objects.create(owner=cls.organizer, name="カブ部")
+
+    def test_sql_status_matches_is_active_at_boundaries(self):
+        now = timezone.now()
+        tick = timedelta(microseconds=1)
+        cases = {
+            "starts_now": (now, None),
+            "starts_next_tick": (now + tick, None),
+            "ends_now": (now - timedelta(hours=1), now),
+            "ended_last_tick": (now - timedelta(hours=1), now - tick),
+            "open_ended": (now - timedelta(hours=1), None),
+        }
+        events = {
+            name: Event.objects.create(organizer=self.organizer, title=name, starts_at=starts_at, ends_at=ends_at)
+            for name, (starts_at, ends_at) in cases.items()
+        }
+
+        statuses = dict(Event.objects.annotate_status(now).values_list("title", "status"))
+        active = set(Event.objects.with_status(EventStatus.ACTIVE, now).values_list("title", flat=True))
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            for name, event in events.items():
+                with self.subTest(name):
+                    self.assertEqual(name in active, event.is_active)
+                    self.assertEqual(statuses[name] == EventStatus.ACTIVE, event.is_active)
+
+        self.assertEqual(statuses["starts_next_tick"], EventStatus.UPCOMING)
+        self.assertEqual(statuses["ended_last_tick"], EventStatus.ENDED)
+
+    def test_list_filters(self):
+        now = timezone.now()
+        running = Event.objects.create(organizer=self.organizer, title="running", starts_at=now - timedelta(hours=1))
+        upcoming = Event.objects.create(
+            organizer=self.organizer, organizer_team=self.team, title="upcoming", starts_at=now + timedelta(days=1)
+        )
+        Event.objects.create(organizer=self.organizer, title="hidden", is_published=False)
+
+        def titles(**params):
+            response = self.client.get(reverse("event_list"), params)
+            return [e.title for e in response.context["events"]]
+
+        self.assertEqual(titles(), [upcoming.title, running.title])
+        self.assertEqual(titles(status="active"), [running.title])
+        self.assertEqual(titles(status="upcoming"), [upcoming.title])
+        self.assertEqual(titles(team=self.team.id), [upcoming.title])
+        # 知らない値は絞り込まない
+        self.assertEqual(titles(status="bogus", team="x"), [upcoming.title, running.title])
+
+
+class EventPageCacheTests(TestCase):
+    """
+    未ログイン向けのキャッシュは、投票の受付が開く / 閉じる時刻を越えて残らない
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user("organizer", password="pw")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_next_status_change(self):
+        now = timezone.now()
+        upcoming = Event(starts_at=now + timedelta(hours=1), ends_at=now + timedelta(hours=2))
+        running = Event(starts_at=now - timedelta(hours=1), ends_at=now + timedelta(hours=2))
+        ended = Event(starts_at=now - timedelta(hours=2), ends_at=now - timedelta(hours=1))
+        open_ended = Event(starts_at=now - timedelta(hours=1))
+
+        self.assertEqual(upcoming.next_status_change(now), upcoming.starts_at)
+        self.assertEqual(running.next_status_change(now), running.ends_at)
+        self.assertIsNone(ended.next_status_change(now))
+        self.assertIsNone(open_ended.next_status_change(now))
+        self.assertIsNone(Event(is_published=False, starts_at=upcoming.starts_at).next_status_change(now))
+
+    def test_cached_page_expires_when_voting_opens(self):
+        start = timezone.now() + timedelta(seconds=30)
+        event = Event.objects.create(organizer=self.organizer, title="e", starts_at=start)
+        url = reverse("event_detail", kwargs={"event_id": event.id})
+
+        response = self.client.get(url)
+        self.assertContains(response, "CLOSED")
+        self.assertLessEqual(get_max_age(response), 30)
+        self.assertContains(self.client.get(url), "CLOSED")
+
+        later = start + timedelta(seconds=1)
+        with mock.patch("django.utils.timezone.now", return_value=later), \
+                mock.patch("time.time", return_value=later.timestamp()):
+            self.assertContains(self.client.get(url), "OPEN")
+
+    def test_last_modified_follows_voting_open(self):
+        # If-Modified-Since だけの再検証でも、受付が開いたら 200
+        start = timezone.now() + timedelta(seconds=30)
+        event = Event.objects.create(organizer=self.organizer, title="e", starts_at=start)
+        url = reverse("event_detail", kwargs={"event_id": event.id})
+
+        response = self.client.get(url)
+        last_modified = response["Last-Modified"]
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        later = start + timedelta(seconds=1)
+        with mock.patch("django.utils.timezone.now", return_value=later), \
+                mock.patch("time.time", return_value=later.timestamp()):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "OPEN")
+
+    def test_event_edit_advances_last_modified(self):
+        event = Event.objects.create(organizer=self.organizer, title="e")
+        Event.objects.filter(pk=event.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        url = reverse("event_detail", kwargs={"event_id": event.id})
+        cache.clear()
+        last_modified = self.client.get(url)["Last-Modified"]
+
+        event.title = "e2"
+        with mock.patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(seconds=5)):
+            event.save()
+        # 世代は作り直さず（purge は commit 後）、updated_at だけで進むこと
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_last_status_change(self):
+        now = timezone.now()
+        upcoming = Event(starts_at=now + timedelta(hours=1), ends_at=now + timedelta(hours=2))
+        running = Event(starts_at=now - timedelta(hours=1), ends_at=now + timedelta(hours=2))
+        ended = Event(starts_at=now - timedelta(hours=2), ends_at=now - timedelta(hours=1))
 
-# Create your tests here.
+        self.assertIsNone(upcoming.last_status_change(now))
+        self.assertEqual(running.last_status_change(now), running.starts_at)
+        self.assertEqual(ended.last_status_change(now), ended.ends_at)
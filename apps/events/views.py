@@ -1,19 +1,28 @@
 # apps/events/views.py
 
+import math
+
 from django.contrib import messages
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.db import IntegrityError
 from django.db.models import Count
 from django.http import HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
 from django.views.decorators.http import require_POST
 
 from apps.vehicles.models import UserVehicle
 
 from .forms import EventForm, AwardForm
 from .models import Event, EventEntry, EventVote, Award
-from apps.teams.models import TeamMembership, MembershipStatus, MembershipRole
+from apps.teams.models import Team, MembershipRole
+from apps.teams.permissions import memberships_for
 
+from apps.common.page_cache import anonymous_page_cache, conditional_page
+from apps.common.ratelimit import rate_limit
+from apps.common.versions import get_versions
 from apps.common.utils import (
     save_temp_upload,
     get_temp_upload_for_user,
@@ -22,12 +31,61 @@ from apps.common.utils import (
 )
 
 from .forms import EventForm
-from .models import Event
+from .models import Event, EventStatus
+
+
+EVENTS_PER_PAGE = 24
 
 
 def event_list(request):
-    events = Event.objects.filter(is_published=True).order_by("-created_at")
-    return render(request, "events/event_list.html", {"events": events})
+    """
+    イベント一覧（公開のみ・ページング）
+    - ?status=upcoming|active|ended（開催状態は SQL で判定）
+    - ?team=<id>（主催チーム）
+    """
+    status = request.GET.get("status", "")
+    team_id = request.GET.get("team", "")
+
+    qs = (
+        Event.objects
+        .filter(is_published=True)
+        .select_related("organizer", "organizer_team")
+        .annotate_status()
+    )
+    if status in EventStatus.values:
+        qs = qs.with_status(status)
+    else:
+        status = ""
+    if team_id.isdigit():
+        qs = qs.filter(organizer_team_id=int(team_id))
+    else:
+        team_id = ""
+
+    # 開催前は近い順、それ以外は新しい開催日順
+    if status == EventStatus.UPCOMING:
+        qs = qs.order_by("starts_at", "id")
+    else:
+        qs = qs.order_by("-starts_at", "-id")
+
+    page_obj = Paginator(qs, EVENTS_PER_PAGE).get_page(request.GET.get("page"))
+
+    # 主催チームの選択肢（イベントを公開しているチームだけ）
+    organizer_teams = (
+        Team.objects
+        .filter(is_active=True, events__is_published=True)
+        .distinct()
+        .order_by("name")
+        .only("id", "name")
+    )
+
+    return render(request, "events/event_list.html", {
+        "page_obj": page_obj,
+        "events": page_obj.object_list,
+        "status": status,
+        "status_choices": EventStatus.choices,
+        "team_id": team_id,
+        "organizer_teams": organizer_teams,
+    })
 
 
 
@@ -107,6 +165,44 @@ def _voted_entry_ids(event: Event, user):
     )
 
 
+def _event_validators(request, event_id: int):
+    """
+    event_detail の ETag / Last-Modified
+    開催中かどうかは時刻で変わるので ETag に混ぜ、Last-Modified も最後に切り替わった時刻まで進める
+    主催者 / 主催チームの名前は世代番号で追う
+    """
+    row = (
+        Event.objects.filter(pk=event_id)
+        .values("is_published", "starts_at", "ends_at", "organizer_id", "organizer_team_id", "updated_at")
+        .first()
+    )
+    if row is None:
+        return None, ()
+    updated_at = row.pop("updated_at")
+    event = Event(**row)
+    modified = max(t for t in (updated_at, event.last_status_change()) if t is not None)
+
+    targets = [(get_user_model(), row["organizer_id"])]
+    if row["organizer_team_id"]:
+        targets.append((Team, row["organizer_team_id"]))
+    versions = get_versions(targets)
+    return modified, (event.is_active, *sorted(versions.items()))
+
+
+def _event_cache_timeout(request, event_id: int):
+    """
+    未ログイン向けのキャッシュは、投票の受付が開く / 閉じる時刻までにする（世代は時刻では変わらないので）
+    """
+    row = Event.objects.filter(pk=event_id).values("is_published", "starts_at", "ends_at").first()
+    if row is None:
+        return None
+    now = timezone.now()
+    change = Event(**row).next_status_change(now)
+    return math.ceil((change - now).total_seconds()) if change else None
+
+
+@conditional_page(_event_validators)
+@anonymous_page_cache(timeout=_event_cache_timeout)
 def event_detail(request, event_id: int):
     event = get_object_or_404(Event.objects.select_related("organizer"), id=event_id)
 
@@ -128,15 +224,9 @@ def _can_manage_event(user, event) -> bool:
     if event.organizer_id == user.id:
         return True
 
-    # チーム主催なら、そのチームのadminならOK
+    # チーム主催なら、そのチームのadminならOK（membership は request で1回だけ読む）
     if event.organizer_team_id:
-        return TeamMembership.objects.filter(
-            team_id=event.organizer_team_id,
-            user=user,
-            is_active=True,
-            status=MembershipStatus.APPROVED,
-            role=MembershipRole.ADMIN,
-        ).exists()
+        return memberships_for(user).has_role(event.organizer_team_id, MembershipRole.ADMIN)
 
     return False
 
@@ -267,6 +357,7 @@ def event_entry_create(request, event_id: int):
 
 
 
+@rate_limit("event_vote", user_rate="20/m", ip_rate="60/m")
 @require_POST
 @login_required
 def vote_toggle(request, event_id: int, entry_id: int):
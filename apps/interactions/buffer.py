@@ -0,0 +1,224 @@
+# apps/interactions/buffer.py
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Max, Q, Sum, Value, When
+from django.utils import timezone
+
+from .counters import adjust_count
+from .models import PendingReaction, Reaction
+
+
+def write_behind_enabled() -> bool:
+    """
+    settings.REACTION_WRITE_BEHIND（既定 False）
+    無効に戻すときは、先に flush_reaction_buffer でバッファを空にしておくこと
+    """
+    return bool(getattr(settings, "REACTION_WRITE_BEHIND", False))
+
+
+# 自分のバッファ行を「この状態にする」UPSERT。既にその状態なら何も書かず、行も返らない
+# （同じ初回トグルが同時に来ても、後から来た方は変更なしになる。ON CONFLICT が行をロックして順に処理する）
+# delta は文の中で反映済み Reaction を見て決める（読んだ後に flush が走っていてもずれない）
+_UPSERT_SQL = """
+INSERT INTO {pending} (user_id, reaction_type, content_type_id, object_id, active, delta, updated_at)
+VALUES (
+    %(user_id)s, %(reaction_type)s, %(ct_id)s, %(object_id)s, %(active)s,
+    %(target)s - (
+        SELECT count(*) FROM {reaction}
+        WHERE user_id = %(user_id)s AND reaction_type = %(reaction_type)s
+          AND content_type_id = %(ct_id)s AND object_id = %(object_id)s
+    ),
+    %(now)s
+)
+ON CONFLICT (user_id, reaction_type, content_type_id, object_id)
+DO UPDATE SET active = excluded.active, delta = excluded.delta, updated_at = excluded.updated_at
+WHERE {pending}.active <> excluded.active
+RETURNING delta
+"""
+
+
+def _upsert_returning(lookup, active: bool, delta: int, now) -> Tuple[int, bool]:
+    names = {
+        "pending": connection.ops.quote_name(PendingReaction._meta.db_table),
+        "reaction": connection.ops.quote_name(Reaction._meta.db_table),
+    }
+    params = {
+        "user_id": lookup["user_id"],
+        "reaction_type": lookup["reaction_type"],
+        "ct_id": lookup["content_type"].id,
+        "object_id": lookup["object_id"],
+        "active": active,
+        "target": int(active),
+        "now": connection.ops.adapt_datetimefield_value(now),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(_UPSERT_SQL.format(**names), params)
+        row = cursor.fetchone()
+    return (row[0], True) if row else (delta, False)
+
+
+def _upsert_orm(lookup, active: bool, delta: int, now) -> Tuple[int, bool]:
+    """
+    RETURNING が使えない DB 用（自分の行をロックして比べる。初回の同時トグルは両方 True になりうる）
+    """
+    pending = PendingReaction.objects.select_for_update().filter(**lookup).first()
+    if pending and pending.active == active:
+        return delta, False
+    PendingReaction.objects.bulk_create(
+        [PendingReaction(active=active, delta=delta, updated_at=now, **lookup)],
+        update_conflicts=True,
+        unique_fields=["user", "reaction_type", "content_type", "object_id"],
+        update_fields=["active", "delta", "updated_at"],
+    )
+    return delta, True
+
+
+def buffer_toggle(user, ct, object_id: int, reaction_type: str) -> Tuple[bool, int, bool, Optional[datetime]]:
+    """
+    トグルをバッファに記録する（人気ターゲットの共有行には書かない）
+    - 現在の状態 = バッファ行があればそれ、無ければ反映済み Reaction
+    - 自分の行だけに書くので、同じターゲットへの同時トグル同士は競合しない
+    - 書き込みは「見えた状態の逆にする」条件付き UPSERT ... RETURNING。同じユーザーの同時トグルで
+      先に同じ状態にされていたら変更なし（直接書き込みの INSERT ... ON CONFLICT DO NOTHING と同じ扱い）
+
+    戻り値: (active, delta, 状態が変わったか, 付けた / 外したリアクションの created_at)
+    外すときの created_at は、反映前のバッファ行ならその updated_at（flush で created_at になる値）
+    """
+    lookup = {
+        "user_id": user.id,
+        "reaction_type": reaction_type,
+        "content_type": ct,
+        "object_id": object_id,
+    }
+    now = timezone.now()
+
+    with transaction.atomic():
+        pending = PendingReaction.objects.filter(**lookup).values_list("active", "updated_at").first()
+        persisted_at = Reaction.objects.filter(**lookup).values_list("created_at", flat=True).first()
+        persisted = persisted_at is not None
+
+        current = pending[0] if pending else persisted
+        active = not current
+        delta = int(active) - int(persisted)
+
+        if connection.vendor == "postgresql" or (
+            connection.vendor == "sqlite" and connection.features.can_return_rows_from_bulk_insert
+        ):
+            delta, changed = _upsert_returning(lookup, active, delta, now)
+        else:
+            delta, changed = _upsert_orm(lookup, active, delta, now)
+
+    if active:
+        at = now
+    elif pending and pending[0]:
+        at = pending[1]
+    else:
+        at = persisted_at
+    return active, delta, changed, at
+
+
+def pending_delta(ct, object_id: int, reaction_type: str) -> int:
+    total = PendingReaction.objects.filter(
+        content_type=ct,
+        object_id=object_id,
+        reaction_type=reaction_type,
+    ).aggregate(n=Sum("delta"))["n"]
+    return total or 0
+
+
+# バッファ上の自分の状態: 0 = 行なし / 1 = 外した / 2 = 付けた
+_MINE_NONE, _MINE_OFF, _MINE_ON = 0, 1, 2
+
+
+def pending_states(ct, object_ids: Iterable[int], user=None) -> Dict[tuple, tuple]:
+    """
+    バッファ分の増減と、user のバッファ上の状態を 1クエリで返す
+    {(object_id, reaction_type): (delta, mine)}  mine は None（バッファなし）/ True / False
+    """
+    ids = list(object_ids)
+    if not ids:
+        return {}
+
+    if user is not None and user.is_authenticated:
+        mine = Max(
+            Case(
+                When(Q(user_id=user.id, active=True), then=Value(_MINE_ON)),
+                When(Q(user_id=user.id, active=False), then=Value(_MINE_OFF)),
+                default=Value(_MINE_NONE),
+                output_field=IntegerField(),
+            )
+        )
+    else:
+        mine = Max(Value(_MINE_NONE, output_field=IntegerField()))
+
+    rows = (
+        PendingReaction.objects
+        .filter(content_type=ct, object_id__in=ids)
+        .values("object_id", "reaction_type")
+        .annotate(d=Sum("delta"), mine=mine)
+        .values_list("object_id", "reaction_type", "d", "mine")
+    )
+
+    out = {}
+    for object_id, reaction_type, d, m in rows:
+        out[(object_id, reaction_type)] = (d or 0, None if m == _MINE_NONE else m == _MINE_ON)
+    return out
+
+
+def flush_buffer(batch_size: int = 500) -> int:
+    """
+    バッファを古い順に batch_size 件だけ Reaction / ReactionCounter に反映して消す
+    - 対象行は select_for_update でロック（その間の同じユーザーのトグルは待つ）
+    - カウンタはターゲットごとに delta を合算して 1回だけ更新
+
+    戻り値: 反映した行数（0 ならバッファは空）
+    """
+    with transaction.atomic():
+        rows = list(
+            PendingReaction.objects
+            .select_for_update()
+            .order_by("updated_at", "id")[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        Reaction.objects.bulk_create(
+            [
+                Reaction(
+                    user_id=r.user_id,
+                    reaction_type=r.reaction_type,
+                    content_type_id=r.content_type_id,
+                    object_id=r.object_id,
+                    created_at=r.updated_at,
+                )
+                for r in rows if r.active
+            ],
+            ignore_conflicts=True,
+        )
+
+        removed = Q(pk__in=[])
+        for r in rows:
+            if not r.active:
+                removed |= Q(
+                    user_id=r.user_id,
+                    reaction_type=r.reaction_type,
+                    content_type_id=r.content_type_id,
+                    object_id=r.object_id,
+                )
+        Reaction.objects.filter(removed).delete()
+
+        deltas = defaultdict(int)
+        for r in rows:
+            deltas[(r.content_type_id, r.object_id, r.reaction_type)] += r.delta
+
+        for (ct_id, object_id, reaction_type), delta in deltas.items():
+            adjust_count(ct_id, object_id, reaction_type, delta)
+
+        PendingReaction.objects.filter(pk__in=[r.pk for r in rows]).delete()
+
+    return len(rows)
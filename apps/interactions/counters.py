@@ -0,0 +1,130 @@
+# apps/interactions/counters.py
+
+import random
+from typing import Dict, Iterable
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Reaction, ReactionCounter
+
+
+def counter_shards() -> int:
+    """
+    書き込み時に使う shard 数（settings.REACTION_COUNTER_SHARDS、既定 1）
+    人気ターゲットへの同時書き込みが多い環境では 4〜16 程度に上げる
+    """
+    return max(1, int(getattr(settings, "REACTION_COUNTER_SHARDS", 1)))
+
+
+def adjust_count(ct, object_id: int, reaction_type: str, delta: int) -> None:
+    """
+    カウンタを delta だけ増減する（呼び出し側の transaction 内で使う想定）
+    - shard はランダムに選ぶ（1 shard なら常に 0）
+    - 行が無ければ作る。作成競合（IntegrityError）は UPDATE をやり直す
+    - ct は ContentType でも id でもよい
+    """
+    if not delta:
+        return
+
+    shard = random.randrange(counter_shards())
+    lookup = {
+        "content_type_id": getattr(ct, "pk", ct),
+        "object_id": object_id,
+        "reaction_type": reaction_type,
+        "shard": shard,
+    }
+
+    if ReactionCounter.objects.filter(**lookup).update(count=F("count") + delta):
+        return
+
+    try:
+        with transaction.atomic():
+            ReactionCounter.objects.create(count=delta, **lookup)
+    except IntegrityError:
+        ReactionCounter.objects.filter(**lookup).update(count=F("count") + delta)
+
+
+def get_count(ct, object_id: int, reaction_type: str) -> int:
+    """
+    1ターゲット・1種類の数（unique index の先頭一致で引くだけ）
+    """
+    total = ReactionCounter.objects.filter(
+        content_type=ct,
+        object_id=object_id,
+        reaction_type=reaction_type,
+    ).aggregate(n=Sum("count"))["n"]
+    return total or 0
+
+
+def get_counts(ct, object_ids: Iterable[int], reaction_type: str) -> Dict[int, int]:
+    """
+    複数ターゲットの数をまとめて返す {object_id: count}（無いものは含まない）
+    """
+    ids = list(object_ids)
+    if not ids:
+        return {}
+
+    return dict(
+        ReactionCounter.objects.filter(
+            content_type=ct,
+            object_id__in=ids,
+            reaction_type=reaction_type,
+        )
+        .values("object_id")
+        .annotate(n=Sum("count"))
+        .values_list("object_id", "n")
+    )
+
+
+def reconcile_counters(*, dry_run: bool = False) -> int:
+    """
+    Reaction の実数とカウンタを突き合わせて、ずれているキーを作り直す
+    （ユーザー削除の CASCADE などトグル以外で Reaction が消えた分の補正）
+
+    戻り値: 修正した（dry_run なら修正が必要な）キー数
+    """
+    actual = {
+        (r["content_type_id"], r["object_id"], r["reaction_type"]): r["c"]
+        for r in (
+            Reaction.objects
+            .values("content_type_id", "object_id", "reaction_type")
+            .annotate(c=Count("id"))
+        )
+    }
+    stored = {
+        (r["content_type_id"], r["object_id"], r["reaction_type"]): r["n"]
+        for r in (
+            ReactionCounter.objects
+            .values("content_type_id", "object_id", "reaction_type")
+            .annotate(n=Sum("count"))
+        )
+    }
+
+    broken = [
+        key for key in actual.keys() | stored.keys()
+        if actual.get(key, 0) != (stored.get(key) or 0)
+    ]
+    if dry_run or not broken:
+        return len(broken)
+
+    with transaction.atomic():
+        for ct_id, object_id, reaction_type in broken:
+            ReactionCounter.objects.filter(
+                content_type_id=ct_id,
+                object_id=object_id,
+                reaction_type=reaction_type,
+            ).delete()
+
+            c = actual.get((ct_id, object_id, reaction_type), 0)
+            if c:
+                ReactionCounter.objects.create(
+                    content_type_id=ct_id,
+                    object_id=object_id,
+                    reaction_type=reaction_type,
+                    shard=0,
+                    count=c,
+                )
+
+    return len(broken)
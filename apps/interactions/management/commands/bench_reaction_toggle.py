@@ -0,0 +1,128 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.interactions.counters import adjust_count
+from apps.interactions.models import Reaction, ReactionCounter, ReactionType
+from apps.interactions.services import toggle_reaction
+
+
+User = get_user_model()
+
+BENCH_PREFIX = "bench_toggle_"
+
+
+def _legacy_toggle(user, app_label, model, object_id, reaction_type):
+    """
+    以前の views.toggle_reaction と同じ流れ（比較用）
+    ContentType.get → get_or_create → delete → COUNT
+    """
+    ct = ContentType.objects.get(app_label=app_label, model=model)
+    with transaction.atomic():
+        obj, created = Reaction.objects.get_or_create(
+            user=user,
+            reaction_type=reaction_type,
+            content_type=ct,
+            object_id=object_id,
+        )
+        if not created:
+            obj.delete()
+        adjust_count(ct, object_id, reaction_type, 1 if created else -1)
+
+    Reaction.objects.filter(
+        reaction_type=reaction_type,
+        content_type=ct,
+        object_id=object_id,
+    ).count()
+
+
+def _new_toggle(user, app_label, model, object_id, reaction_type):
+    ct = ContentType.objects.get_by_natural_key(app_label, model)
+    toggle_reaction(user, ct, object_id, reaction_type)
+
+
+class Command(BaseCommand):
+    help = (
+        "リアクションのトグルを複数クライアント（スレッド）で同時に叩き、"
+        "従来方式と新方式の toggles/sec を比較する。"
+        f"ユーザーは {BENCH_PREFIX}* で作成し、終了時に削除する。"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=8)
+        parser.add_argument("--toggles", type=int, default=200, help="クライアントごとのトグル回数")
+        parser.add_argument(
+            "--object-id",
+            type=int,
+            default=0,
+            help="トグル先の object_id（既定 0 = 実データと衝突しないダミー）",
+        )
+
+    def handle(self, *args, **options):
+        clients = options["clients"]
+        toggles = options["toggles"]
+        object_id = options["object_id"]
+
+        users = [
+            User.objects.get_or_create(username=f"{BENCH_PREFIX}{i}")[0]
+            for i in range(clients)
+        ]
+        ct = ContentType.objects.get_for_model(User)
+        target = (ct.app_label, ct.model, object_id)
+
+        try:
+            for label, fn in (("legacy", _legacy_toggle), ("single-trip", _new_toggle)):
+                self._reset(ct, object_id)
+                queries = self._queries_per_toggle(fn, users[0], target)
+                self._reset(ct, object_id)
+                rate, errors = self._run(fn, users, target, toggles)
+                self.stdout.write(
+                    f"{label:12s} {rate:10.1f} toggles/sec  "
+                    f"{queries} queries/toggle  errors={errors}"
+                )
+        finally:
+            self._reset(ct, object_id)
+            User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+
+    def _reset(self, ct, object_id):
+        Reaction.objects.filter(content_type=ct, object_id=object_id).delete()
+        ReactionCounter.objects.filter(content_type=ct, object_id=object_id).delete()
+
+    def _queries_per_toggle(self, fn, user, target):
+        # ContentType キャッシュを温めたうえで1回分を数える
+        fn(user, *target, ReactionType.LIKE)
+        with CaptureQueriesContext(connection) as ctx:
+            fn(user, *target, ReactionType.LIKE)
+        return len(ctx.captured_queries)
+
+    def _run(self, fn, users, target, toggles):
+        errors = []
+        barrier = threading.Barrier(len(users) + 1)
+
+        def worker(user):
+            close_old_connections()
+            barrier.wait()
+            for _ in range(toggles):
+                try:
+                    fn(user, *target, ReactionType.LIKE)
+                except Exception as e:  # SQLite の database is locked など
+                    errors.append(e)
+            connection.close()
+
+        threads = [threading.Thread(target=worker, args=(u,)) for u in users]
+        for t in threads:
+            t.start()
+
+        barrier.wait()
+        started = time.perf_counter()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        done = len(users) * toggles - len(errors)
+        return done / elapsed if elapsed else 0.0, len(errors)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from apps.interactions.buffer import flush_buffer
+
+
+class Command(BaseCommand):
+    help = "write-behind バッファ（PendingReaction）を Reaction / ReactionCounter に反映する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=0,
+            help="1回の実行で処理する最大バッチ数（0 = バッファが空になるまで）",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        max_batches = options["max_batches"]
+
+        total = 0
+        batches = 0
+        while True:
+            n = flush_buffer(batch_size=batch_size)
+            total += n
+            batches += 1
+            if n < batch_size or (max_batches and batches >= max_batches):
+                break
+
+        self.stdout.write(self.style.SUCCESS(f"Flushed {total} pending reaction(s)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.interactions.trending import recompute
+
+
+class Command(BaseCommand):
+    help = "Reaction から TrendingScore（時間減衰つきトレンドスコア）を作り直す"
+
+    def handle(self, *args, **options):
+        n = recompute()
+        self.stdout.write(self.style.SUCCESS(f"Recomputed trending scores for {n} target(s)."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.interactions.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Reaction の実数から ReactionCounter を再計算して、ずれを修正する"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="修正せず、ずれているキー数だけ表示する",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        n = reconcile_counters(dry_run=dry_run)
+
+        if dry_run:
+            self.stdout.write(f"{n} counter(s) out of sync.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Reconciled {n} counter(s)."))
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Reaction = apps.get_model("interactions", "Reaction")
+    ReactionCounter = apps.get_model("interactions", "ReactionCounter")
+
+    rows = (
+        Reaction.objects
+        .values("content_type_id", "object_id", "reaction_type")
+        .annotate(c=Count("id"))
+    )
+    ReactionCounter.objects.bulk_create(
+        [
+            ReactionCounter(
+                content_type_id=r["content_type_id"],
+                object_id=r["object_id"],
+                reaction_type=r["reaction_type"],
+                shard=0,
+                count=r["c"],
+            )
+            for r in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('interactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactionCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('reaction_type', models.CharField(choices=[('like', 'Like'), ('favorite', 'Favorite')], max_length=20)),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('count', models.IntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id', 'reaction_type', 'shard'), name='unique_reaction_counter_shard')],
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('interactions', '0002_reactioncounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingReaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reaction_type', models.CharField(choices=[('like', 'Like'), ('favorite', 'Favorite')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('active', models.BooleanField()),
+                ('delta', models.SmallIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['content_type', 'object_id', 'reaction_type'], name='pending_reaction_target_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'reaction_type', 'content_type', 'object_id'), name='unique_pending_reaction_per_target')],
+            },
+        ),
+    ]
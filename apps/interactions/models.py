@@ -9,10 +9,13 @@ class ReactionType(models.TextChoices):
     FAVORITE = "favorite", "Favorite"
 
 class Reaction(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="reactions")
+    # 単体の FK index は下の複合 index の先頭でまかなえるので作らない
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="reactions", db_index=False
+    )
     reaction_type = models.CharField(max_length=20, choices=ReactionType.choices)
 
-    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, db_index=False)
     object_id = models.PositiveIntegerField()
     target = GenericForeignKey("content_type", "object_id")
 
@@ -20,8 +23,100 @@ class Reaction(models.Model):
 
     class Meta:
         constraints = [
+            # 「自分が付けているか」/ トグルの DELETE 用（user 先頭）
             models.UniqueConstraint(
                 fields=["user", "reaction_type", "content_type", "object_id"],
                 name="unique_user_reaction_per_target",
             )
         ]
+        indexes = [
+            # ターゲット単位の集計・一覧用（user まで含めて covering にする）
+            models.Index(
+                fields=["content_type", "object_id", "reaction_type", "user"],
+                name="reaction_target_idx",
+            ),
+        ]
+
+
+class ReactionCounter(models.Model):
+    """
+    リアクション数の非正規化カウンタ（COUNT(*) の代わりにここを読む）
+    - (content_type, object_id, reaction_type, shard) で一意
+    - 人気のターゲットは shard を複数に分けて、同じ行への書き込み競合を減らす
+      （合計は shard の SUM。shard=1 なら1行を読むだけ）
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    reaction_type = models.CharField(max_length=20, choices=ReactionType.choices)
+    shard = models.PositiveSmallIntegerField(default=0)
+
+    # shard 単位では負になることもある（合計は必ず 0 以上）
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id", "reaction_type", "shard"],
+                name="unique_reaction_counter_shard",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.content_type_id}:{self.object_id}:{self.reaction_type}#{self.shard}={self.count}"
+
+
+class PendingReaction(models.Model):
+    """
+    write-behind 用のバッファ（settings.REACTION_WRITE_BEHIND=True のとき使う）
+    - ユーザー×種類×ターゲットで1行。トグルのたびに上書き（最後の書き込みが勝つ）
+    - delta は「反映済みの Reaction」に対する増減（-1 / 0 / +1）
+    - flush_reaction_buffer でまとめて Reaction / ReactionCounter に反映して消す
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    reaction_type = models.CharField(max_length=20, choices=ReactionType.choices)
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+
+    active = models.BooleanField()
+    delta = models.SmallIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "reaction_type", "content_type", "object_id"],
+                name="unique_pending_reaction_per_target",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["content_type", "object_id", "reaction_type"], name="pending_reaction_target_idx"),
+        ]
+
+    def __str__(self):
+        return f"pending:{self.user_id}:{self.reaction_type}:{self.content_type_id}:{self.object_id}={self.active}"
+
+
+class TrendingScore(models.Model):
+    """
+    トレンド（時間減衰つきエンゲージメント）スコア
+    - score は「基準時刻 TRENDING_EPOCH 換算」の値の log2 で持つ
+      （新しいイベントほど大きい重みで足し込むので、読むときに減衰計算が要らない。
+        log2 なので重みが何年経っても溢れない。大小の順は元の値と同じ）
+    - (content_type, -score) の index で上位 N 件を1クエリで引く
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    score = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["content_type", "object_id"], name="unique_trending_target")
+        ]
+        indexes = [
+            models.Index(fields=["content_type", "-score"], name="trending_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"trending:{self.content_type_id}:{self.object_id}={self.score:.3f}"
@@ -0,0 +1,206 @@
+# apps/interactions/services.py
+
+import random
+from datetime import datetime, timezone as dt_timezone
+from typing import NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import trending
+from .buffer import buffer_toggle, pending_delta, write_behind_enabled
+from .counters import adjust_count, counter_shards, get_count
+from .models import Reaction, ReactionCounter
+from .signals import reaction_toggled
+
+
+class ToggleResult(NamedTuple):
+    active: bool
+    count: int
+
+
+def _sql_names():
+    r = Reaction._meta
+    c = ReactionCounter._meta
+    return {
+        "reaction": connection.ops.quote_name(r.db_table),
+        "counter": connection.ops.quote_name(c.db_table),
+    }
+
+
+# PostgreSQL: DELETE / INSERT / カウンタ UPSERT を1文（data-modifying CTE）で
+_PG_TOGGLE_SQL = """
+WITH del AS (
+    DELETE FROM {reaction}
+    WHERE user_id = %(user_id)s
+      AND reaction_type = %(reaction_type)s
+      AND content_type_id = %(ct_id)s
+      AND object_id = %(object_id)s
+    RETURNING created_at
+), ins AS (
+    INSERT INTO {reaction} (user_id, reaction_type, content_type_id, object_id, created_at)
+    SELECT %(user_id)s, %(reaction_type)s, %(ct_id)s, %(object_id)s, %(now)s
+    WHERE NOT EXISTS (SELECT 1 FROM del)
+    ON CONFLICT DO NOTHING
+    RETURNING 1
+), cnt AS (
+    INSERT INTO {counter} (content_type_id, object_id, reaction_type, shard, count)
+    VALUES (
+        %(ct_id)s, %(object_id)s, %(reaction_type)s, %(shard)s,
+        (SELECT count(*) FROM ins) - (SELECT count(*) FROM del)
+    )
+    ON CONFLICT (content_type_id, object_id, reaction_type, shard)
+    DO UPDATE SET count = {counter}.count + EXCLUDED.count
+    RETURNING count
+)
+SELECT
+    (SELECT count(*) FROM del) = 0,
+    (SELECT count FROM cnt),
+    (SELECT count(*) FROM ins) + (SELECT count(*) FROM del),
+    (SELECT created_at FROM del)
+"""
+
+# SQLite: data-modifying CTE が無いので、同じ transaction 内で
+# DELETE → (0件なら) INSERT ... ON CONFLICT DO NOTHING → カウンタ UPSERT ... RETURNING
+_SQLITE_DELETE_SQL = """
+DELETE FROM {reaction}
+WHERE user_id = %s AND reaction_type = %s AND content_type_id = %s AND object_id = %s
+RETURNING created_at
+"""
+
+_SQLITE_INSERT_SQL = """
+INSERT INTO {reaction} (user_id, reaction_type, content_type_id, object_id, created_at)
+VALUES (%s, %s, %s, %s, %s)
+ON CONFLICT DO NOTHING
+"""
+
+_SQLITE_COUNTER_SQL = """
+INSERT INTO {counter} (content_type_id, object_id, reaction_type, shard, count)
+VALUES (%s, %s, %s, %s, %s)
+ON CONFLICT (content_type_id, object_id, reaction_type, shard)
+DO UPDATE SET count = {counter}.count + excluded.count
+RETURNING count
+"""
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    # SQLite の生 SQL は created_at を文字列（USE_TZ なら UTC の naive）で返す
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value is not None and settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def _toggle_postgresql(user_id, ct_id, object_id, reaction_type, shard):
+    now = timezone.now()
+    params = {
+        "user_id": user_id,
+        "reaction_type": reaction_type,
+        "ct_id": ct_id,
+        "object_id": object_id,
+        "shard": shard,
+        "now": now,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(_PG_TOGGLE_SQL.format(**_sql_names()), params)
+        active, shard_count, changed, removed_at = cursor.fetchone()
+    return bool(active), shard_count, bool(changed), (now if active else removed_at)
+
+
+def _toggle_sqlite(user_id, ct_id, object_id, reaction_type, shard):
+    names = _sql_names()
+    now = timezone.now()
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            _SQLITE_DELETE_SQL.format(**names),
+            [user_id, reaction_type, ct_id, object_id],
+        )
+        removed = cursor.fetchone()
+        if removed:
+            active, delta, at = False, -1, _as_datetime(removed[0])
+        else:
+            cursor.execute(
+                _SQLITE_INSERT_SQL.format(**names),
+                [user_id, reaction_type, ct_id, object_id, connection.ops.adapt_datetimefield_value(now)],
+            )
+            # 競合で他リクエストが先に作っていた場合は増やさない
+            active, delta, at = True, (1 if cursor.rowcount else 0), now
+
+        cursor.execute(
+            _SQLITE_COUNTER_SQL.format(**names),
+            [ct_id, object_id, reaction_type, shard, delta],
+        )
+        shard_count = cursor.fetchone()[0]
+
+    return active, shard_count, bool(delta), at
+
+
+def _toggle_orm(user_id, ct, object_id, reaction_type):
+    """
+    RETURNING が使えない DB 用（従来の get_or_create + カウンタ更新）
+    """
+    with transaction.atomic():
+        obj, created = Reaction.objects.get_or_create(
+            user_id=user_id,
+            reaction_type=reaction_type,
+            content_type=ct,
+            object_id=object_id,
+        )
+        if not created:
+            obj.delete()
+        adjust_count(ct, object_id, reaction_type, 1 if created else -1)
+
+    return ToggleResult(active=created, count=get_count(ct, object_id, reaction_type)), True, obj.created_at
+
+
+def _toggle(user, ct, object_id: int, reaction_type: str) -> Tuple[ToggleResult, bool, Optional[datetime]]:
+    """
+    戻り値: (結果, 状態が変わったか, 付けた / 外したリアクションの created_at)
+    同時に同じトグルが来て、こちらは何も変えなかった場合（INSERT の競合）は False
+    """
+    if write_behind_enabled():
+        active, _, changed, at = buffer_toggle(user, ct, object_id, reaction_type)
+        count = get_count(ct, object_id, reaction_type) + pending_delta(ct, object_id, reaction_type)
+        return ToggleResult(active=active, count=count), changed, at
+
+    shards = counter_shards()
+    shard = random.randrange(shards)
+
+    if connection.vendor == "postgresql":
+        active, shard_count, changed, at = _toggle_postgresql(user.id, ct.id, object_id, reaction_type, shard)
+    elif connection.vendor == "sqlite" and connection.features.can_return_rows_from_bulk_insert:
+        active, shard_count, changed, at = _toggle_sqlite(user.id, ct.id, object_id, reaction_type, shard)
+    else:
+        return _toggle_orm(user.id, ct, object_id, reaction_type)
+
+    count = shard_count if shards == 1 else get_count(ct, object_id, reaction_type)
+    return ToggleResult(active=active, count=count), changed, at
+
+
+def toggle_reaction(user, ct, object_id: int, reaction_type: str) -> ToggleResult:
+    """
+    リアクションを付け外しして、新しい状態と合計数を返す
+    - PostgreSQL: 1文（1往復）
+    - SQLite(3.35+): 1 transaction で 2〜3文、件数は UPSERT の RETURNING で取得
+    - shard を複数にしている場合だけ、合計を別途 SUM で読む
+    - write-behind 有効時はバッファに記録し、数はカウンタ＋バッファ分
+    - トレンドスコアにも反映する（トグルと同じ transaction で、状態が変わったときだけ）
+      外すときは元のリアクションの created_at の重みで引く（recompute_trending と同じ値になる）
+    - reaction_toggled を送る（トップのキャッシュなど）
+    """
+    with transaction.atomic():
+        result, changed, at = _toggle(user, ct, object_id, reaction_type)
+        if changed:
+            trending.record(ct, object_id, reaction_type, sign=1 if result.active else -1, at=at)
+    reaction_toggled.send(
+        sender=Reaction,
+        content_type=ct,
+        object_id=object_id,
+        reaction_type=reaction_type,
+        active=result.active,
+    )
+    return result
@@ -0,0 +1,54 @@
+# apps/interactions/signals.py
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from apps.common import versions
+from apps.common.page_cache import purge_page
+from apps.pages import home_feed
+from apps.posts.models import Post
+from apps.vehicles.models import UserVehicle
+
+from .models import Reaction
+
+
+# リアクションの付け外し（toggle_reaction から送る）
+# Reaction は生 SQL / バッファで書くので post_save は飛ばない。変化を知りたい側はこちらを受ける
+# 引数: content_type, object_id, reaction_type, active
+reaction_toggled = Signal()
+
+
+# リアクションの数は対象の詳細ページにだけ出る
+_REACTION_PAGES = {
+    UserVehicle: "vehicle_detail",
+    Post: "post_detail",
+}
+
+
+def _on_target_changed(content_type_id, object_id):
+    """
+    対象（車両 / 投稿 など）のトップのスナップショット・詳細ページ・世代番号を捨てる
+    ✅ 消えたモデルの ContentType だと model_class() が None になる（そのときはスナップショットだけ）
+    """
+    home_feed.invalidate_for_target(content_type_id, object_id)
+
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    if model is None:
+        return
+    url_name = _REACTION_PAGES.get(model)
+    if url_name:
+        purge_page(url_name, pk=object_id)
+    versions.bump(model, object_id)
+
+
+@receiver(reaction_toggled)
+def target_on_reaction(sender, content_type, object_id, **kwargs):
+    _on_target_changed(content_type.id, object_id)
+
+
+# 管理画面などで Reaction を直接いじったとき（通常のトグルは reaction_toggled）
+@receiver(post_save, sender=Reaction)
+@receiver(post_delete, sender=Reaction)
+def target_on_reaction_row(sender, instance, **kwargs):
+    _on_target_changed(instance.content_type_id, instance.object_id)
@@ -0,0 +1,120 @@
+# apps/interactions/summary.py
+
+from typing import Dict, Iterable, List
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import BooleanField, Exists, OuterRef, Sum, Value
+
+from apps.common.cards import model_of
+
+from .buffer import pending_states, write_behind_enabled
+from .models import Reaction, ReactionCounter, ReactionType
+
+
+def empty_state() -> dict:
+    return {
+        "counts": {rt: 0 for rt in ReactionType.values},
+        "active": {rt: False for rt in ReactionType.values},
+    }
+
+
+def state_rows(ct, object_ids, user=None):
+    """
+    summarize の本体クエリ（object_id, reaction_type, 合計, 自分が付けているか）
+    """
+    if user is not None and user.is_authenticated:
+        mine = Exists(
+            Reaction.objects.filter(
+                user_id=user.id,
+                content_type=OuterRef("content_type"),
+                object_id=OuterRef("object_id"),
+                reaction_type=OuterRef("reaction_type"),
+            )
+        )
+    else:
+        mine = Value(False, output_field=BooleanField())
+
+    return (
+        ReactionCounter.objects
+        .filter(content_type=ct, object_id__in=object_ids)
+        .values("object_id", "reaction_type")
+        .annotate(n=Sum("count"), mine=mine)
+        .values_list("object_id", "reaction_type", "n", "mine")
+    )
+
+
+def summarize(ct, object_ids: Iterable[int], user=None) -> Dict[int, dict]:
+    """
+    1つの ContentType について、複数ターゲットの
+    - 全リアクション種別の数（ReactionCounter の shard 合計）
+    - user が付けているかどうか
+    を 1クエリでまとめて返す {object_id: {"counts": {...}, "active": {...}}}
+    （write-behind 有効時はバッファ分の 1クエリが加わる）
+
+    user が付けているかは、ReactionCounter の行ごとに Reaction への EXISTS で判定する
+    （自分が付けていれば数は 1 以上なので、カウンタ行は必ずある）
+    """
+    ids = list(dict.fromkeys(object_ids))
+    out = {oid: empty_state() for oid in ids}
+    if not ids:
+        return out
+
+    for object_id, reaction_type, n, is_mine in state_rows(ct, ids, user):
+        state = out[object_id]
+        state["counts"][reaction_type] = n or 0
+        state["active"][reaction_type] = bool(is_mine)
+
+    # write-behind: 未反映のトグルを重ねる（自分の状態はバッファ優先）
+    if write_behind_enabled():
+        for (object_id, reaction_type), (delta, mine) in pending_states(ct, ids, user).items():
+            state = out[object_id]
+            state["counts"][reaction_type] += delta
+            if mine is not None:
+                state["active"][reaction_type] = mine
+
+    return out
+
+
+def load_reaction_summaries(objects: Iterable, user=None) -> Dict[tuple, dict]:
+    """
+    任意のモデルインスタンス（またはカード: apps.common.cards）群について summarize をまとめて実行する
+    戻り値: {(content_type_id, pk): {"counts": {...}, "active": {...}}}
+    モデル（ContentType）ごとに 1クエリ。ContentType 自体はキャッシュから引く
+    """
+    by_model = {}
+    for obj in objects:
+        by_model.setdefault(model_of(obj), []).append(obj.pk)
+
+    if not by_model:
+        return {}
+
+    cts = ContentType.objects.get_for_models(*by_model.keys())
+
+    out = {}
+    for model, pks in by_model.items():
+        ct = cts[model]
+        for pk, state in summarize(ct, pks, user).items():
+            out[(ct.id, pk)] = state
+    return out
+
+
+def attach_reaction_summaries(objects: Iterable, user=None) -> List:
+    """
+    各 obj に like_count / fav_count / user_like / user_fav を付与して list で返す
+    （テンプレは従来どおり obj.like_count などで参照できる）
+    """
+    objects = list(objects)
+    if not objects:
+        return objects
+
+    states = load_reaction_summaries(objects, user)
+    cts = ContentType.objects.get_for_models(*{model_of(o) for o in objects})
+
+    for obj in objects:
+        state = states.get((cts[model_of(obj)].id, obj.pk)) or empty_state()
+        obj.like_count = state["counts"][ReactionType.LIKE]
+        obj.fav_count = state["counts"][ReactionType.FAVORITE]
+        obj.user_like = state["active"][ReactionType.LIKE]
+        obj.user_fav = state["active"][ReactionType.FAVORITE]
+
+    return objects
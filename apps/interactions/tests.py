@@ -1,3 +1,597 @@
-from django.test import TestCase
+import io
+import json
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.common import ratelimit, versions
+from apps.common.testing import QueryPlanAssertionsMixin
+from apps.vehicles.models import UserVehicle, VehicleModel
+
+from . import buffer, services, trending
+from .buffer import flush_buffer
+from .counters import adjust_count, get_count
+from .models import PendingReaction, Reaction, ReactionCounter, ReactionType, TrendingScore
+from .signals import reaction_toggled
+from .summary import state_rows
+
+
+User = get_user_model()
+
+HOT_TABLES = {Reaction._meta.db_table, ReactionCounter._meta.db_table}
+
+
+class ReactionQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """
+    Reaction / ReactionCounter のホットクエリが index を使っているか（EXPLAIN）
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("owner", password="pw")
+        model = VehicleModel.objects.create(maker="Honda", name="Super Cub", slug="super-cub")
+        cls.vehicles = UserVehicle.objects.bulk_create(
+            [UserVehicle(owner=owner, model=model, title=f"v{i}") for i in range(20)]
+        )
+        cls.users = User.objects.bulk_create(
+            [User(username=f"u{i}") for i in range(30)]
+        )
+        cls.ct = ContentType.objects.get_for_model(UserVehicle)
+
+        reactions = []
+        for i, u in enumerate(cls.users):
+            for v in cls.vehicles[: (i % 20) + 1]:
+                reactions.append(
+                    Reaction(user=u, reaction_type=ReactionType.LIKE, content_type=cls.ct, object_id=v.id)
+                )
+        Reaction.objects.bulk_create(reactions)
+        for r in reactions:
+            adjust_count(cls.ct, r.object_id, r.reaction_type, 1)
+
+        cls.user = cls.users[0]
+        cls.target_id = cls.vehicles[0].id
+
+    def test_toggle_lookup(self):
+        qs = Reaction.objects.filter(
+            user=self.user,
+            reaction_type=ReactionType.LIKE,
+            content_type=self.ct,
+            object_id=self.target_id,
+        )
+        self.assertNoTableScan(qs, HOT_TABLES)
+
+    def test_count_by_target(self):
+        qs = Reaction.objects.filter(
+            content_type=self.ct,
+            object_id=self.target_id,
+            reaction_type=ReactionType.LIKE,
+        ).values("user_id")
+        self.assertNoTableScan(qs, HOT_TABLES)
+        self.assertUsesIndex(qs, "reaction_target_idx")
+
+    def test_grouped_counts_by_targets(self):
+        qs = (
+            Reaction.objects
+            .filter(
+                content_type=self.ct,
+                object_id__in=[v.id for v in self.vehicles],
+                reaction_type=ReactionType.LIKE,
+            )
+            .values("object_id")
+            .annotate(c=Count("user_id"))
+        )
+        self.assertNoTableScan(qs, HOT_TABLES)
+        self.assertUsesIndex(qs, "reaction_target_idx")
+
+    def test_counter_lookup(self):
+        qs = ReactionCounter.objects.filter(
+            content_type=self.ct,
+            object_id=self.target_id,
+            reaction_type=ReactionType.LIKE,
+        )
+        self.assertNoTableScan(qs, HOT_TABLES)
+
+    def test_summary_with_user_flags(self):
+        qs = state_rows(self.ct, [v.id for v in self.vehicles], self.user)
+        self.assertNoTableScan(qs, HOT_TABLES)
+
+    # ↓ toggle_reaction が本番で流している生 SQL そのもの
+    def toggle_params(self):
+        return [self.user.id, ReactionType.LIKE, self.ct.id, self.target_id]
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite の toggle")
+    def test_sqlite_toggle_statements(self):
+        names = services._sql_names()
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        statements = [
+            (services._SQLITE_DELETE_SQL, self.toggle_params()),
+            (services._SQLITE_INSERT_SQL, self.toggle_params() + [now]),
+            (services._SQLITE_COUNTER_SQL, [self.ct.id, self.target_id, ReactionType.LIKE, 0, 1]),
+        ]
+        for sql, params in statements:
+            with self.subTest(sql=sql.split()[0]):
+                self.assertNoTableScan(sql.format(**names), HOT_TABLES, params=params)
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL の toggle")
+    def test_postgresql_toggle_statement(self):
+        params = {
+            "user_id": self.user.id,
+            "reaction_type": ReactionType.LIKE,
+            "ct_id": self.ct.id,
+            "object_id": self.target_id,
+            "shard": 0,
+            "now": timezone.now(),
+        }
+        self.assertNoTableScan(services._PG_TOGGLE_SQL.format(**services._sql_names()), HOT_TABLES, params=params)
+
+    def test_write_behind_upsert(self):
+        names = {
+            "pending": connection.ops.quote_name(PendingReaction._meta.db_table),
+            "reaction": connection.ops.quote_name(Reaction._meta.db_table),
+        }
+        params = {
+            "user_id": self.user.id,
+            "reaction_type": ReactionType.LIKE,
+            "ct_id": self.ct.id,
+            "object_id": self.target_id,
+            "active": True,
+            "target": 1,
+            "now": connection.ops.adapt_datetimefield_value(timezone.now()),
+        }
+        self.assertNoTableScan(
+            buffer._UPSERT_SQL.format(**names), HOT_TABLES | {PendingReaction._meta.db_table}, params=params
+        )
+
+
+class ReactionFixtureMixin:
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("owner", password="pw")
+        model = VehicleModel.objects.create(maker="Honda", name="Super Cub", slug="super-cub")
+        cls.vehicles = UserVehicle.objects.bulk_create(
+            [UserVehicle(owner=owner, model=model, title=f"v{i}") for i in range(3)]
+        )
+        cls.users = User.objects.bulk_create([User(username=f"u{i}") for i in range(3)])
+        cls.ct = ContentType.objects.get_for_model(UserVehicle)
+
+    def toggle(self, user, vehicle, reaction_type=ReactionType.LIKE):
+        return services.toggle_reaction(user, self.ct, vehicle.id, reaction_type)
+
+    def reactions(self, vehicle, reaction_type=ReactionType.LIKE):
+        return set(
+            Reaction.objects
+            .filter(content_type=self.ct, object_id=vehicle.id, reaction_type=reaction_type)
+            .values_list("user_id", flat=True)
+        )
+
+
+class ReactionToggleTests(ReactionFixtureMixin, TestCase):
+    """
+    toggle_reaction（付け外し・カウンタ・トレンドスコア）
+    """
+
+    def test_toggle_on_and_off(self):
+        vehicle = self.vehicles[0]
+        a, b = self.users[:2]
+
+        self.assertEqual(self.toggle(a, vehicle), services.ToggleResult(active=True, count=1))
+        self.assertEqual(self.toggle(b, vehicle), services.ToggleResult(active=True, count=2))
+        self.assertEqual(self.toggle(a, vehicle), services.ToggleResult(active=False, count=1))
+
+        self.assertEqual(self.reactions(vehicle), {b.id})
+        self.assertEqual(get_count(self.ct, vehicle.id, ReactionType.LIKE), 1)
+
+    def test_types_are_independent(self):
+        vehicle, user = self.vehicles[0], self.users[0]
+        self.toggle(user, vehicle, ReactionType.LIKE)
+        result = self.toggle(user, vehicle, ReactionType.FAVORITE)
+
+        self.assertEqual(result, services.ToggleResult(active=True, count=1))
+        self.assertEqual(self.reactions(vehicle, ReactionType.LIKE), {user.id})
+
+    @override_settings(REACTION_COUNTER_SHARDS=4)
+    def test_sharded_counter_total(self):
+        vehicle = self.vehicles[0]
+        for user in self.users:
+            self.toggle(user, vehicle)
+        result = self.toggle(self.users[0], vehicle)
+
+        self.assertEqual(result.count, len(self.users) - 1)
+        self.assertEqual(get_count(self.ct, vehicle.id, ReactionType.LIKE), len(self.users) - 1)
+
+    def test_orm_fallback(self):
+        vehicle, user = self.vehicles[0], self.users[0]
+        on, changed, liked_at = services._toggle_orm(user.id, self.ct, vehicle.id, ReactionType.LIKE)
+        off, _, removed_at = services._toggle_orm(user.id, self.ct, vehicle.id, ReactionType.LIKE)
+
+        self.assertTrue(changed)
+        self.assertEqual((on, off), (services.ToggleResult(True, 1), services.ToggleResult(False, 0)))
+        self.assertEqual(removed_at, liked_at)
+
+    def test_trending_follows_toggle(self):
+        vehicle, user = self.vehicles[0], self.users[0]
+        self.toggle(user, vehicle)
+        self.assertEqual(trending.trending_ids(UserVehicle, 10), [vehicle.id])
+
+        self.toggle(user, vehicle)
+        self.assertEqual(trending.trending_ids(UserVehicle, 10), [])
+
+    def test_unchanged_toggle_skips_trending(self):
+        # 同時トグルに負けて何も変えなかった場合
+        unchanged = (services.ToggleResult(active=True, count=1), False, None)
+        with mock.patch.object(services, "_toggle", return_value=unchanged):
+            self.toggle(self.users[0], self.vehicles[0])
+        self.assertFalse(TrendingScore.objects.exists())
+
+    def test_trending_failure_rolls_back_toggle(self):
+        vehicle = self.vehicles[0]
+        with mock.patch.object(trending, "record", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.toggle(self.users[0], vehicle)
+
+        self.assertEqual(self.reactions(vehicle), set())
+        self.assertEqual(get_count(self.ct, vehicle.id, ReactionType.LIKE), 0)
+
+
+@override_settings(REACTION_COUNTER_SHARDS=4)
+class ReconcileCountersTests(ReactionFixtureMixin, TestCase):
+    """
+    reconcile_reaction_counters: ずれた shard のカウンタを実数から作り直す
+    """
+
+    def call(self, *args) -> str:
+        out = io.StringIO()
+        call_command("reconcile_reaction_counters", *args, stdout=out)
+        return out.getvalue()
+
+    def count(self, vehicle):
+        return get_count(self.ct, vehicle.id, ReactionType.LIKE)
+
+    def test_repairs_drifted_shards(self):
+        liked, orphan, healthy = self.vehicles
+        for user in self.users:
+            self.toggle(user, liked)
+        self.toggle(self.users[0], healthy)
+
+        # ずれを作る: shard の1つを水増し / CASCADE 相当で Reaction だけ消える / 行の無いカウンタ
+        ReactionCounter.objects.filter(content_type=self.ct, object_id=liked.id).update(count=5)
+        Reaction.objects.filter(content_type=self.ct, object_id=healthy.id).delete()
+        adjust_count(self.ct, orphan.id, ReactionType.LIKE, 2)
+
+        self.assertIn("3 counter(s) out of sync.", self.call("--dry-run"))
+        self.assertNotEqual(self.count(liked), len(self.users))  # dry-run は直さない
+
+        self.assertIn("Reconciled 3 counter(s).", self.call())
+        self.assertEqual(self.count(liked), len(self.users))
+        self.assertEqual(self.count(orphan), 0)
+        self.assertEqual(self.count(healthy), 0)
+        self.assertFalse(ReactionCounter.objects.filter(object_id__in=[orphan.id, healthy.id]).exists())
+
+        self.assertIn("0 counter(s) out of sync.", self.call("--dry-run"))
+
+
+@override_settings(REACTION_WRITE_BEHIND=True)
+class WriteBehindTests(ReactionFixtureMixin, TestCase):
+    """
+    write-behind（PendingReaction に溜めて flush_buffer で反映）
+    """
+
+    def test_toggles_are_buffered_until_flush(self):
+        vehicle = self.vehicles[0]
+        a, b = self.users[:2]
+
+        self.assertEqual(self.toggle(a, vehicle), services.ToggleResult(active=True, count=1))
+        self.assertEqual(self.toggle(b, vehicle), services.ToggleResult(active=True, count=2))
+        self.assertEqual(self.reactions(vehicle), set())
+
+        self.assertEqual(flush_buffer(), 2)
+        self.assertEqual(self.reactions(vehicle), {a.id, b.id})
+        self.assertEqual(get_count(self.ct, vehicle.id, ReactionType.LIKE), 2)
+        self.assertFalse(PendingReaction.objects.exists())
+        self.assertEqual(flush_buffer(), 0)
+
+    def test_toggle_off_persisted_reaction(self):
+        vehicle, user = self.vehicles[0], self.users[0]
+        self.toggle(user, vehicle)
+        flush_buffer()
+
+        self.assertEqual(self.toggle(user, vehicle), services.ToggleResult(active=False, count=0))
+        flush_buffer()
+        self.assertEqual(self.reactions(vehicle), set())
+        self.assertEqual(get_count(self.ct, vehicle.id, ReactionType.LIKE), 0)
+
+    def test_on_then_off_before_flush_is_a_no_op(self):
+        vehicle, user = self.vehicles[0], self.users[0]
+        self.toggle(user, vehicle)
+        self.assertEqual(self.toggle(user, vehicle), services.ToggleResult(active=False, count=0))
+
+        flush_buffer()
+        self.assertEqual(self.reactions(vehicle), set())
+        self.assertEqual(get_count(self.ct, vehicle.id, ReactionType.LIKE), 0)
+
+
+    def test_concurrent_first_toggle_counts_once(self):
+        # 同じユーザーの初回トグルが同時に来た場合: 両方とも「付ける」を書こうとし、後の方は変更なし
+        vehicle, user = self.vehicles[0], self.users[0]
+        lookup = {"user_id": user.id, "reaction_type": ReactionType.LIKE, "content_type": self.ct, "object_id": vehicle.id}
+        now = timezone.now()
+
+        self.assertEqual(buffer._upsert_returning(lookup, True, 1, now), (1, True))
+        self.assertEqual(buffer._upsert_returning(lookup, True, 1, now), (1, False))
+        self.assertEqual(buffer.pending_delta(self.ct, vehicle.id, ReactionType.LIKE), 1)
+
+    def test_unchanged_buffered_toggle_skips_trending(self):
+        vehicle, user = self.vehicles[0], self.users[0]
+        with mock.patch.object(buffer, "_upsert_returning", return_value=(1, False)):
+            self.toggle(user, vehicle)
+        self.assertFalse(TrendingScore.objects.exists())
+
+        self.toggle(user, vehicle)
+        self.assertEqual(trending.trending_ids(UserVehicle, 10), [vehicle.id])
+        self.toggle(user, vehicle)
+        self.assertEqual(trending.trending_ids(UserVehicle, 10), [])
+
+    def test_unlike_subtracts_persisted_weight(self):
+        vehicle = self.vehicles[0]
+        self.toggle(self.users[0], vehicle)
+        self.toggle(self.users[1], vehicle)
+        flush_buffer()
+
+        now = timezone.now()
+        liked = Reaction.objects.filter(content_type=self.ct, object_id=vehicle.id)
+        liked.filter(user=self.users[0]).update(created_at=now - timedelta(hours=10))
+        liked.filter(user=self.users[1]).update(created_at=now - timedelta(hours=1))
+        trending.recompute()
+
+        self.toggle(self.users[0], vehicle)
+
+        score = TrendingScore.objects.get(object_id=vehicle.id).score
+        self.assertAlmostEqual(
+            score, trending.log_weight(ReactionType.LIKE, now - timedelta(hours=1)), places=6
+        )
+
+
+class TrendingScoreTests(ReactionFixtureMixin, TestCase):
+    """
+    時間減衰つきスコア（log2 で持つ）
+    """
+
+    def record(self, vehicle, at, sign=1):
+        trending.record(self.ct, vehicle.id, ReactionType.LIKE, sign=sign, at=at)
+
+    def test_newer_engagement_outweighs_older(self):
+        old, new = self.vehicles[:2]
+        start = trending._epoch()
+        half_life = timedelta(seconds=trending._half_life_seconds())
+
+        for _ in range(3):
+            self.record(old, start)
+        self.record(new, start + 2 * half_life)  # 2^2 = 4 > 3
+
+        self.assertEqual(trending.trending_ids(UserVehicle, 10), [new.id, old.id])
+
+    def test_far_future_does_not_overflow(self):
+        vehicle = self.vehicles[0]
+        at = trending._epoch() + timedelta(days=365 * 20)
+        self.record(vehicle, at)
+        self.record(vehicle, at)
+        self.record(vehicle, at, sign=-1)
+
+        score = TrendingScore.objects.get(object_id=vehicle.id).score
+        self.assertAlmostEqual(score, trending.log_weight(ReactionType.LIKE, at), places=6)
+
+        self.record(vehicle, at, sign=-1)
+        self.assertFalse(TrendingScore.objects.exists())
+
+    def test_unlike_subtracts_original_weight(self):
+        vehicle = self.vehicles[0]
+        self.toggle(self.users[0], vehicle)
+        self.toggle(self.users[1], vehicle)
+
+        # 10時間前と1時間前のリアクションだったことにして作り直す
+        now = trending.timezone.now()
+        liked = Reaction.objects.filter(content_type=self.ct, object_id=vehicle.id)
+        liked.filter(user=self.users[0]).update(created_at=now - timedelta(hours=10))
+        liked.filter(user=self.users[1]).update(created_at=now - timedelta(hours=1))
+        trending.recompute()
+
+        self.toggle(self.users[0], vehicle)  # 古い方を外す
+
+        score = TrendingScore.objects.get(object_id=vehicle.id).score
+        self.assertAlmostEqual(
+            score, trending.log_weight(ReactionType.LIKE, now - timedelta(hours=1)), places=6
+        )
+
+    def test_recompute_matches_incremental(self):
+        for i, user in enumerate(self.users):
+            for vehicle in self.vehicles[: i + 1]:
+                self.toggle(user, vehicle)
+        incremental = dict(TrendingScore.objects.values_list("object_id", "score"))
+
+        trending.recompute()
+        recomputed = dict(TrendingScore.objects.values_list("object_id", "score"))
+
+        self.assertEqual(incremental.keys(), recomputed.keys())
+        for object_id, score in incremental.items():
+            self.assertAlmostEqual(score, recomputed[object_id], places=3)
+
+
+class ReactionRateLimitTests(ReactionFixtureMixin, TestCase):
+    """
+    toggle の流量制限（IP は認証より前に、ユーザーはログイン中だけ）
+    """
+
+    def setUp(self):
+        cache.clear()
+        # 窓の切り替わりをまたがないように時刻を止める（窓に入って 20 秒）
+        patcher = mock.patch("apps.common.ratelimit.time")
+        patcher.start().time.return_value = 60 * 1_000_000 + 20.0
+        self.addCleanup(patcher.stop)
+
+    def post(self, client):
+        return client.post(
+            "/reactions/toggle/",
+            json.dumps({
+                "app_label": "vehicles",
+                "model": "uservehicle",
+                "object_id": self.vehicles[0].id,
+                "reaction_type": ReactionType.LIKE,
+            }),
+            content_type="application/json",
+        )
+
+    def test_get_does_not_use_tokens(self):
+        self.client.force_login(self.users[0])
+        for _ in range(130):
+            self.assertEqual(self.client.get("/reactions/toggle/").status_code, 405)
+        self.assertEqual(self.post(self.client).status_code, 200)
+
+    def test_limits_authenticated_posts(self):
+        self.client.force_login(self.users[0])
+        for _ in range(30):
+            self.assertEqual(self.post(self.client).status_code, 200)
+
+        response = self.post(self.client)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    def test_ip_limit_rejects_before_session(self):
+        for _ in range(120):
+            self.assertEqual(self.post(self.client).status_code, 302)  # 未ログインも IP では数える
+        self.assertEqual(self.post(self.client).status_code, 429)
+
+        self.client.force_login(self.users[0])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.post(self.client).status_code, 429)
+
+    def test_user_rejection_does_not_spend_ip(self):
+        member = self.client_class()
+        member.force_login(self.users[0])
+        for _ in range(30):
+            self.assertEqual(self.post(member).status_code, 200)
+        for _ in range(20):
+            self.assertEqual(self.post(member).status_code, 429)
+
+        # ユーザーで断った 20 回は IP の分を使っていない（残りは 120 - 30）
+        for _ in range(90):
+            self.assertEqual(self.post(self.client).status_code, 302)
+        self.assertEqual(self.post(self.client).status_code, 429)
+
+
+class RateLimitCounterTests(TestCase):
+    """
+    apps.common.ratelimit の数え方（原子的な足し引き / プロセス内の上限）
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_overshoot_is_rolled_back(self):
+        bucket = ratelimit.Bucket("rl:test:race", 2, 60)
+        now = 60 * 1_000_000 + 1.0
+        _, curr_key, _ = ratelimit._window_keys(bucket, now)
+
+        # get_many で空きを見た直後に、他のワーカーが2件入れた
+        real_get_many = cache.get_many
+
+        def racing_get_many(keys):
+            counts = real_get_many(keys)
+            cache.set(curr_key, 2)
+            return counts
+
+        with mock.patch.object(cache, "get_many", racing_get_many):
+            self.assertGreater(ratelimit._hit(cache, [bucket], now), 0)
+        self.assertEqual(cache.get(curr_key), 2)
+
+    def test_both_buckets_checked_before_spending(self):
+        now = 60 * 1_000_000 + 1.0
+        ip = ratelimit.Bucket("rl:test:ip", 10, 60)
+        user = ratelimit.Bucket("rl:test:user", 1, 60)
+
+        self.assertEqual(ratelimit._hit(cache, [ip, user], now), 0)
+        self.assertGreater(ratelimit._hit(cache, [ip, user], now), 0)
+        self.assertEqual(cache.get(ratelimit._window_keys(ip, now)[1]), 1)
+
+    def test_local_fallback_is_bounded(self):
+        counters = ratelimit._LocalCounters(max_keys=50)
+        now = 60 * 1_000_000 + 1.0
+        for i in range(500):
+            ratelimit._hit(counters, [ratelimit.Bucket(f"rl:test:{i}", 5, 60)], now)
+        self.assertEqual(len(counters), 50)
+
+    @override_settings(RATELIMIT_CACHE="missing")
+    def test_falls_back_when_cache_is_unavailable(self):
+        bucket = ratelimit.Bucket("rl:test:down", 1, 60)
+        now = 60 * 1_000_000 + 1.0
+        self.assertEqual(ratelimit._check([bucket], now), 0)
+        self.assertGreater(ratelimit._check([bucket], now), 0)
+
+
+class ReactionStateTests(ReactionFixtureMixin, TestCase):
+    """
+    一覧の hydrate 用: /reactions/state/
+    """
+
+    def state(self, vehicles):
+        response = self.client.post(
+            "/reactions/state/",
+            json.dumps({"targets": [
+                {"app_label": "vehicles", "model": "uservehicle", "object_id": v.id} for v in vehicles
+            ]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return {r["object_id"]: r for r in response.json()["results"]}
+
+    def test_counts_and_own_flags(self):
+        liked, other = self.vehicles[:2]
+        self.toggle(self.users[0], liked)
+        self.toggle(self.users[1], liked)
+
+        self.client.force_login(self.users[0])
+        with self.assertNumQueries(3):  # session + user + summary
+            states = self.state([liked, other])
+        self.assertEqual(states[liked.id]["counts"][ReactionType.LIKE], 2)
+        self.assertTrue(states[liked.id]["active"][ReactionType.LIKE])
+        self.assertFalse(states[other.id]["active"][ReactionType.LIKE])
+
+    def test_list_pages_ask_for_state_when_logged_in(self):
+        self.assertNotContains(self.client.get("/vehicles/"), "data-hydrate-reactions")
+        self.client.force_login(self.users[0])
+        self.assertContains(self.client.get("/vehicles/"), "data-hydrate-reactions")
+        self.assertContains(self.client.get("/posts/"), "data-hydrate-reactions")
+
+
+class ReactionTargetSignalTests(ReactionFixtureMixin, TestCase):
+    """
+    リアクションの変化 → 対象の世代番号 / キャッシュを捨てる（apps.interactions.signals）
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_toggle_bumps_target_version(self):
+        vehicle = self.vehicles[0]
+        before = versions.get_version(UserVehicle, vehicle.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.toggle(self.users[0], vehicle)
+        self.assertNotEqual(versions.get_version(UserVehicle, vehicle.id), before)
+
+    def test_stale_content_type_is_ignored(self):
+        # モデルが消えた ContentType（model_class() が None）
+        stale = ContentType.objects.create(app_label="gone", model="ghost")
+        with self.captureOnCommitCallbacks(execute=True):
+            reaction_toggled.send(
+                sender=Reaction, content_type=stale, object_id=1, reaction_type=ReactionType.LIKE, active=True
+            )
+            Reaction.objects.create(
+                user=self.users[0], content_type=stale, object_id=1, reaction_type=ReactionType.LIKE
+            )
@@ -0,0 +1,158 @@
+# apps/interactions/trending.py
+
+import math
+from datetime import datetime, timezone as dt_timezone
+from typing import List, Optional
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Least, Log, Power
+from django.utils import timezone
+
+from .models import Reaction, TrendingScore
+
+
+# イベント種別ごとの重み（"view" は閲覧数を入れるとき用）
+EVENT_WEIGHTS = {
+    "like": 1.0,
+    "favorite": 2.0,
+    "view": 0.1,
+}
+
+_DEFAULT_EPOCH = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+
+# 取り消しで「ほぼ 0」になった行は消す（log2(1 - 2^-ε) の中身を正に保つため）
+_EPSILON = 1e-9
+
+
+def _half_life_seconds() -> float:
+    return float(getattr(settings, "TRENDING_HALF_LIFE_HOURS", 48)) * 3600
+
+
+def _epoch() -> datetime:
+    """
+    スコアの基準時刻（settings.TRENDING_EPOCH）
+    score は log2 で持つので、基準から何年経っても溢れない（進める必要はない）
+    """
+    return getattr(settings, "TRENDING_EPOCH", _DEFAULT_EPOCH)
+
+
+def log_weight(kind: str, at: datetime) -> Optional[float]:
+    """
+    時刻 at のイベント 1件の重み（基準時刻換算, log2）。数えない種別なら None
+    重み 2^(経過/半減期) はそのままだと半減期 48h で約5年後に float を溢れるので、
+    log2(重み) = log2(EVENT_WEIGHTS) + 経過/半減期 で扱う
+    """
+    weight = EVENT_WEIGHTS.get(kind)
+    if not weight:
+        return None
+    return math.log2(weight) + (at - _epoch()).total_seconds() / _half_life_seconds()
+
+
+def log_add(a: Optional[float], b: float) -> float:
+    """
+    log2(2^a + 2^b)（a が None なら b）
+    """
+    if a is None:
+        return b
+    hi, lo = max(a, b), min(a, b)
+    return hi + math.log2(1.0 + 2.0 ** (lo - hi))
+
+
+def record(ct, object_id: int, kind: str, *, sign: int = 1, at: datetime = None) -> None:
+    """
+    エンゲージメント1件をスコアに足す（sign=-1 で取り消し、0 以下になる行は消す）
+    at はイベントの時刻。取り消しは足したときと同じ時刻（リアクションの created_at）を渡すこと
+    （今の時刻で引くと古いリアクションの分を多めに引いて、recompute_trending とずれる）
+    ✅ score は log2 なので、足し引きは log2(2^score ± 2^x) を SQL で計算する（読み書き1回）
+    """
+    now = timezone.now()
+    x = log_weight(kind, at or now)
+    if x is None:
+        return
+
+    scores = TrendingScore.objects.filter(content_type_id=getattr(ct, "pk", ct), object_id=object_id)
+
+    if sign < 0:
+        # 残る行は score > x なので log の中身は正
+        scores.filter(score__lte=x + _EPSILON).delete()
+        scores.update(
+            score=F("score") + Log(Value(2.0), Value(1.0) - Power(Value(2.0), Value(x) - F("score"))),
+            updated_at=now,
+        )
+        return
+
+    hi, lo = Greatest(F("score"), Value(x)), Least(F("score"), Value(x))
+    added = hi + Log(Value(2.0), Value(1.0) + Power(Value(2.0), lo - hi))
+    if scores.update(score=added, updated_at=now):
+        return
+
+    try:
+        with transaction.atomic():
+            TrendingScore.objects.create(
+                content_type_id=getattr(ct, "pk", ct), object_id=object_id, score=x, updated_at=now
+            )
+    except IntegrityError:
+        scores.update(score=added, updated_at=now)
+
+
+def recompute() -> int:
+    """
+    Reaction から全スコアを作り直す（cron などで定期実行）
+    戻り値: スコアを持つターゲット数
+    """
+    scores = {}
+    rows = Reaction.objects.values_list("content_type_id", "object_id", "reaction_type", "created_at")
+    for ct_id, object_id, reaction_type, created_at in rows.iterator(chunk_size=2000):
+        x = log_weight(reaction_type, created_at)
+        if x is not None:
+            key = (ct_id, object_id)
+            scores[key] = log_add(scores.get(key), x)
+
+    now = timezone.now()
+    with transaction.atomic():
+        TrendingScore.objects.all().delete()
+        TrendingScore.objects.bulk_create(
+            [
+                TrendingScore(content_type_id=ct_id, object_id=object_id, score=score, updated_at=now)
+                for (ct_id, object_id), score in scores.items()
+            ],
+            batch_size=1000,
+        )
+
+    return len(scores)
+
+
+def trending_ids(model, limit: int) -> List[int]:
+    """
+    model のトレンド上位 limit 件の id（trending_rank_idx を使う1クエリ）
+    行があればスコアは正（log2 の値は負にもなるので score では絞らない）
+    """
+    ct = ContentType.objects.get_for_model(model)
+    return list(
+        TrendingScore.objects
+        .filter(content_type=ct)
+        .order_by("-score")
+        .values_list("object_id", flat=True)[:limit]
+    )
+
+
+def trending_objects(queryset, limit: int, *, fill_latest: bool = False, fetch=list) -> List:
+    """
+    queryset（select_related などを付けたもの）からトレンド順に limit 件を返す
+    fill_latest=True ならスコアが足りない分を新着順で埋める
+    fetch: queryset → list（カードで取るなら VehicleCard.fetch など。既定はモデルインスタンス）
+    """
+    ids = trending_ids(queryset.model, limit)
+    by_id = {o.pk: o for o in fetch(queryset.filter(pk__in=ids).order_by())} if ids else {}
+    items = [by_id[i] for i in ids if i in by_id]
+
+    if fill_latest and len(items) < limit:
+        items += fetch(
+            queryset.exclude(id__in=[o.id for o in items])
+            .order_by("-created_at")[: limit - len(items)]
+        )
+
+    return items
@@ -5,5 +5,6 @@ from . import views
 
 urlpatterns = [
     path("toggle/", toggle_reaction, name="toggle_reaction"),
+    path("state/", views.reaction_state, name="reaction_state"),
 
 ]
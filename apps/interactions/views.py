@@ -2,8 +2,13 @@ import json
 from django.contrib.auth.decorators import login_required
 from django.contrib.contenttypes.models import ContentType
 from django.http import JsonResponse, HttpResponseBadRequest
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
+from apps.common.ratelimit import rate_limit
+
+from .services import toggle_reaction as toggle
+from .summary import summarize
 from .models import Reaction, ReactionType
 
 from django.shortcuts import render
@@ -13,6 +18,7 @@ from apps.vehicles.models import UserVehicle
 from apps.posts.models import Post
 
 
+@rate_limit("reaction", user_rate="30/m", ip_rate="120/m")
 @login_required
 @require_POST
 def toggle_reaction(request):
@@ -27,25 +33,58 @@ def toggle_reaction(request):
     except Exception:
         return HttpResponseBadRequest("Invalid JSON")
 
-    ct = ContentType.objects.get(app_label=app_label, model=model)
+    # get_by_natural_key は ContentType のキャッシュに乗るので 2回目以降はクエリなし
+    try:
+        ct = ContentType.objects.get_by_natural_key(app_label, model)
+    except ContentType.DoesNotExist:
+        return HttpResponseBadRequest("Invalid target")
+
+    result = toggle(request.user, ct, object_id, reaction_type)
+
+    return JsonResponse({"active": result.active, "count": result.count})
+
+
+# 一覧ページのカードをまとめて hydrate するときの上限
+MAX_STATE_TARGETS = 200
+
+
+@csrf_exempt  # 読み取り専用（POST は targets を body で送るためだけ）
+@require_POST
+def reaction_state(request):
+    """
+    複数ターゲットの数と「自分が付けているか」をまとめて返す
+    body: {"targets": [{"app_label": ..., "model": ..., "object_id": ...}, ...]}
+    ContentType ごとに 1クエリ（未ログインなら active は全部 false）
+    """
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+        raw_targets = payload["targets"]
+        if not isinstance(raw_targets, list) or len(raw_targets) > MAX_STATE_TARGETS:
+            return HttpResponseBadRequest("Invalid targets")
+        targets = [
+            (t["app_label"], t["model"], int(t["object_id"]))
+            for t in raw_targets
+        ]
+    except Exception:
+        return HttpResponseBadRequest("Invalid JSON")
 
-    obj, created = Reaction.objects.get_or_create(
-        user=request.user,
-        reaction_type=reaction_type,
-        content_type=ct,
-        object_id=object_id,
-    )
+    # (app_label, model) ごとにまとめる
+    grouped = {}
+    for app_label, model, object_id in targets:
+        grouped.setdefault((app_label, model), []).append(object_id)
 
-    if not created:
-        obj.delete()
-        active = False
-    else:
-        active = True
+    states = {}
+    for (app_label, model), object_ids in grouped.items():
+        try:
+            ct = ContentType.objects.get_by_natural_key(app_label, model)
+        except ContentType.DoesNotExist:
+            return HttpResponseBadRequest("Invalid target")
 
-    count = Reaction.objects.filter(
-        reaction_type=reaction_type,
-        content_type=ct,
-        object_id=object_id,
-    ).count()
+        for object_id, state in summarize(ct, object_ids, request.user).items():
+            states[(app_label, model, object_id)] = state
 
-    return JsonResponse({"active": active, "count": count})
+    results = [
+        {"app_label": app_label, "model": model, "object_id": object_id, **states[(app_label, model, object_id)]}
+        for app_label, model, object_id in dict.fromkeys(targets)
+    ]
+    return JsonResponse({"results": results})
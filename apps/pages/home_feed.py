@@ -0,0 +1,87 @@
+# apps/pages/home_feed.py
+
+from typing import FrozenSet, List, NamedTuple, Tuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from apps.common import cache as tiered
+from apps.events.cards import EventCard
+from apps.events.models import Event
+from apps.interactions.summary import attach_reaction_summaries
+from apps.interactions.trending import trending_objects
+from apps.posts.cards import PostCard
+from apps.posts.models import Post
+from apps.vehicles.cards import VehicleCard
+from apps.vehicles.models import UserVehicle
+
+
+# スライダー1本あたりの件数
+SLIDER_SIZE = 24
+
+HOME_SNAPSHOT_KEY = "pages:home:snapshot"
+
+
+def _timeout() -> int:
+    """
+    settings.HOME_SNAPSHOT_TIMEOUT（既定 300 秒）
+    変更は signals で消すので、これは消し漏れ（画像・ユーザー名の変更など）の上限
+    """
+    return int(getattr(settings, "HOME_SNAPSHOT_TIMEOUT", 300))
+
+
+class HomeSnapshot(NamedTuple):
+    vehicles: List
+    posts: List
+    events: List
+    # スライダーに載っている (content_type_id, pk)。リアクションで消すかどうかの判定用
+    targets: FrozenSet[Tuple[int, int]]
+
+
+def build_snapshot() -> HomeSnapshot:
+    """
+    トップの全セクションをまとめて作る（キャッシュに入れる前提なのでユーザーに依らない）
+    like_count は全員共通。自分が付けたか（user_like）はトップでは出さない
+    ✅ 中身はカード（apps.*.cards）。要る列だけなので作るのもキャッシュに入れるのも軽い
+    """
+    vehicles = trending_objects(UserVehicle.objects.all(), SLIDER_SIZE, fill_latest=True, fetch=VehicleCard.fetch)
+    posts = trending_objects(Post.objects.all(), SLIDER_SIZE, fill_latest=True, fetch=PostCard.fetch)
+    events = EventCard.fetch(
+        Event.objects.filter(is_published=True).order_by("-created_at")[:SLIDER_SIZE]
+    )
+
+    attach_reaction_summaries(vehicles + posts)
+
+    cts = ContentType.objects.get_for_models(UserVehicle, Post)
+    targets = frozenset(
+        [(cts[UserVehicle].id, v.id) for v in vehicles] + [(cts[Post].id, p.id) for p in posts]
+    )
+    return HomeSnapshot(vehicles=vehicles, posts=posts, events=events, targets=targets)
+
+
+def get_snapshot() -> HomeSnapshot:
+    """
+    キャッシュにあればそれ（DB に行かない）、無ければ作って入れる
+    期限切れ・変更直後は1人だけが作り直し、その間の他のアクセスには古いものを返す（apps.common.cache）
+    ✅ 中のリストは共有物なので、並べ替えるときはコピーしてから
+    """
+    return tiered.get_or_build(HOME_SNAPSHOT_KEY, build_snapshot, timeout=_timeout())
+
+
+def invalidate() -> None:
+    """
+    commit 後にスナップショットを stale にする（次のトップ表示で作り直す）
+    ロールバックされた変更では捨てない
+    """
+    transaction.on_commit(lambda: tiered.expire(HOME_SNAPSHOT_KEY))
+
+
+def invalidate_for_target(content_type_id: int, object_id: int) -> None:
+    """
+    リアクションの付け外し用：スライダーに載っているものだけ捨てる
+    載っていないものがトレンド上位に入ってくるのは timeout で追いつく
+    """
+    snapshot = tiered.peek(HOME_SNAPSHOT_KEY)
+    if snapshot is not None and (content_type_id, object_id) in snapshot.targets:
+        invalidate()
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.common import cache as tiered
+from apps.interactions.models import ReactionType
+from apps.interactions.services import toggle_reaction
+from apps.posts.models import Post
+from apps.vehicles.models import UserVehicle, VehicleModel
+
+from . import home_feed
+
+
+User = get_user_model()
+
+
+class HomeTests(TestCase):
+    """
+    トップ（スナップショットのキャッシュ + リクエストごとのシャッフル / 自分のリアクション）
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", password="pw")
+        cls.viewer = User.objects.create_user("viewer", password="pw")
+        model = VehicleModel.objects.create(maker="Honda", name="Super Cub", slug="super-cub")
+        cls.vehicles = UserVehicle.objects.bulk_create(
+            [UserVehicle(owner=cls.owner, model=model, title=f"v{i}") for i in range(5)]
+        )
+        Post.objects.bulk_create([Post(author=cls.owner, title=f"p{i}", body="b") for i in range(5)])
+
+    def setUp(self):
+        cache.clear()
+        tiered.delete(home_feed.HOME_SNAPSHOT_KEY)
+
+    def test_anonymous_hit_makes_no_queries(self):
+        self.client.get("/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/")
+        self.assertEqual(len(response.context["vehicles"]), 5)
+
+    def test_every_section_is_shuffled(self):
+        self.client.get("/")
+        with mock.patch("apps.pages.views.random.shuffle") as shuffle:
+            self.client.get("/")
+        self.assertEqual(shuffle.call_count, 3)
+
+    def test_logged_in_viewer_sees_own_reactions(self):
+        liked = self.vehicles[0]
+        ct = ContentType.objects.get_for_model(UserVehicle)
+        with self.captureOnCommitCallbacks(execute=True):
+            toggle_reaction(self.viewer, ct, liked.id, ReactionType.LIKE)
+        self.client.get("/")  # スナップショットを作る（ユーザーに依らない）
+
+        self.client.force_login(self.viewer)
+        response = self.client.get("/")
+        mine = {v.id for v in response.context["vehicles"] if v.user_like}
+        self.assertEqual(mine, {liked.id})
+
+        # キャッシュ内のカードは変えない
+        self.assertFalse(any(v.user_like for v in home_feed.get_snapshot().vehicles))
+        self.client.logout()
+        response = self.client.get("/")
+        self.assertFalse(any(v.user_like for v in response.context["vehicles"]))
@@ -4,4 +4,7 @@ from . import views
 
 urlpatterns = [
     path("", views.home, name="home"),
+    path("trending/", views.trending, name="trending"),
+    path("search/", views.search, name="search"),
+    path("tags/", views.tag_cloud, name="tag_cloud"),
 ]
@@ -1,12 +1,20 @@
 # apps/pages/views.py
 
+import copy
+import math
 import random
 from django.shortcuts import render
 
+from apps.vehicles.cards import VehicleCard
 from apps.vehicles.models import UserVehicle
-from apps.posts.models import Post
-from apps.events.models import Event
-from apps.interactions.models import Reaction, ReactionType
+from apps.posts.cards import PostCard
+from apps.posts.models import Post, Tag
+from apps.teams.models import Team, TeamTagStat
+from apps.common.search import search as run_search
+from apps.interactions.summary import attach_reaction_summaries
+from apps.interactions.trending import trending_objects
+
+from . import home_feed
 
 
 def home(request):
@@ -30,92 +38,102 @@ def home(request):
         {
             "title": "次のアップデート予定",
             "url": "",
-            "body": "トップを作り込み中です。検索/絞り込みも追加していきます。",
+            "body": "トップを作り込み中です。検索（車両・投稿・チーム）が使えるようになりました。",
         },
     ]
 
-    # --- Vehicles ---
-    vehicles = list(
-        UserVehicle.objects
-        .select_related("model", "owner", "main_image")
-        .order_by("-created_at")[:24]
-    )
-    random.shuffle(vehicles)
-
-    # --- Posts ---
-    posts = list(
-        Post.objects
-        .select_related("author", "main_image", "vehicle", "vehicle__model")
-        .order_by("-created_at")[:24]
-    )
-    random.shuffle(posts)
-
-    # --- Events ---
-    events = list(
-        Event.objects
-        .select_related("organizer", "organizer_team")
-        .filter(is_published=True)
-        .order_by("-created_at")[:24]
-    )
-    random.shuffle(events)
-
-    latest_vehicles = (
-        UserVehicle.objects.select_related("model", "owner", "main_image")
-        .order_by("-created_at")[:12]
-    )
-    latest_posts = (
-        Post.objects.select_related("author", "main_image")
-        .order_by("-created_at")[:12]
-    )
-
-    # ✅ detailと同じ ContentType を明示して一致させる
-    ct_vehicle = ContentType.objects.get_for_model(UserVehicle)
-    ct_post = ContentType.objects.get_for_model(Post)
-
-    # ✅ スライダーで使っている items=vehicles / posts にも like_count を付与
-    vehicles = attach_like_counts(vehicles, ct_vehicle)
-    posts = attach_like_counts(posts, ct_post)
-
-    # （もし latest_* も別で使うなら残してOK）
-    latest_vehicles = attach_like_counts(latest_vehicles, ct_vehicle)
-    latest_posts = attach_like_counts(latest_posts, ct_post)
+    # --- Vehicles / Posts（トレンド上位）/ Events（新着）をリクエストごとにシャッフル ---
+    # ✅ 全セクションまとめたスナップショットをキャッシュから読むだけ（ヒット時はクエリ 0）
+    snapshot = home_feed.get_snapshot()
+    vehicles, posts, events = list(snapshot.vehicles), list(snapshot.posts), list(snapshot.events)
+    for pool in (vehicles, posts, events):
+        random.shuffle(pool)
+
+    # ✅ 自分が付けたか（user_like / user_fav）はスナップショットに入れない（全員共通なので）
+    #    ログイン中だけ、読んだ後のコピーに付ける（キャッシュ内のカードは共有物なので変えない）
+    if request.user.is_authenticated:
+        vehicles = attach_reaction_summaries([copy.copy(v) for v in vehicles], request.user)
+        posts = attach_reaction_summaries([copy.copy(p) for p in posts], request.user)
 
     return render(request, "pages/home.html", {
         "news_items": news_items,
         "vehicles": vehicles,
         "posts": posts,
         "events": events,
-        "latest_vehicles": latest_vehicles,
-        "latest_posts": latest_posts,
     })
 
 
-from django.contrib.contenttypes.models import ContentType
-from django.db.models import Count
+def trending(request):
+    """
+    トレンド一覧（TrendingScore の上位）
+    """
+    vehicles = trending_objects(UserVehicle.objects.all(), 24, fetch=VehicleCard.fetch)
+    posts = trending_objects(Post.objects.all(), 24, fetch=PostCard.fetch)
+    attach_reaction_summaries(vehicles + posts, request.user)
+
+    return render(request, "pages/trending.html", {
+        "vehicles": vehicles,
+        "posts": posts,
+    })
+
+
+# 検索の種類 → 対象モデル（None は全部）
+SEARCH_TYPES = {
+    "": None,
+    "vehicles": [UserVehicle],
+    "posts": [Post],
+    "teams": [Team],
+}
+
+SEARCH_LIMIT = 50
+
+
+def search(request):
+    """
+    サイト内検索（車両・投稿・チーム、パーツ品番やタグも含む）
+    ?q=<語>&type=vehicles|posts|teams
+    """
+    q = request.GET.get("q", "").strip()[:100]
+    search_type = request.GET.get("type", "")
+    if search_type not in SEARCH_TYPES:
+        search_type = ""
+
+    results = run_search(q, models=SEARCH_TYPES[search_type], limit=SEARCH_LIMIT) if q else []
+
+    return render(request, "pages/search.html", {
+        "q": q,
+        "search_type": search_type,
+        "results": results,
+    })
+
+
+# タグクラウドに出す数 / 文字の大きさの段階
+TAG_CLOUD_LIMIT = 60
+TAG_CLOUD_STEPS = 5
 
-def attach_like_counts(items, ct):
+
+def _with_weights(items, counts):
+    """
+    件数を TAG_CLOUD_STEPS 段階の文字サイズ（px）に（対数で。1件のタグも読める大きさに残す）
+    戻り値: [(item, count, font_px), ...] 名前順
     """
-    items: list(QuerySetでも可だが最終的にlist化する)
-    ct: ContentType（detailと同じものを渡す）
+    top = max(counts, default=1)
+    out = []
+    for item, n in zip(items, counts):
+        step = round((TAG_CLOUD_STEPS - 1) * math.log(n) / math.log(top)) if top > 1 else 0
+        out.append((item, n, 12 + step * 4))
+    return sorted(out, key=lambda x: str(x[0]).lower())
+
 
-    各objに obj.like_count を付与して返す
+def tag_cloud(request):
     """
-    items = list(items)
-    if not items:
-        return items
-
-    like_map = dict(
-        Reaction.objects.filter(
-            reaction_type=ReactionType.LIKE,
-            content_type=ct,
-            object_id__in=[o.id for o in items],
-        )
-        .values("object_id")
-        .annotate(c=Count("id"))
-        .values_list("object_id", "c")
-    )
-
-    for o in items:
-        o.like_count = like_map.get(o.id, 0)
-
-    return items
+    タグクラウド（投稿タグ / チームタグ）
+    件数は Tag.post_count / TeamTagStat.team_count を読むだけ（集計しない）
+    """
+    post_tags = list(Tag.objects.filter(post_count__gt=0).order_by("-post_count", "name")[:TAG_CLOUD_LIMIT])
+    team_tags = list(TeamTagStat.objects.filter(team_count__gt=0).order_by("-team_count", "name")[:TAG_CLOUD_LIMIT])
+
+    return render(request, "pages/tags.html", {
+        "post_tags": _with_weights(post_tags, [t.post_count for t in post_tags]),
+        "team_tags": _with_weights(team_tags, [t.team_count for t in team_tags]),
+    })
@@ -0,0 +1,47 @@
+# apps/posts/cards.py
+
+from django.db.models.functions import Left
+
+from apps.common.cards import Card, UserRef, card_image, image_columns
+
+from .models import Post, PostImage
+
+
+# カードに出す本文の文字数（カードは CSS で3行に省略するので、それより十分長ければよい）
+CARD_BODY_CHARS = 300
+
+
+class PostCard(Card):
+    """
+    投稿カード（一覧 / タグページ / トップのスライダー / プロフィール）
+    本文は先頭 CARD_BODY_CHARS 文字だけ DB で切って取る
+    """
+    __slots__ = ("title", "body", "author", "main_image")
+
+    source_model = Post
+    columns = Card.columns + (
+        "title",
+        "card_body",
+        "author_id", "author__username",
+        *image_columns("main_image", thumb=False),
+    )
+
+    @classmethod
+    def fetch(cls, queryset):
+        return super().fetch(queryset.annotate(card_body=Left("body", CARD_BODY_CHARS)))
+
+    @classmethod
+    def from_row(cls, row: dict) -> "PostCard":
+        card = cls(row["id"], row["created_at"])
+        card.title = row["title"]
+        card.body = row["card_body"]
+        card.author = UserRef(row["author_id"], row["author__username"])
+        # PostImage にはサムネ列が無い（テンプレは thumb が偽なら image を使う）
+        card.main_image = card_image(PostImage, row, "main_image", thumb=False)
+        return card
+
+    def key_parts(self):
+        return (self.author.username,)
+
+    def __str__(self) -> str:
+        return self.title
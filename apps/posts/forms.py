@@ -87,6 +87,10 @@ class PostForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         self._user = user
 
+        # 編集時は今のタグを入れておく（空のまま保存するとタグが全部外れるので）
+        if self.instance.pk and "tags_text" in self.fields:
+            self.fields["tags_text"].initial = ", ".join(self.instance.tags.values_list("name", flat=True))
+
         # vehicle は任意(null/blank=True)なので、選択肢が空でもOK
         if "vehicle" in self.fields:
             if user and getattr(user, "is_authenticated", False):
@@ -132,10 +136,13 @@ class PostForm(forms.ModelForm):
 
         return post
 
-    def save_m2m(self):
+    def _save_m2m(self):
         """
-        commit=False のときに溜めた tags を DB保存後に反映するための互換メソッド
+        commit=False のときに溜めた tags を DB保存後に反映する
+        ✅ save(commit=False) は self.save_m2m = self._save_m2m で上書きするので、
+           save_m2m ではなくこちらを上書きしないと form.save_m2m() で呼ばれない
         """
+        super()._save_m2m()
         tags = getattr(self, "_pending_tags", None)
         if tags is not None:
             self.instance.tags.set(tags)
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_post_count(apps, schema_editor):
+    Tag = apps.get_model("posts", "Tag")
+    for tag in Tag.objects.annotate(n=Count("posts")).iterator():
+        if tag.n:
+            Tag.objects.filter(pk=tag.pk).update(post_count=tag.n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-post_count', 'name'], name='tag_cloud_idx'),
+        ),
+        migrations.RunPython(backfill_post_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:08
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # 既存の行は作成日時から始める（追加した時刻だと全件が「今変わった」ことになる）
+    Post = apps.get_model("posts", "Post")
+    Post.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_tag_post_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -8,6 +8,15 @@ class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=60, unique=True)
 
+    # ✅ このタグの付いた投稿数（tags の変更 / 投稿の削除で apps.posts.tags.recount_tags が数え直す）
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # ✅ タグクラウド（よく使われている順）
+            models.Index(fields=["-post_count", "name"], name="tag_cloud_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -20,6 +29,8 @@ class Post(models.Model):
     tags = models.ManyToManyField(Tag, blank=True, related_name="posts")
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # ✅ 詳細ページの Last-Modified 用。画像 / タグの変更でも進める（signals）
+    updated_at = models.DateTimeField(auto_now=True)
 
     main_image = models.ForeignKey(
         "PostImage",
@@ -29,6 +40,12 @@ class Post(models.Model):
         related_name="+",
     )
 
+    class Meta:
+        indexes = [
+            # ✅ 一覧の keyset ページング（新着順）用
+            models.Index(fields=["-created_at", "-id"], name="post_feed_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -0,0 +1,162 @@
+# apps/posts/signals.py
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.accounts.signals import profile_pages
+from apps.common import versions
+from apps.common.page_cache import purge_page, purge_pages
+from apps.common.search import schedule_index, unindex_object
+from apps.pages import home_feed
+from apps.teams.signals import member_team_pages
+
+from .models import Post, PostImage
+from .tags import recount_tags
+
+
+# ----------------------------
+# タグの件数（Tag.post_count）を直す
+# 投稿の削除: 中間テーブルの行は CASCADE で消えるので、消える前にタグを覚えておく
+# ----------------------------
+@receiver(pre_delete, sender=Post)
+def remember_post_tags(sender, instance, **kwargs):
+    instance._tag_ids = list(instance.tags.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def recount_deleted_post_tags(sender, instance, **kwargs):
+    tag_ids = getattr(instance, "_tag_ids", [])
+    if tag_ids:
+        transaction.on_commit(lambda: recount_tags(tag_ids))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def recount_changed_post_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    post.tags / tag.posts の add / remove / set / clear でタグの件数を数え直す（同じ transaction の中）
+    clear は post_clear に pk_set が来ないので、pre_clear で外れるタグを覚えておく
+    """
+    if action == "pre_clear":
+        if not reverse:
+            instance._cleared_tag_ids = list(instance.tags.values_list("id", flat=True))
+        return
+    if action == "post_clear":
+        tag_ids = [instance.pk] if reverse else getattr(instance, "_cleared_tag_ids", [])
+    elif action in ("post_add", "post_remove"):
+        tag_ids = [instance.pk] if reverse else pk_set
+    else:
+        return
+    recount_tags(tag_ids or [])
+
+
+# ----------------------------
+# 画像 / タグの変更 → 投稿の updated_at を進める（詳細ページの Last-Modified）
+# ----------------------------
+def _touch_posts(post_ids):
+    # update() なので Post の post_save は出ない（同じ transaction の中で書く）
+    if post_ids:
+        Post.objects.filter(pk__in=post_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=PostImage)
+@receiver(post_delete, sender=PostImage)
+def touch_post_image(sender, instance, **kwargs):
+    _touch_posts([instance.post_id])
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def touch_post_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        _touch_posts([instance.pk])
+    elif pk_set:
+        # tag.posts.add(...) など（タグ側から）: pk_set が投稿の id
+        _touch_posts(pk_set)
+
+
+def _tags_changed(instance, action) -> bool:
+    # 投稿側からの add / remove / clear だけ（タグ側からの変更は instance が Tag）
+    return action in ("post_add", "post_remove", "post_clear") and isinstance(instance, Post)
+
+
+# ----------------------------
+# 検索索引の差分更新（commit 後に1件ずつ作り直す。タグが変わったら投稿を作り直す）
+# ----------------------------
+@receiver(post_save, sender=Post)
+def search_index_on_save(sender, instance, **kwargs):
+    schedule_index(Post, instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def search_index_on_delete(sender, instance, **kwargs):
+    unindex_object(Post, instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def search_index_post_tags(sender, instance, action, **kwargs):
+    if _tags_changed(instance, action):
+        schedule_index(Post, instance.pk)
+
+
+# ----------------------------
+# トップのスナップショット（apps.pages.home_feed）を捨てる
+# ----------------------------
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def home_snapshot_on_change(sender, instance, **kwargs):
+    home_feed.invalidate()
+
+
+# ----------------------------
+# 未ログイン向けページキャッシュ（apps.common.page_cache）の消し込み
+# ----------------------------
+def _post_pages(post_id, author_id=None):
+    """
+    投稿が出ているページ: 詳細 / 書いた人のプロフィール / 書いた人のチーム
+    """
+    if author_id is None:
+        author_id = Post.objects.filter(id=post_id).values_list("author_id", flat=True).first()
+
+    return [("post_detail", {"pk": post_id})] + profile_pages([author_id]) + member_team_pages([author_id])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def page_cache_post(sender, instance, **kwargs):
+    purge_pages(_post_pages(instance.id, instance.author_id))
+
+
+@receiver(post_save, sender=PostImage)
+@receiver(post_delete, sender=PostImage)
+def page_cache_post_image(sender, instance, **kwargs):
+    purge_pages(_post_pages(instance.post_id))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def page_cache_post_tags(sender, instance, action, **kwargs):
+    if _tags_changed(instance, action):
+        purge_page("post_detail", pk=instance.pk)
+
+
+# ----------------------------
+# 世代番号（apps.common.versions）を上げる（カードや詳細に出る画像・タグの変更でも上げる）
+# ----------------------------
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def version_post(sender, instance, **kwargs):
+    versions.bump(Post, instance.pk)
+
+
+@receiver(post_save, sender=PostImage)
+@receiver(post_delete, sender=PostImage)
+def version_post_image(sender, instance, **kwargs):
+    versions.bump(Post, instance.post_id)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def version_post_tags(sender, instance, action, **kwargs):
+    if _tags_changed(instance, action):
+        versions.bump(Post, instance.pk)
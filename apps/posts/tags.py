@@ -0,0 +1,32 @@
+# apps/posts/tags.py
+
+from typing import Iterable
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Post, Tag
+
+
+def recount_tags(tag_ids: Iterable[int]) -> None:
+    """
+    Tag.post_count を数え直す（変わったタグだけ。UPDATE 1回）
+    足し引きではなく数え直すので、途中で失敗しても次の更新でずれが直る
+    """
+    tag_ids = {t for t in tag_ids if t}
+    if not tag_ids:
+        return
+
+    through = Post.tags.through
+    counts = (
+        through.objects
+        .filter(tag_id=OuterRef("pk"))
+        .order_by()
+        .values("tag_id")
+        .annotate(n=Count("post_id"))
+        .values("n")
+    )
+    Tag.objects.filter(pk__in=tag_ids).update(
+        post_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+    )
+
@@ -1,3 +1,183 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from PIL import Image
+from django.urls import reverse
+
+from .cards import CARD_BODY_CHARS, PostCard
+from .forms import PostForm
+from .models import Post, PostImage, Tag
+
+
+User = get_user_model()
+
+
+class PostTagTests(TestCase):
+    """
+    タグの件数（Tag.post_count）とタグページ
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="pw")
+
+    def _save(self, tags_text, instance=None):
+        form = PostForm(
+            {"title": "t", "body": "b", "tags_text": tags_text},
+            instance=instance,
+            user=self.author,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        post = form.save(commit=False)
+        post.author = self.author
+        post.save()
+        form.save_m2m()
+        return post
+
+    def _count(self, name):
+        return Tag.objects.get(name=name).post_count
+
+    def test_counts_follow_tag_changes(self):
+        first = self._save("cub, c125")
+        self._save("cub")
+        self.assertEqual(self._count("cub"), 2)
+        self.assertEqual(self._count("c125"), 1)
+
+        self._save("custom", instance=first)
+        self.assertEqual(self._count("cub"), 1)
+        self.assertEqual(self._count("c125"), 0)
+        self.assertEqual(self._count("custom"), 1)
+
+    def test_count_drops_when_post_deleted(self):
+        post = self._save("cub")
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        self.assertEqual(self._count("cub"), 0)
+
+    def test_count_follows_direct_m2m_changes(self):
+        # PostForm を通らない post.tags / tag.posts の変更（admin や shell）でも数え直す
+        post = self._save("cub")
+        other = Post.objects.create(author=self.author, title="t", body="b")
+        cub = Tag.objects.get(name="cub")
+        custom = Tag.objects.create(name="custom", slug="custom")
+
+        post.tags.add(custom)
+        cub.posts.add(other)
+        self.assertEqual(self._count("cub"), 2)
+        self.assertEqual(self._count("custom"), 1)
+
+        post.tags.remove(cub)
+        self.assertEqual(self._count("cub"), 1)
+
+        post.tags.clear()
+        self.assertEqual(self._count("custom"), 0)
+
+        cub.posts.clear()
+        self.assertEqual(self._count("cub"), 0)
+
+    def test_tag_with_slash(self):
+        post = self._save("CT125/ハンターカブ")
+        tag = Tag.objects.get(name="CT125/ハンターカブ")
+        url = reverse("post_tag", args=[tag.slug])
+
+        self.assertEqual(self.client.get(reverse("post_detail", args=[post.pk])).status_code, 200)
+        self.assertEqual(self.client.get(reverse("tag_cloud")).status_code, 200)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p.id for p in response.context["posts"]], [post.id])
+
+
+class PostFormTagTests(TestCase):
+    """
+    PostForm のタグ保存（views と同じ save(commit=False) → save_m2m() の流れ）
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="pw")
+
+    def _save(self, data, instance=None):
+        form = PostForm(data, instance=instance, user=self.author)
+        self.assertTrue(form.is_valid(), form.errors)
+        post = form.save(commit=False)
+        post.author = self.author
+        post.save()
+        form.save_m2m()
+        return post
+
+    def _tags(self, post):
+        return sorted(Post.objects.get(pk=post.pk).tags.values_list("name", flat=True))
+
+    def test_tags_saved_on_create(self):
+        # save(commit=False) は save_m2m を _save_m2m で上書きするので、save_m2m の上書きは呼ばれなかった
+        post = self._save({"title": "t", "body": "b", "tags_text": "cub, c125"})
+        self.assertEqual(self._tags(post), ["c125", "cub"])
+
+    def test_edit_keeps_tags(self):
+        # 編集フォームに今のタグが入っていないと、そのまま保存しただけでタグが全部外れた
+        post = self._save({"title": "t", "body": "b", "tags_text": "cub, c125"})
+        initial = PostForm(instance=post, user=self.author)["tags_text"].value()
+        self.assertEqual(sorted(x.strip() for x in initial.split(",")), ["c125", "cub"])
+
+        self._save({"title": "t2", "body": "b", "tags_text": initial}, instance=post)
+        self.assertEqual(self._tags(post), ["c125", "cub"])
+
+
+class PostCardTemplateTests(TestCase):
+    """
+    PostCard（.values() の列だけ）で描いたカードが、モデルで描いたものと同じになること
+    """
+
+    TEMPLATES = [
+        ("posts/_post_card.html", "post"),
+        ("accounts/_profile_post_card.html", "p"),
+        ("pages/_slider_post_card.html", "obj"),
+        ("teams/_team_post_card.html", "p"),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="pw")
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def assertSameCard(self, post):
+        instance = Post.objects.select_related("author", "main_image").get(pk=post.pk)
+        card = PostCard.fetch(Post.objects.filter(pk=post.pk))[0]
+        for obj in (instance, card):
+            obj.like_count, obj.user_like = 3, True
+
+        for template, name in self.TEMPLATES:
+            with self.subTest(template):
+                self.assertHTMLEqual(
+                    render_to_string(template, {name: card}),
+                    render_to_string(template, {name: instance}),
+                )
+
+    def test_card_with_image(self):
+        post = Post.objects.create(author=self.author, title="整備記録", body="オイル交換")
+        buf = io.BytesIO()
+        Image.new("RGB", (64, 64)).save(buf, "JPEG")
+        image = PostImage.objects.create(
+            post=post, image=SimpleUploadedFile("a.jpg", buf.getvalue(), content_type="image/jpeg")
+        )
+        Post.objects.filter(pk=post.pk).update(main_image=image)
+        self.assertSameCard(post)
+        card = PostCard.fetch(Post.objects.filter(pk=post.pk))[0]
+        self.assertIn("<img", render_to_string("posts/_post_card.html", {"post": card}))
+
+    def test_card_without_image(self):
+        self.assertSameCard(Post.objects.create(author=self.author, title="整備記録", body="オイル交換"))
+
+    def test_body_is_cut_in_sql(self):
+        post = Post.objects.create(author=self.author, title="t", body="あ" * (CARD_BODY_CHARS + 50))
+        card = PostCard.fetch(Post.objects.filter(pk=post.pk))[0]
+        self.assertEqual(card.body, "あ" * CARD_BODY_CHARS)
@@ -3,6 +3,9 @@ from . import views
 
 urlpatterns = [
     path("", views.post_list, name="post_list"),
+    path("feed/", views.post_feed, name="post_feed"),
+    # ✅ 日本語のタグは slug が名前のまま（"CT125/ハンターカブ" など / を含むことがある）
+    path("tags/<path:slug>/", views.post_tag, name="post_tag"),
     path("new/", views.post_create, name="post_create"),
     path("<int:pk>/confirm/", views.post_confirm, name="post_confirm"),
     path("<int:pk>/", views.post_detail, name="post_detail"),
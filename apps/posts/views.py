@@ -1,18 +1,25 @@
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
 
 from django.contrib.contenttypes.models import ContentType
-from apps.interactions.models import Reaction, ReactionType
+from apps.interactions.summary import attach_reaction_summaries
+from .cards import PostCard
 from .forms import PostForm
-from .models import Post, PostImage
+from .models import Post, PostImage, Tag
 from django.db import transaction
 import json
 from django.contrib import messages
-from django.http import HttpResponseForbidden
+from django.http import HttpResponseForbidden, JsonResponse
 from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from apps.common.page_cache import anonymous_page_cache, cards_etag, conditional_page, not_modified
+from apps.common.pagination import keyset_page
 from apps.common.utils import delete_queryset_with_files
+from apps.common.versions import get_version
 
-from django.views.decorators.http import require_POST
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET, require_POST
 
 
 def _delete_image_files(obj) -> None:
@@ -77,36 +84,84 @@ def post_create(request):
     return render(request, "posts/post_form.html", {"form": form})
 
 
-from django.contrib.contenttypes.models import ContentType
-from django.db.models import Count
+# 一覧 / 無限スクロール 1回あたりの件数
+FEED_PER_PAGE = 24
 
-def post_list(request):
-    posts = list(
-        Post.objects
-        .select_related("author", "main_image")
-        .order_by("-created_at")
-    )
+
+def _post_feed_page(request, tag=None):
+    """
+    新着順の1ページ分（?cursor= で続きから）
+    tag を渡すとそのタグの投稿だけ
+    ✅ カードに要る列だけ取る（PostCard）。本文は先頭だけ
+    """
+    qs = Post.objects.all()
+    if tag is not None:
+        qs = qs.filter(tags=tag)
+    posts, next_cursor = keyset_page(qs, request.GET.get("cursor"), FEED_PER_PAGE, fetch=PostCard.fetch)
 
     # ✅ Like数をまとめて集計（N+1回避）
-    ct = ContentType.objects.get_for_model(Post)
+    posts = attach_reaction_summaries(posts, request.user)
+    return posts, next_cursor
 
-    like_map = dict(
-        Reaction.objects.filter(
-            reaction_type=ReactionType.LIKE,
-            content_type=ct,
-            object_id__in=[p.id for p in posts],
-        )
-        .values("object_id")
-        .annotate(c=Count("id"))
-        .values_list("object_id", "c")
-    )
 
-    for p in posts:
-        p.like_count = like_map.get(p.id, 0)
+def post_list(request):
+    posts, next_cursor = _post_feed_page(request)
+    return render(request, "posts/post_list.html", {
+        "posts": posts,
+        "next_cursor": next_cursor,
+    })
+
 
-    return render(request, "posts/post_list.html", {"posts": posts})
+def post_tag(request, slug: str):
+    """
+    タグページ（そのタグの投稿を新着順・keyset ページング）
+    """
+    tag = get_object_or_404(Tag, slug=slug)
+    posts, next_cursor = _post_feed_page(request, tag=tag)
+    return render(request, "posts/post_tag.html", {
+        "tag": tag,
+        "posts": posts,
+        "next_cursor": next_cursor,
+    })
+
+
+@require_GET
+@cache_control(public=True, no_cache=True)
+def post_feed(request):
+    """
+    無限スクロール用: 次ページのカード HTML と cursor を返す
+    ?tag=<slug> でタグページの続き
+    ✅ カードと次の cursor が同じなら 304（HTML を作らない）
+    """
+    tag = None
+    if request.GET.get("tag"):
+        tag = get_object_or_404(Tag, slug=request.GET["tag"])
+    posts, next_cursor = _post_feed_page(request, tag=tag)
+
+    etag = cards_etag("post_feed", posts, tag.slug if tag else "", next_cursor or "")
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    html = render_to_string("posts/_post_cards.html", {"posts": posts}, request=request)
+    response = JsonResponse({"html": html, "next_cursor": next_cursor})
+    response["ETag"] = etag
+    return response
+
+
+def _post_validators(request, pk: int):
+    """
+    post_detail の ETag / Last-Modified（1クエリ + 書いた人の世代番号）
+    """
+    row = Post.objects.filter(pk=pk).values_list("updated_at", "author_id").first()
+    if row is None:
+        return None, ()
+    updated_at, author_id = row
+    return updated_at, (get_version(get_user_model(), author_id),)
 
 
+@conditional_page(_post_validators)
+@anonymous_page_cache
 def post_detail(request, pk: int):
     post = get_object_or_404(
         Post.objects.select_related("author", "vehicle", "vehicle__model").prefetch_related("images", "tags"),
@@ -115,29 +170,14 @@ def post_detail(request, pk: int):
 
     ct = ContentType.objects.get_for_model(Post)
 
-    like_count = Reaction.objects.filter(
-        reaction_type=ReactionType.LIKE, content_type=ct, object_id=post.id
-    ).count()
-    fav_count = Reaction.objects.filter(
-        reaction_type=ReactionType.FAVORITE, content_type=ct, object_id=post.id
-    ).count()
-
-    user_like = False
-    user_fav = False
-    if request.user.is_authenticated:
-        user_like = Reaction.objects.filter(
-            user=request.user, reaction_type=ReactionType.LIKE, content_type=ct, object_id=post.id
-        ).exists()
-        user_fav = Reaction.objects.filter(
-            user=request.user, reaction_type=ReactionType.FAVORITE, content_type=ct, object_id=post.id
-        ).exists()
+    attach_reaction_summaries([post], request.user)
 
     ctx = {
         "post": post,
-        "like_count": like_count,
-        "fav_count": fav_count,
-        "user_like": user_like,
-        "user_fav": user_fav,
+        "like_count": post.like_count,
+        "fav_count": post.fav_count,
+        "user_like": post.user_like,
+        "user_fav": post.user_fav,
         "target": {"app_label": ct.app_label, "model": ct.model, "object_id": post.id},
     }
     return render(request, "posts/post_detail.html", ctx)
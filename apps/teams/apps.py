@@ -6,3 +6,12 @@ from django.apps import AppConfig
 class TeamsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.teams"
+
+    def ready(self):
+        from apps.common.page_cache import register_viewer_part
+
+        from . import signals  # noqa
+        from .counts import get_invite_count
+
+        # navbar の招待数（ページの世代では変わらない）を詳細ページの ETag に混ぜる
+        register_viewer_part(get_invite_count)
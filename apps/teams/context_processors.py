@@ -1,20 +1,14 @@
 # apps/teams/context_processors.py
 
-from .models import TeamMembership, MembershipStatus
+from .counts import get_invite_count
 
 
 def team_invite_count(request):
     """
     navbar 用：自分宛の未承認招待数（INVITED）
+    ✅ user 単位でキャッシュ（apps.teams.counts）。変わるのは membership / team の保存時だけ
     """
     if not request.user.is_authenticated:
         return {"team_invite_count": 0}
 
-    count = TeamMembership.objects.filter(
-        user=request.user,
-        is_active=True,
-        status=MembershipStatus.INVITED,
-        team__is_active=True,
-    ).count()
-
-    return {"team_invite_count": count}
+    return {"team_invite_count": get_invite_count(request.user.id)}
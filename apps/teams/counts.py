@@ -0,0 +1,39 @@
+# apps/teams/counts.py
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import MembershipStatus, TeamMembership
+
+
+# navbar の招待数キャッシュ（招待・承認・辞退・取り消しで signals から消す）
+INVITE_COUNT_TIMEOUT = 60 * 60
+
+
+def invite_count_key(user_id: int) -> str:
+    return f"team_invite_count:{user_id}"
+
+
+def get_invite_count(user_id: int) -> int:
+    """
+    自分宛の未承認招待数（INVITED）。キャッシュに無いときだけ数える
+    """
+    return cache.get_or_set(
+        invite_count_key(user_id),
+        lambda: TeamMembership.objects.filter(
+            user_id=user_id,
+            is_active=True,
+            status=MembershipStatus.INVITED,
+            team__is_active=True,
+        ).count(),
+        INVITE_COUNT_TIMEOUT,
+    )
+
+
+def invalidate_invite_counts(*user_ids: int) -> None:
+    """
+    commit 後に消す（commit 前に消すと、同時に読んだ人が古い数を入れ直すことがある）
+    """
+    keys = [invite_count_key(u) for u in set(user_ids) if u]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -38,6 +38,14 @@ class TeamForm(forms.ModelForm):
             "description": forms.Textarea(attrs={"rows": 4}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 編集時は今のタグを入れておく
+        if self.instance.pk:
+            self.fields["tags_text"].initial = ", ".join(
+                self.instance.tags.order_by("id").values_list("name", flat=True)
+            )
+
 
 class TeamInviteForm(forms.Form):
     username = forms.CharField(help_text="招待したいユーザーの username を入力")
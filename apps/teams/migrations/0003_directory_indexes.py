@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0002_teampinnedvehicle_teamtag'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_public', True)), fields=['-created_at', '-id'], name='team_directory_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_public', True)), fields=['prefecture', '-created_at', '-id'], name='team_pref_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teamtag',
+            index=models.Index(fields=['name', 'team'], name='teamtag_name_idx'),
+        ),
+    ]
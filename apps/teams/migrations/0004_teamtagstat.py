@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_team_tag_stats(apps, schema_editor):
+    TeamTag = apps.get_model("teams", "TeamTag")
+    TeamTagStat = apps.get_model("teams", "TeamTagStat")
+    counts = (
+        TeamTag.objects
+        .filter(team__is_public=True, team__is_active=True)
+        .values("name")
+        .annotate(n=Count("team_id"))
+    )
+    TeamTagStat.objects.bulk_create(
+        [TeamTagStat(name=row["name"], team_count=row["n"]) for row in counts],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0003_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamTagStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=30, unique=True)),
+                ('team_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-team_count', 'name'], name='teamtagstat_cloud_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_team_tag_stats, migrations.RunPython.noop),
+    ]
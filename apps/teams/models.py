@@ -31,6 +31,23 @@ class Team(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # 一覧は公開・有効なチームしか見ないので部分 index にする
+        indexes = [
+            # ✅ チーム一覧（新着順）
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="team_directory_idx",
+                condition=models.Q(is_public=True, is_active=True),
+            ),
+            # ✅ 都道府県で絞った一覧
+            models.Index(
+                fields=["prefecture", "-created_at", "-id"],
+                name="team_pref_idx",
+                condition=models.Q(is_public=True, is_active=True),
+            ),
+        ]
+
     def __str__(self) -> str:
         return self.name
 
@@ -43,11 +60,33 @@ class TeamTag(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["team", "name"], name="uniq_team_tag")
         ]
+        indexes = [
+            # ✅ タグからチームを引く（uniq_team_tag は team が先頭なので使えない）
+            models.Index(fields=["name", "team"], name="teamtag_name_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.team_id}:{self.name}"
 
 
+class TeamTagStat(models.Model):
+    """
+    チームタグ（名前）ごとの公開チーム数
+    TeamTag はチームごとの行なので、タグページ / タグクラウド用に集計しておく
+    （apps.teams.tags.recount_team_tags で更新）
+    """
+    name = models.CharField(max_length=30, unique=True)
+    team_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-team_count", "name"], name="teamtagstat_cloud_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.team_count})"
+
+
 class MembershipStatus(models.TextChoices):
     INVITED = "invited", "Invited"     # 招待された（本人が承認待ち）
     PENDING = "pending", "Pending"     # 参加申請（管理者承認待ち）
@@ -0,0 +1,77 @@
+# apps/teams/permissions.py
+
+from typing import Dict, Optional
+
+from .models import MembershipRole, MembershipStatus, TeamMembership
+
+
+class MembershipResolver:
+    """
+    ログイン中ユーザーの TeamMembership を1回だけ読んで、権限の判定はメモリで答える
+    - 最初に聞かれたときに自分の membership を全部（非アクティブも）1クエリで読む
+    - 未ログインなら DB に行かない
+
+    ✅ request の間だけ使う（membership を書き換えたあとに同じ request で聞くなら forget() する）
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._by_team: Optional[Dict[int, TeamMembership]] = None
+
+    def _memberships(self) -> Dict[int, TeamMembership]:
+        if self._by_team is None:
+            if not self.user.is_authenticated:
+                self._by_team = {}
+            else:
+                self._by_team = {
+                    m.team_id: m for m in TeamMembership.objects.filter(user_id=self.user.id)
+                }
+        return self._by_team
+
+    def forget(self) -> None:
+        self._by_team = None
+
+    def membership(self, team_id: int) -> Optional[TeamMembership]:
+        """
+        そのチームとの membership（状態を問わず）。無ければ None
+        """
+        return self._memberships().get(team_id)
+
+    def _approved(self, team_id: int) -> Optional[TeamMembership]:
+        m = self.membership(team_id)
+        if m and m.is_active and m.status == MembershipStatus.APPROVED:
+            return m
+        return None
+
+    def has_role(self, team_id: int, role: str) -> bool:
+        m = self._approved(team_id)
+        return bool(m and m.role == role)
+
+    def is_member(self, team) -> bool:
+        if not self.user.is_authenticated:
+            return False
+        if team.owner_id == self.user.id:
+            return True
+        return self._approved(team.id) is not None
+
+    def is_admin(self, team) -> bool:
+        if not self.user.is_authenticated:
+            return False
+        if team.owner_id == self.user.id:
+            return True
+        return self.has_role(team.id, MembershipRole.ADMIN)
+
+    def can_view(self, team) -> bool:
+        return team.is_public or self.is_member(team)
+
+
+def memberships_for(user) -> MembershipResolver:
+    """
+    user（= request.user）ごとの resolver。request.user は request ごとに作り直されるので、
+    そこに載せておけば request の間だけ共有される
+    """
+    resolver = getattr(user, "_membership_resolver", None)
+    if resolver is None:
+        resolver = MembershipResolver(user)
+        user._membership_resolver = resolver
+    return resolver
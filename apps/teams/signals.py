@@ -0,0 +1,117 @@
+# apps/teams/signals.py
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.accounts.models import User
+from apps.common import versions
+from apps.common.page_cache import purge_page, purge_pages
+from apps.common.search import schedule_index, unindex_object
+from apps.events.models import Event
+
+from .counts import invalidate_invite_counts
+from .models import MembershipStatus, Team, TeamMembership, TeamPinnedVehicle, TeamTag
+
+
+# ----------------------------
+# 招待数キャッシュの消し込み
+# ----------------------------
+@receiver(post_save, sender=TeamMembership)
+@receiver(post_delete, sender=TeamMembership)
+def invalidate_invite_count(sender, instance, **kwargs):
+    # 招待 / 承認 / 辞退 / 取り消し はどれも membership の保存か削除
+    invalidate_invite_counts(instance.user_id)
+
+
+@receiver(post_save, sender=Team)
+def invalidate_invite_count_team(sender, instance, created=False, **kwargs):
+    # チームの削除（is_active=False）で、そのチームへの招待は数えなくなる
+    if created:
+        return
+    user_ids = (
+        TeamMembership.objects
+        .filter(team=instance, is_active=True, status=MembershipStatus.INVITED)
+        .values_list("user_id", flat=True)
+    )
+    invalidate_invite_counts(*user_ids)
+
+
+# ----------------------------
+# 検索索引の差分更新（commit 後に1件ずつ作り直す。タグが変わったらチームを作り直す）
+# ----------------------------
+@receiver(post_save, sender=Team)
+def search_index_on_save(sender, instance, **kwargs):
+    schedule_index(Team, instance.pk)
+
+
+@receiver(post_delete, sender=Team)
+def search_index_on_delete(sender, instance, **kwargs):
+    unindex_object(Team, instance.pk)
+
+
+@receiver(post_save, sender=TeamTag)
+@receiver(post_delete, sender=TeamTag)
+def search_index_team_tag(sender, instance, **kwargs):
+    schedule_index(Team, instance.team_id)
+
+
+# ----------------------------
+# 未ログイン向けページキャッシュ（apps.common.page_cache）の消し込み
+# ----------------------------
+def member_team_pages(user_ids):
+    """
+    メンバーが所属するチーム詳細の [(url_name, kwargs), ...]（チーム詳細はメンバーの車両・投稿も出している）
+    """
+    team_ids = (
+        TeamMembership.objects
+        .filter(user_id__in={u for u in user_ids if u}, is_active=True, status=MembershipStatus.APPROVED)
+        .values_list("team_id", flat=True)
+    )
+    return [("team_detail", {"team_id": t}) for t in set(team_ids)]
+
+
+@receiver(post_save, sender=Team)
+@receiver(pre_delete, sender=Team)
+def page_cache_team(sender, instance, **kwargs):
+    # チーム名は主催イベントの詳細にも出る
+    # （削除は SET_NULL で主催イベントが外れる前に拾う。purge 自体は commit 後）
+    pages = [("team_detail", {"team_id": instance.id})]
+    pages += [
+        ("event_detail", {"event_id": pk})
+        for pk in Event.objects.filter(organizer_team_id=instance.id).values_list("id", flat=True)
+    ]
+    purge_pages(pages)
+
+
+@receiver(post_save, sender=TeamMembership)
+@receiver(post_delete, sender=TeamMembership)
+@receiver(post_save, sender=TeamTag)
+@receiver(post_delete, sender=TeamTag)
+@receiver(post_save, sender=TeamPinnedVehicle)
+@receiver(post_delete, sender=TeamPinnedVehicle)
+def page_cache_team_child(sender, instance, **kwargs):
+    purge_page("team_detail", team_id=instance.team_id)
+
+
+# ----------------------------
+# 世代番号（apps.common.versions）を上げる
+# ----------------------------
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def version_team(sender, instance, **kwargs):
+    versions.bump(Team, instance.pk)
+
+
+@receiver(post_save, sender=TeamMembership)
+@receiver(post_delete, sender=TeamMembership)
+def version_membership(sender, instance, **kwargs):
+    versions.bump(Team, instance.team_id)
+    versions.bump(User, instance.user_id)
+
+
+@receiver(post_save, sender=TeamTag)
+@receiver(post_delete, sender=TeamTag)
+@receiver(post_save, sender=TeamPinnedVehicle)
+@receiver(post_delete, sender=TeamPinnedVehicle)
+def version_team_child(sender, instance, **kwargs):
+    versions.bump(Team, instance.team_id)
@@ -0,0 +1,34 @@
+# apps/teams/tags.py
+
+from typing import Iterable
+
+from django.db.models import Count
+
+from .models import TeamTag, TeamTagStat
+
+
+def recount_team_tags(names: Iterable[str]) -> None:
+    """
+    TeamTagStat.team_count を数え直す（公開・有効なチームだけ数える）
+    0件になったタグは行ごと消す
+    """
+    names = {n for n in names if n}
+    if not names:
+        return
+
+    counts = dict(
+        TeamTag.objects
+        .filter(name__in=names, team__is_public=True, team__is_active=True)
+        .values("name")
+        .annotate(n=Count("team_id"))
+        .values_list("name", "n")
+    )
+
+    TeamTagStat.objects.filter(name__in=names - counts.keys()).delete()
+    stats = [TeamTagStat(name=name, team_count=n) for name, n in counts.items()]
+    TeamTagStat.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=["name"],
+        update_fields=["team_count"],
+    )
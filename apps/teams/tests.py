@@ -1,3 +1,203 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from .counts import get_invite_count
+from .forms import TeamForm
+from .models import MembershipRole, MembershipStatus, Team, TeamMembership, TeamTag, TeamTagStat
+from .permissions import MembershipResolver
+from .tags import recount_team_tags
+
+
+User = get_user_model()
+
+
+class TeamTagTests(TestCase):
+    """
+    チームタグの件数（TeamTagStat）とタグページ
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", password="pw")
+        cls.public = Team.objects.create(owner=cls.owner, name="Public")
+        cls.private = Team.objects.create(owner=cls.owner, name="Private", is_public=False)
+        for team in (cls.public, cls.private):
+            TeamTag.objects.create(team=team, name="cub")
+            TeamTag.objects.create(team=team, name="CT125/ハンターカブ")
+        recount_team_tags(["cub", "CT125/ハンターカブ"])
+
+    def test_counts_only_public_active_teams(self):
+        self.assertEqual(TeamTagStat.objects.get(name="cub").team_count, 1)
+
+        Team.objects.filter(pk=self.public.pk).update(is_active=False)
+        recount_team_tags(["cub"])
+        self.assertFalse(TeamTagStat.objects.filter(name="cub").exists())
+
+    def test_tag_with_slash(self):
+        self.assertEqual(self.client.get(reverse("team_detail", args=[self.public.pk])).status_code, 200)
+        self.assertEqual(self.client.get(reverse("tag_cloud")).status_code, 200)
+
+        response = self.client.get(reverse("team_tag", args=["CT125/ハンターカブ"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["teams"]), [self.public])
+        self.assertEqual(response.context["team_count"], 1)
+
+
+class TeamFormTagTests(TestCase):
+    """
+    チーム作成 / 編集でタグ（TeamTag）が保存されること
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", password="pw")
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def _tags(self, team):
+        return sorted(TeamTag.objects.filter(team=team).values_list("name", flat=True))
+
+    def test_create_saves_tags(self):
+        # _sync_team_tags が呼ばれておらず、作成時のタグが保存されなかった
+        response = self.client.post(reverse("team_create"), {"name": "カブ部", "is_public": "on", "tags_text": "cub, c125"})
+        team = Team.objects.get(name="カブ部")
+        self.assertRedirects(response, reverse("team_detail", kwargs={"team_id": team.id}))
+        self.assertEqual(self._tags(team), ["c125", "cub"])
+
+    def test_edit_keeps_tags(self):
+        team = Team.objects.create(owner=self.owner, name="カブ部")
+        TeamTag.objects.create(team=team, name="cub")
+        TeamTag.objects.create(team=team, name="c125")
+
+        initial = TeamForm(instance=team)["tags_text"].value()
+        self.assertEqual(initial, "cub, c125")
+
+        self.client.post(
+            reverse("team_edit", kwargs={"team_id": team.id}),
+            {"name": "カブ部", "is_public": "on", "tags_text": initial + ", custom"},
+        )
+        self.assertEqual(self._tags(team), ["c125", "cub", "custom"])
+
+
+class TeamDirectoryTests(TestCase):
+    """
+    チーム一覧の絞り込み（都道府県 / タグ）
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("owner", password="pw")
+        cls.tokyo = Team.objects.create(owner=owner, name="東京カブ", prefecture="tokyo")
+        cls.osaka = Team.objects.create(owner=owner, name="大阪カブ", prefecture="osaka")
+        Team.objects.create(owner=owner, name="非公開", prefecture="tokyo", is_public=False)
+        Team.objects.create(owner=owner, name="解散", prefecture="tokyo", is_active=False)
+        TeamTag.objects.create(team=cls.osaka, name="cub")
+
+    def names(self, **params):
+        response = self.client.get(reverse("team_list"), params)
+        return sorted(t.name for t in response.context["teams"])
+
+    def test_lists_public_active_teams(self):
+        self.assertEqual(self.names(), sorted([self.tokyo.name, self.osaka.name]))
+
+    def test_filters(self):
+        self.assertEqual(self.names(pref="tokyo"), [self.tokyo.name])
+        self.assertEqual(self.names(tag="cub"), [self.osaka.name])
+        self.assertEqual(self.names(pref="tokyo", tag="cub"), [])
+        # 知らない都道府県は絞り込まない
+        self.assertEqual(self.names(pref="atlantis"), sorted([self.tokyo.name, self.osaka.name]))
+
+
+class InviteCountTests(TestCase):
+    """
+    navbar の招待数キャッシュ（apps.teams.counts）が承認 / 辞退 / チーム削除で消えること
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", password="pw")
+        cls.invitee = User.objects.create_user("invitee", password="pw")
+        cls.teams = [Team.objects.create(owner=cls.owner, name=f"team{i}") for i in range(3)]
+        cls.invites = [
+            TeamMembership.objects.create(
+                team=team, user=cls.invitee, status=MembershipStatus.INVITED, invited_by=cls.owner
+            )
+            for team in cls.teams
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, user, name, **kwargs):
+        self.client.force_login(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse(name, kwargs=kwargs))
+
+    def test_count_is_cached(self):
+        self.assertEqual(get_invite_count(self.invitee.id), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_invite_count(self.invitee.id), 3)
+
+    def test_invalidated_on_accept_decline_and_team_delete(self):
+        self.assertEqual(get_invite_count(self.invitee.id), 3)
+
+        self.post(self.invitee, "invite_accept", membership_id=self.invites[0].id)
+        self.assertEqual(get_invite_count(self.invitee.id), 2)
+
+        self.post(self.invitee, "invite_decline", membership_id=self.invites[1].id)
+        self.assertEqual(get_invite_count(self.invitee.id), 1)
+
+        self.post(self.owner, "team_delete", team_id=self.teams[2].id)
+        self.assertEqual(get_invite_count(self.invitee.id), 0)
+
+    def test_navbar_shows_count(self):
+        self.client.force_login(self.invitee)
+        response = self.client.get(reverse("my_team_invites"))
+        self.assertEqual(response.context["team_invite_count"], 3)
+
+
+class MembershipResolverTests(TestCase):
+    """
+    権限判定は自分の membership を request ごとに1回だけ読む（apps.teams.permissions）
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", password="pw")
+        cls.admin = User.objects.create_user("admin", password="pw")
+        cls.team = Team.objects.create(owner=cls.owner, name="秘密基地", is_public=False)
+        cls.other = Team.objects.create(owner=cls.owner, name="公開")
+        TeamMembership.objects.create(
+            team=cls.team, user=cls.admin, status=MembershipStatus.APPROVED, role=MembershipRole.ADMIN
+        )
+
+    def test_resolver_loads_once(self):
+        resolver = MembershipResolver(self.admin)
+        with self.assertNumQueries(1):
+            self.assertTrue(resolver.is_admin(self.team))
+            self.assertTrue(resolver.is_member(self.team))
+            self.assertTrue(resolver.can_view(self.team))
+            self.assertFalse(resolver.is_member(self.other))
+            self.assertIsNone(resolver.membership(self.other.id))
+
+    def test_anonymous_makes_no_query(self):
+        from django.contrib.auth.models import AnonymousUser
+
+        with self.assertNumQueries(0):
+            self.assertFalse(MembershipResolver(AnonymousUser()).can_view(self.team))
+
+    def test_team_detail_loads_own_memberships_once(self):
+        self.client.force_login(self.admin)
+        url = reverse("team_detail", kwargs={"team_id": self.team.id})
+        self.client.get(url)  # navbar の招待数をキャッシュに入れておく
+
+        # 自分の membership を引くクエリ（チーム単位の判定を1回ずつ投げていた頃は 4回）
+        own = f'"teams_teammembership"."user_id" = {self.admin.id}'
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(sum(own in q["sql"] for q in ctx.captured_queries), 1)
@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     path("", views.team_list, name="team_list"),
     path("new/", views.team_create, name="team_create"),
+    # ✅ タグ名は自由入力（/ を含むことがある）
+    path("tags/<path:name>/", views.team_tag, name="team_tag"),
     path("<int:team_id>/", views.team_detail, name="team_detail"),
     path("<int:team_id>/edit/", views.team_edit, name="team_edit"),
 
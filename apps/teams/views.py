@@ -3,12 +3,16 @@
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.db import transaction
 from django.http import Http404, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_POST
 
+from apps.accounts.models import PREF_CHOICES
+from apps.vehicles.cards import VehicleCard
 from apps.vehicles.models import UserVehicle
+from apps.posts.cards import PostCard
 from apps.posts.models import Post
 
 from .forms import (
@@ -25,7 +29,12 @@ from .models import (
     MembershipRole,
     TeamPinnedVehicle,
     TeamTag,
+    TeamTagStat,
 )
+from .permissions import memberships_for
+from .tags import recount_team_tags
+from apps.common.page_cache import anonymous_page_cache
+from apps.common.pagination import keyset_page
 
 from apps.common.utils import (
     save_temp_upload,
@@ -37,47 +46,28 @@ from apps.common.utils import (
 
 User = get_user_model()
 
+PREF_CODES = {code for code, _ in PREF_CHOICES if code}
+
 
 def _team_or_404(team_id: int) -> Team:
     return get_object_or_404(Team, id=team_id, is_active=True)
 
 
 def _is_team_admin(team: Team, user) -> bool:
-    if not user.is_authenticated:
-        return False
-    if team.owner_id == user.id:
-        return True
-    return TeamMembership.objects.filter(
-        team=team,
-        user=user,
-        is_active=True,
-        status=MembershipStatus.APPROVED,
-        role=MembershipRole.ADMIN,
-    ).exists()
+    return memberships_for(user).is_admin(team)
 
 
 def _is_team_member(team: Team, user) -> bool:
-    if not user.is_authenticated:
-        return False
-    if team.owner_id == user.id:
-        return True
-    return TeamMembership.objects.filter(
-        team=team,
-        user=user,
-        is_active=True,
-        status=MembershipStatus.APPROVED,
-    ).exists()
+    return memberships_for(user).is_member(team)
 
 
 def _can_view_team(team: Team, user) -> bool:
-    if team.is_public:
-        return True
-    return _is_team_member(team, user)
+    return memberships_for(user).can_view(team)
 
 
 def _sync_team_tags(team: Team, tags_text: str):
     raw = tags_text or ""
-    names = [x.strip() for x in raw.split(",") if x.strip()]
+    names = [x.strip()[:30] for x in raw.split(",") if x.strip()]
     names = list(dict.fromkeys(names))  # 重複除去
 
     # 既存
@@ -91,12 +81,62 @@ def _sync_team_tags(team: Team, tags_text: str):
     # 削除
     TeamTag.objects.filter(team=team).exclude(name__in=names).delete()
 
+    # ✅ タグ件数（外したタグも、公開 / 非公開の切り替えもここで反映）
+    recount_team_tags(existing | set(names))
+
+
+TEAMS_PER_PAGE = 30
+
 
 def team_list(request):
-    teams = Team.objects.filter(is_active=True, is_public=True).order_by("-created_at")
-    return render(request, "teams/team_list.html", {"teams": teams})
+    """
+    チーム一覧（公開・有効のみ・ページング）
+    - ?pref=<都道府県コード>
+    - ?tag=<タグ名>
+    """
+    pref = request.GET.get("pref", "")
+    tag = request.GET.get("tag", "").strip()
 
+    qs = Team.objects.filter(is_active=True, is_public=True)
+    if pref in PREF_CODES:
+        qs = qs.filter(prefecture=pref)
+    else:
+        pref = ""
+    if tag:
+        qs = qs.filter(id__in=TeamTag.objects.filter(name=tag).values("team_id"))
+
+    page_obj = Paginator(qs.order_by("-created_at", "-id"), TEAMS_PER_PAGE).get_page(request.GET.get("page"))
+
+    return render(request, "teams/team_list.html", {
+        "page_obj": page_obj,
+        "teams": page_obj.object_list,
+        "pref": pref,
+        "tag": tag,
+        "pref_choices": [c for c in PREF_CHOICES if c[0]],
+    })
+
+
+def team_tag(request, name: str):
+    """
+    タグページ（そのタグの公開チームを新着順・keyset ページング）
+    """
+    stat = TeamTagStat.objects.filter(name=name).first()
+    qs = Team.objects.filter(
+        is_active=True,
+        is_public=True,
+        id__in=TeamTag.objects.filter(name=name).values("team_id"),
+    )
+    teams, next_cursor = keyset_page(qs, request.GET.get("cursor"), TEAMS_PER_PAGE)
+
+    return render(request, "teams/team_tag.html", {
+        "tag": name,
+        "team_count": stat.team_count if stat else 0,
+        "teams": teams,
+        "next_cursor": next_cursor,
+    })
 
+
+@anonymous_page_cache
 def team_detail(request, team_id: int):
     team = _team_or_404(team_id)
     if not _can_view_team(team, request.user):
@@ -106,9 +146,8 @@ def team_detail(request, team_id: int):
     is_member = _is_team_member(team, request.user)
 
     # 自分のmembership状態（申請/招待状態表示）
-    my_membership = None
-    if request.user.is_authenticated:
-        my_membership = TeamMembership.objects.filter(team=team, user=request.user).first()
+    # ✅ 権限判定と同じ resolver から（request 内で membership を読むのは1回だけ）
+    my_membership = memberships_for(request.user).membership(team.id)
 
     # メンバー（承認済み）
     approved_memberships = (
@@ -120,31 +159,24 @@ def team_detail(request, team_id: int):
     members = [m.user for m in approved_memberships]
 
     # メンバー車両（member vehicles grid）
-    vehicles_qs = (
-        UserVehicle.objects
-        .filter(owner__in=members)
-        .select_related("model", "main_image", "owner")
-        .order_by("-created_at")
-    )
+    # ✅ カードに要る列だけ（apps.vehicles.cards）
     vehicles_by_user = {}
-    for v in vehicles_qs:
-        vehicles_by_user.setdefault(v.owner_id, []).append(v)
+    for v in VehicleCard.fetch(UserVehicle.objects.filter(owner__in=members).order_by("-created_at")):
+        vehicles_by_user.setdefault(v.owner.id, []).append(v)
 
-    # ✅ 代表車両（Pinned）
-    pinned = (
+    # ✅ 代表車両（Pinned）: ピンの並び順のまま車両カードにする
+    pinned_ids = list(
         TeamPinnedVehicle.objects
         .filter(team=team)
-        .select_related("vehicle", "vehicle__model", "vehicle__main_image")
-        .order_by("sort_order", "id")[:3]
+        .order_by("sort_order", "id")
+        .values_list("vehicle_id", flat=True)[:3]
     )
+    by_id = {v.id: v for v in VehicleCard.fetch(UserVehicle.objects.filter(id__in=pinned_ids))}
+    pinned = [by_id[i] for i in pinned_ids if i in by_id]
 
     # ✅ メンバーの最新投稿（最新12件）
-    # Post に author がある前提。main_image も使う
-    latest_posts = (
-        Post.objects
-        .filter(author__in=members)
-        .select_related("author", "main_image")
-        .order_by("-created_at")[:12]
+    latest_posts = PostCard.fetch(
+        Post.objects.filter(author__in=members).order_by("-created_at")[:12]
     )
 
     # join request form（未参加なら表示）
@@ -217,6 +249,7 @@ def team_create(request):
                 copy_temp_to_field(temp_main, team, "main_image")
 
             team.save()
+            _sync_team_tags(team, form.cleaned_data.get("tags_text", ""))
 
             delete_temp(temp_logo)
             delete_temp(temp_main)
@@ -268,6 +301,7 @@ def team_edit(request, team_id: int):
                 copy_temp_to_field(temp_main, team, "main_image")
 
             team.save()
+            _sync_team_tags(team, form.cleaned_data.get("tags_text", ""))
 
             delete_temp(temp_logo)
             delete_temp(temp_main)
@@ -532,6 +566,7 @@ def team_delete(request, team_id: int):
 
     team.is_active = False
     team.save(update_fields=["is_active", "updated_at"])
+    recount_team_tags(team.tags.values_list("name", flat=True))
 
     messages.success(request, "チームを削除しました。")
     return redirect("team_list")
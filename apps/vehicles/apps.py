@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class VehiclesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "apps.vehicles"
\ No newline at end of file
+    name = "apps.vehicles"
+
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,52 @@
+# apps/vehicles/cards.py
+
+from apps.common.cards import Card, UserRef, card_image, image_columns
+
+from .models import UserVehicle, VehicleImage
+
+
+class ModelRef:
+    """
+    v.model の代わり（メーカー名と車種名だけ）
+    """
+    __slots__ = ("id", "maker", "name")
+
+    def __init__(self, id: int, maker: str, name: str):
+        self.id = id
+        self.maker = maker
+        self.name = name
+
+    def __str__(self) -> str:
+        return f"{self.maker} {self.name}"
+
+
+class VehicleCard(Card):
+    """
+    車両カード（一覧 / トップのスライダー / プロフィール）
+    description / custom_summary / specs は読まない
+    """
+    __slots__ = ("title", "model", "owner", "main_image")
+
+    source_model = UserVehicle
+    columns = Card.columns + (
+        "title",
+        "model_id", "model__maker", "model__name",
+        "owner_id", "owner__username",
+        *image_columns("main_image"),
+    )
+
+    @classmethod
+    def from_row(cls, row: dict) -> "VehicleCard":
+        card = cls(row["id"], row["created_at"])
+        card.title = row["title"]
+        card.model = ModelRef(row["model_id"], row["model__maker"], row["model__name"])
+        card.owner = UserRef(row["owner_id"], row["owner__username"])
+        card.main_image = card_image(VehicleImage, row, "main_image")
+        return card
+
+    def key_parts(self):
+        owner = getattr(self, "owner", None)
+        return (owner.username if owner else "", str(self.model))
+
+    def __str__(self) -> str:
+        return self.title
@@ -0,0 +1,105 @@
+# apps/vehicles/catalog.py
+
+import threading
+from typing import Dict, List, Optional
+
+from apps.common.versions import bump_stamp, get_stamp
+
+from .models import Maker, Part, PartCategory, VehicleModel
+
+
+# ----------------------------
+# マスタ（部品カテゴリ / 部品 / メーカー / 車種）のプロセス内カタログ
+# ----------------------------
+# マスタは管理画面でしか変わらず件数も少ないので、丸ごとメモリに置く
+# 変わったら共有の version を上げ、各プロセスは次のアクセスで作り直す
+VERSION_KEY = "catalog:version"
+
+
+def current_version() -> int:
+    return get_stamp(VERSION_KEY)
+
+
+def bump_version() -> int:
+    return bump_stamp(VERSION_KEY)
+
+
+class Catalog:
+    """
+    マスタの読み取り専用コピー（モデルインスタンスのまま持つ）
+    - part.category は読み込み済み（part.category.name で DB に行かない）
+    - 並び順は各モデルの Meta.ordering と同じ（部品はカテゴリ内で名前順）
+
+    ✅ プロセス内で共有しているインスタンスなので書き換えないこと
+    """
+
+    def __init__(self, version: int):
+        self.version = version
+        self.categories: List[PartCategory] = []
+        self.parts: Dict[int, Part] = {}
+        self.parts_by_category: Dict[int, List[Part]] = {}
+        self.makers: List[Maker] = []
+        self.models: List[VehicleModel] = []
+        self._categories_by_id: Dict[int, PartCategory] = {}
+        self._makers_by_id: Dict[int, Maker] = {}
+        self._models_by_id: Dict[int, VehicleModel] = {}
+
+    @classmethod
+    def build(cls, version: int) -> "Catalog":
+        catalog = cls(version)
+
+        catalog.categories = list(PartCategory.objects.all())
+        catalog._categories_by_id = {c.id: c for c in catalog.categories}
+
+        for c in catalog.categories:
+            catalog.parts_by_category[c.id] = []
+        for part in Part.objects.order_by("name", "id"):
+            part.category = catalog._categories_by_id[part.category_id]
+            catalog.parts[part.id] = part
+            catalog.parts_by_category[part.category_id].append(part)
+
+        catalog.makers = list(Maker.objects.order_by("name", "id"))
+        catalog._makers_by_id = {m.id: m for m in catalog.makers}
+
+        catalog.models = list(VehicleModel.objects.order_by("maker", "name", "id"))
+        catalog._models_by_id = {m.id: m for m in catalog.models}
+        return catalog
+
+    @staticmethod
+    def _get(table: dict, pk) -> Optional[object]:
+        try:
+            return table.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def category(self, pk) -> Optional[PartCategory]:
+        return self._get(self._categories_by_id, pk)
+
+    def part(self, pk) -> Optional[Part]:
+        return self._get(self.parts, pk)
+
+    def maker(self, pk) -> Optional[Maker]:
+        return self._get(self._makers_by_id, pk)
+
+    def model(self, pk) -> Optional[VehicleModel]:
+        return self._get(self._models_by_id, pk)
+
+
+_catalog: Optional[Catalog] = None
+_lock = threading.Lock()
+
+
+def get_catalog() -> Catalog:
+    """
+    プロセス内のカタログ。共有 version が進んでいたら（どこかでマスタが変わったら）作り直す
+    """
+    global _catalog
+    version = current_version()
+    catalog = _catalog
+    if catalog is not None and catalog.version == version:
+        return catalog
+
+    with _lock:
+        if _catalog is None or _catalog.version != version:
+            _catalog = Catalog.build(version)
+        return _catalog
@@ -0,0 +1,729 @@
+# apps/vehicles/facets.py
+
+import copy
+import heapq
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from django.conf import settings
+from django.db import connection
+
+
+# ----------------------------
+# Bitmap（roaring 風）
+# ----------------------------
+# 車両 id を 65536 件ずつのチャンクに分け、チャンクごとに
+# - ARRAY_MAX 件以下: array("H")（下位 16bit のソート済み配列。1件 2byte）
+# - それより多い: Python int（65536bit = 8KB の bitset。AND / OR / bit_count が C で回る）
+# で持つ。部品やメーカーのような「値は多いが1つ1つはまばら」なファセットでもメモリが膨らまない
+#
+# 本家 roaring の境目は 4096 件だが、array 側の演算は Python のループになるので 256 件にしている
+# （bitset になるのは 1件あたり 32byte 以下で済むチャンクだけ）
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+CHUNK_BYTES = (1 << CHUNK_BITS) // 8
+ARRAY_MAX = 256
+
+
+def _offsets(bits: int) -> Iterator[int]:
+    """
+    bitset の立っているビット位置（昇順）。bin() の文字列を find で走査するので速い
+    """
+    s = bin(bits)[:1:-1]
+    i = s.find("1")
+    while i >= 0:
+        yield i
+        i = s.find("1", i + 1)
+
+
+def _array_to_int(arr) -> int:
+    buf = bytearray(CHUNK_BYTES)
+    for o in arr:
+        buf[o >> 3] |= 1 << (o & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _to_int(c) -> int:
+    return c if isinstance(c, int) else _array_to_int(c)
+
+
+def _c_len(c) -> int:
+    return c.bit_count() if isinstance(c, int) else len(c)
+
+
+def _c_and(a, b):
+    if isinstance(a, int):
+        if isinstance(b, int):
+            return a & b
+        a, b = b, a
+    if isinstance(b, int):
+        mask = b.to_bytes(CHUNK_BYTES, "little")
+        return array("H", [o for o in a if mask[o >> 3] >> (o & 7) & 1])
+    return array("H", sorted(set(a).intersection(b)))
+
+
+def _c_and_count(a, b) -> int:
+    if isinstance(a, int):
+        if isinstance(b, int):
+            return (a & b).bit_count()
+        a, b = b, a
+    if isinstance(b, int):
+        mask = b.to_bytes(CHUNK_BYTES, "little")
+        return sum(mask[o >> 3] >> (o & 7) & 1 for o in a)
+    return len(set(a).intersection(b))
+
+
+def _c_or(a, b):
+    if not isinstance(a, int) and not isinstance(b, int) and len(a) + len(b) <= ARRAY_MAX:
+        return array("H", sorted(set(a).union(b)))
+    return _to_int(a) | _to_int(b)
+
+
+class Bitmap:
+    """
+    車両 id の集合（roaring 風。上のコメント参照）
+    演算結果は新しい Bitmap を返す（元の Bitmap は変えない）
+    """
+
+    __slots__ = ("chunks",)
+
+    def __init__(self, chunks: Optional[Dict[int, object]] = None):
+        self.chunks: Dict[int, object] = chunks or {}
+
+    def add(self, i: int) -> None:
+        key, o = i >> CHUNK_BITS, i & CHUNK_MASK
+        c = self.chunks.get(key)
+        if c is None:
+            self.chunks[key] = array("H", [o])
+        elif isinstance(c, int):
+            self.chunks[key] = c | (1 << o)
+        else:
+            pos = bisect_left(c, o)
+            if pos == len(c) or c[pos] != o:
+                c.insert(pos, o)
+                if len(c) > ARRAY_MAX:
+                    self.chunks[key] = _array_to_int(c)
+
+    def discard(self, i: int) -> None:
+        key, o = i >> CHUNK_BITS, i & CHUNK_MASK
+        c = self.chunks.get(key)
+        if c is None:
+            return
+        if isinstance(c, int):
+            c &= ~(1 << o)
+            if c:
+                self.chunks[key] = c
+            else:
+                del self.chunks[key]
+            return
+        pos = bisect_left(c, o)
+        if pos < len(c) and c[pos] == o:
+            del c[pos]
+            if not c:
+                del self.chunks[key]
+
+    def _detached(self, i: int) -> "Bitmap":
+        # i のチャンクだけ複製したコピー（他のチャンクは共有。add / discard しても self は変わらない）
+        out = Bitmap(dict(self.chunks))
+        key = i >> CHUNK_BITS
+        c = out.chunks.get(key)
+        if c is not None and not isinstance(c, int):
+            out.chunks[key] = array("H", c)
+        return out
+
+    def added(self, i: int) -> "Bitmap":
+        """
+        i を足した新しい Bitmap（self は変えないので、読んでいる途中のスレッドがあってもよい）
+        """
+        out = self._detached(i)
+        out.add(i)
+        return out
+
+    def discarded(self, i: int) -> "Bitmap":
+        """
+        i を除いた新しい Bitmap（self は変えない）
+        """
+        out = self._detached(i)
+        out.discard(i)
+        return out
+
+    def __contains__(self, i: int) -> bool:
+        c = self.chunks.get(i >> CHUNK_BITS)
+        if c is None:
+            return False
+        o = i & CHUNK_MASK
+        if isinstance(c, int):
+            return bool(c >> o & 1)
+        pos = bisect_left(c, o)
+        return pos < len(c) and c[pos] == o
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        a, b = (self.chunks, other.chunks) if len(self.chunks) <= len(other.chunks) else (other.chunks, self.chunks)
+        out = {}
+        for key, c in a.items():
+            d = b.get(key)
+            if d is not None:
+                both = _c_and(c, d)
+                if both:
+                    out[key] = both
+        return Bitmap(out)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        out = dict(self.chunks)
+        for key, c in other.chunks.items():
+            out[key] = _c_or(out[key], c) if key in out else c
+        return Bitmap(out)
+
+    def intersection_count(self, other: "Bitmap") -> int:
+        """
+        len(self & other) を、途中の Bitmap を作らずに数える
+        """
+        a, b = (self.chunks, other.chunks) if len(self.chunks) <= len(other.chunks) else (other.chunks, self.chunks)
+        return sum(_c_and_count(c, b[key]) for key, c in a.items() if key in b)
+
+    def __len__(self) -> int:
+        return sum(_c_len(c) for c in self.chunks.values())
+
+    def __bool__(self) -> bool:
+        return bool(self.chunks)
+
+    def __iter__(self) -> Iterator[int]:
+        for key in sorted(self.chunks):
+            c = self.chunks[key]
+            base = key << CHUNK_BITS
+            for o in (_offsets(c) if isinstance(c, int) else c):
+                yield base + o
+
+    def iter_desc(self) -> Iterator[int]:
+        """
+        大きい id（= 新しい車両）から順に
+        """
+        for key in sorted(self.chunks, reverse=True):
+            c = self.chunks[key]
+            base = key << CHUNK_BITS
+            if isinstance(c, int):
+                s = bin(c)[2:]
+                top = len(s) - 1
+                i = s.find("1")
+                while i >= 0:
+                    yield base + top - i
+                    i = s.find("1", i + 1)
+            else:
+                for o in reversed(c):
+                    yield base + o
+
+    def page(self, offset: int, limit: int) -> List[int]:
+        out = []
+        for n, i in enumerate(self.iter_desc()):
+            if n >= offset + limit:
+                break
+            if n >= offset:
+                out.append(i)
+        return out
+
+    def __getitem__(self, s: slice) -> List[int]:
+        # Paginator からは bitmap[bottom:top] で呼ばれる
+        return self.page(s.start or 0, s.stop - (s.start or 0))
+
+    @classmethod
+    def union(cls, bitmaps: Iterable["Bitmap"]) -> "Bitmap":
+        out = cls()
+        for bm in bitmaps:
+            out = out | bm
+        return out
+
+    @classmethod
+    def from_sorted(cls, ids: Sequence[int]) -> "Bitmap":
+        """
+        昇順の id 列からまとめて作る（重複は無視）。1件ずつ add するより速い
+        """
+        chunks = {}
+        start = 0
+        while start < len(ids):
+            key = ids[start] >> CHUNK_BITS
+            end = bisect_left(ids, (key + 1) << CHUNK_BITS, start)
+            offsets = array("H", sorted({i & CHUNK_MASK for i in ids[start:end]}))
+            chunks[key] = offsets if len(offsets) <= ARRAY_MAX else _array_to_int(offsets)
+            start = end
+        return cls(chunks)
+
+
+# ----------------------------
+# ファセット索引
+# ----------------------------
+FACET_MODEL = "model"
+FACET_YEAR = "year"
+FACET_CATEGORY = "category"
+FACET_PART = "part"
+FACET_MAKER = "maker"
+FACETS = (FACET_MODEL, FACET_YEAR, FACET_CATEGORY, FACET_PART, FACET_MAKER)
+
+# 車両パーツの行（part, category, maker）での列番号
+_ROW_COLUMN = {FACET_PART: 0, FACET_CATEGORY: 1, FACET_MAKER: 2}
+
+# 1台ぶんのデータ: (model, year, [(part, category, maker), ...])。0 = 無し
+VehicleState = Tuple[int, int, List[Tuple[int, int, int]]]
+
+# facet_counts の実行計画用: 8KB の bitset 同士の AND 1回が、Python で1件数えるのの何回分か
+DENSE_OP_COST = 20
+
+
+class FacetValue(NamedTuple):
+    value: int
+    label: str
+    count: int         # いまの絞り込みでの件数
+    selected: bool
+
+
+class FacetIndex:
+    """
+    ファセット値ごとの車両 id Bitmap + 車両ごとの行データ
+    - 同じファセット内は OR、ファセット同士は AND
+    - 部品とメーカーを両方選んだときは「そのメーカーのその部品」（同じ VehiclePart 行）で絞る
+    - 行データは array の CSR（starts[vid]〜starts[vid+1] がその車両のパーツ行）で持つ。
+      同じ行の判定と、絞り込み結果が小さいときのファセット件数の数え上げに使う
+    - ✅ 作った後は変えない（更新は refreshed() が変わった所だけ差し替えたコピーを返す）。
+      読む側はロック無しで使える
+    """
+
+    def __init__(self):
+        self.all = Bitmap()
+        self.bitmaps: Dict[str, Dict[int, Bitmap]] = {f: defaultdict(Bitmap) for f in FACETS}
+        self.labels: Dict[str, Dict[int, str]] = {f: {} for f in FACETS}
+
+        # 絞り込み無しのときの件数と、件数の多い順の値（構築時・更新時に数えておく）
+        self.counts: Dict[str, Dict[int, int]] = {f: {} for f in FACETS}
+        self.ranked: Dict[str, List[int]] = {f: [] for f in FACETS}
+
+        # 車両ごとのデータ（0 = 無し）
+        self.model_of = array("i")
+        self.year_of = array("i")
+        self.starts = array("i", [0])
+        self.row_part = array("i")
+        self.row_category = array("i")
+        self.row_maker = array("i")
+        # 構築後に変わった車両（vid → (model, year, rows) / 削除なら None）
+        self.changed: Dict[int, Optional[VehicleState]] = {}
+        # 部品 × メーカーの選択 → 同じ行で付けている車両（_same_row）
+        self._combos: Dict[Tuple[frozenset, frozenset], Bitmap] = {}
+
+        self.built_at = 0.0
+
+    # --- 構築 ---
+    @classmethod
+    def build(cls) -> "FacetIndex":
+        from .models import Maker, Part, PartCategory, UserVehicle, VehicleModel, VehiclePart
+
+        index = cls()
+        # ファセット値ごとの車両 id（どちらも車両 id 順に読むので、そのまま昇順に並ぶ）
+        ids: Dict[str, Dict[int, List[int]]] = {f: defaultdict(list) for f in FACETS}
+        all_ids = []
+
+        vehicles = UserVehicle.objects.order_by("id").values_list("id", "model_id", "year")
+        for vid, model_id, year in vehicles.iterator(chunk_size=5000):
+            index._grow(vid)
+            index.model_of[vid] = model_id
+            index.year_of[vid] = year or 0
+            all_ids.append(vid)
+            ids[FACET_MODEL][model_id].append(vid)
+            if year:
+                ids[FACET_YEAR][year].append(vid)
+
+        rows = (
+            VehiclePart.objects
+            .order_by("vehicle_id", "id")
+            .values_list("vehicle_id", "part_id", "part__category_id", "maker_id")
+        )
+        for vid, part_id, category_id, maker_id in rows.iterator(chunk_size=5000):
+            while len(index.starts) <= vid:
+                index.starts.append(len(index.row_part))
+            index.row_part.append(part_id or 0)
+            index.row_category.append(category_id or 0)
+            index.row_maker.append(maker_id or 0)
+            for facet, value in ((FACET_PART, part_id), (FACET_CATEGORY, category_id), (FACET_MAKER, maker_id)):
+                if value:
+                    ids[facet][value].append(vid)
+        # パーツの無い車両（最後のパーツ行より後の車両も）は空の範囲にする
+        while len(index.starts) <= len(index.model_of):
+            index.starts.append(len(index.row_part))
+
+        index.all = Bitmap.from_sorted(all_ids)
+        for facet, by_value in ids.items():
+            for value, vids in by_value.items():
+                index.bitmaps[facet][value] = Bitmap.from_sorted(vids)
+        index.labels[FACET_YEAR] = {year: str(year) for year in ids[FACET_YEAR]}
+
+        index.labels[FACET_MODEL] = {m.id: f"{m.maker} {m.name}" for m in VehicleModel.objects.all()}
+        index.labels[FACET_CATEGORY] = dict(PartCategory.objects.values_list("id", "name"))
+        index.labels[FACET_PART] = dict(Part.objects.values_list("id", "name"))
+        index.labels[FACET_MAKER] = dict(Maker.objects.values_list("id", "name"))
+        index._recount()
+        index.built_at = time.monotonic()
+        return index
+
+    def _grow(self, vid: int) -> None:
+        if vid >= len(self.model_of):
+            pad = vid + 1 - len(self.model_of)
+            self.model_of.extend(array("i", bytes(4 * pad)))
+            self.year_of.extend(array("i", bytes(4 * pad)))
+
+    def _recount(self) -> None:
+        counts = {
+            facet: {value: len(bm) for value, bm in by_value.items() if bm}
+            for facet, by_value in self.bitmaps.items()
+        }
+        self.ranked = {facet: sorted(c, key=c.get, reverse=True) for facet, c in counts.items()}
+        self.counts = counts
+
+    def _state(self, vid: int) -> Optional[VehicleState]:
+        if vid in self.changed:
+            return self.changed[vid]
+        model_id = self._attr(vid, FACET_MODEL)
+        if not model_id:
+            return None
+        return model_id, self._attr(vid, FACET_YEAR), list(self._rows(vid))
+
+    @staticmethod
+    def _memberships(state: Optional[VehicleState]) -> Set[Tuple[str, int]]:
+        """
+        その車両が入る (facet, value)
+        """
+        if state is None:
+            return set()
+        model_id, year, rows = state
+        out = {(FACET_MODEL, model_id)}
+        if year:
+            out.add((FACET_YEAR, year))
+        for row in rows:
+            out.update((facet, row[col]) for facet, col in _ROW_COLUMN.items() if row[col])
+        return out
+
+    def refreshed(self, vid: int) -> "FacetIndex":
+        """
+        1台ぶんだけ入れ直した新しい索引（signals から。削除済みなら消すだけ）
+        self は変えない。変わる Bitmap / 件数だけ作り直し、他は self と共有する
+        """
+        from .models import UserVehicle, VehiclePart
+
+        row = UserVehicle.objects.filter(id=vid).values_list("model_id", "year").first()
+        state = None
+        if row is not None:
+            model_id, year = row
+            rows = [
+                (p or 0, c or 0, m or 0)
+                for p, c, m in VehiclePart.objects.filter(vehicle_id=vid).values_list("part_id", "part__category_id", "maker_id")
+            ]
+            state = (model_id, year or 0, rows)
+        return self._with_state(vid, state)
+
+    def _with_state(self, vid: int, state: Optional[VehicleState]) -> "FacetIndex":
+        before = self._memberships(self._state(vid))
+        after = self._memberships(state)
+
+        index = copy.copy(self)
+        index.changed = {**self.changed, vid: state}
+        index._combos = {}
+        if vid in self.all and state is None:
+            index.all = self.all.discarded(vid)
+        elif vid not in self.all and state is not None:
+            index.all = self.all.added(vid)
+
+        index.bitmaps, index.counts, index.ranked = dict(self.bitmaps), dict(self.counts), dict(self.ranked)
+        copied = set()
+        for facet, value in sorted(before ^ after):
+            if facet not in copied:
+                copied.add(facet)
+                index.bitmaps[facet] = defaultdict(Bitmap, self.bitmaps[facet])
+                index.counts[facet] = dict(self.counts[facet])
+                index.ranked[facet] = list(self.ranked[facet])
+            bm = index.bitmaps[facet].get(value) or Bitmap()
+            if (facet, value) in after:
+                index.bitmaps[facet][value] = bm.added(vid)
+                index._rerank(facet, value, 1)
+            else:
+                index.bitmaps[facet][value] = bm.discarded(vid)
+                index._rerank(facet, value, -1)
+
+        year = state[1] if state else 0
+        if year and year not in self.labels[FACET_YEAR]:
+            index.labels = {**self.labels, FACET_YEAR: {**self.labels[FACET_YEAR], year: str(year)}}
+        return index
+
+    def _rerank(self, facet: str, value: int, delta: int) -> None:
+        """
+        value の件数を delta だけ変えて、ranked（件数の多い順）の位置を直す
+        """
+        counts, ranked = self.counts[facet], self.ranked[facet]
+        n = counts.get(value, 0)
+        if n:
+            ranked.remove(value)
+        n += delta
+        if n > 0:
+            counts[value] = n
+            insort(ranked, value, key=lambda v: -counts[v])
+        else:
+            counts.pop(value, None)
+
+    # --- 車両ごとのデータ ---
+    def _attr(self, vid: int, facet: str) -> int:
+        if vid in self.changed:
+            data = self.changed[vid]
+            return (data[0] if facet == FACET_MODEL else data[1]) if data else 0
+        column = self.model_of if facet == FACET_MODEL else self.year_of
+        return column[vid] if vid < len(column) else 0
+
+    def _rows(self, vid: int) -> Sequence[Tuple[int, int, int]]:
+        if vid in self.changed:
+            data = self.changed[vid]
+            return data[2] if data else ()
+        if vid + 1 >= len(self.starts):
+            return ()
+        s, e = self.starts[vid], self.starts[vid + 1]
+        return list(zip(self.row_part[s:e], self.row_category[s:e], self.row_maker[s:e]))
+
+    def _same_row(self, parts: List[int], makers: List[int]) -> Bitmap:
+        """
+        「部品 parts のどれか」を「メーカー makers のどれか」で付けている車両
+        ファセットごとに何度も使うので、選択の組み合わせごとに覚えておく（refresh で捨てる）
+        """
+        key = (frozenset(parts), frozenset(makers))
+        cached = self._combos.get(key)
+        if cached is not None:
+            return cached
+
+        candidates = (
+            Bitmap.union(self.bitmaps[FACET_PART].get(p, Bitmap()) for p in parts)
+            & Bitmap.union(self.bitmaps[FACET_MAKER].get(m, Bitmap()) for m in makers)
+        )
+        parts, makers = key
+        row_part, row_maker, starts = self.row_part, self.row_maker, self.starts
+        hits = []
+        for vid in candidates:
+            if vid in self.changed:
+                if any(p in parts and m in makers for p, _, m in self._rows(vid)):
+                    hits.append(vid)
+                continue
+            for i in range(starts[vid], starts[vid + 1]):
+                if row_part[i] in parts and row_maker[i] in makers:
+                    hits.append(vid)
+                    break
+
+        result = Bitmap.from_sorted(hits)
+        if len(self._combos) >= 64:
+            self._combos.clear()
+        self._combos[key] = result
+        return result
+
+    # --- 検索 ---
+    def match(self, selection: Dict[str, List[int]], *, skip: Optional[str] = None) -> Bitmap:
+        """
+        selection（{facet: [value, ...]}）に合う車両の Bitmap
+        skip を指定するとそのファセットは無視する（ファセット件数の計算用）
+        """
+        selection = {f: values for f, values in selection.items() if values and f != skip}
+
+        bitmaps = []
+        if FACET_PART in selection and FACET_MAKER in selection:
+            bitmaps.append(self._same_row(selection.pop(FACET_PART), selection.pop(FACET_MAKER)))
+        bitmaps += [
+            Bitmap.union(self.bitmaps[f].get(v, Bitmap()) for v in values)
+            for f, values in selection.items()
+        ]
+
+        # 小さい集合から AND する（途中で空になったら打ち切り）
+        result = self.all
+        for bm in sorted(bitmaps, key=len):
+            result = result & bm
+            if not result:
+                break
+        return result
+
+    def facet_counts(self, facet: str, selection: Dict[str, List[int]], *, limit: int = 30) -> List[FacetValue]:
+        """
+        facet の各値の件数（他のファセットの絞り込みを反映）
+        件数の多い順に limit 件（選択中の値は必ず含める）
+        """
+        base = self.match(selection, skip=facet)
+        selected = set(selection.get(facet, []))
+        others = {f: values for f, values in selection.items() if f != facet and values}
+
+        if not others:
+            # 絞り込み無し → 数えておいた件数をそのまま使う
+            counts = {v: self.counts[facet].get(v, 0) for v in [*self.ranked[facet][:limit], *selected]}
+        elif not base:
+            counts = {}
+        elif self._should_scan(facet, base, others):
+            # 全件数えるので、ここに無い値は 0 件
+            counts = self._scan_counts(facet, base, others)
+        else:
+            counts = self._bitmap_counts(facet, base, limit)
+            for value in selected - counts.keys():
+                counts[value] = base.intersection_count(self.bitmaps[facet].get(value, Bitmap()))
+
+        ordered = sorted(
+            counts.items(),
+            key=lambda vc: (vc[0] not in selected, -vc[1], self.labels[facet].get(vc[0], "")),
+        )
+        top = [(value, n) for value, n in ordered if n or value in selected][:max(limit, len(selected))]
+        if facet == FACET_YEAR:
+            # 年式は新しい順に並べ直す
+            top.sort(key=lambda vc: -vc[0])
+
+        return [
+            FacetValue(value, self.labels[facet].get(value, str(value)), n, value in selected)
+            for value, n in top
+        ]
+
+    def _should_scan(self, facet: str, base: Bitmap, others: Dict[str, List[int]]) -> bool:
+        """
+        絞り込み結果の車両を1台ずつ見るか、ファセット値ごとに Bitmap を AND するか
+        - 部品 × メーカーの組み合わせは行を見ないと数えられないので常に前者
+          （件数が絞り込み結果の台数に比例するのはこの場合だけ）
+        - それ以外はざっくりした見積りで安い方
+        """
+        pair = {FACET_PART: FACET_MAKER, FACET_MAKER: FACET_PART}
+        if others.get(pair.get(facet)):
+            return True
+        rows_per_vehicle = len(self.row_part) / max(1, len(self.starts) - 1)
+        scan_cost = len(base) * (1 if facet in (FACET_MODEL, FACET_YEAR) else 1 + rows_per_vehicle)
+        per_value = DENSE_OP_COST * len(base.chunks)
+        bitmap_cost = sum(min(n, per_value) for n in self.counts[facet].values())
+        return scan_cost < bitmap_cost
+
+    def _scan_counts(self, facet: str, base: Bitmap, others: Dict[str, List[int]]) -> Dict[int, int]:
+        counter = Counter()
+        changed = [vid for vid in self.changed if vid in base]
+        vids = (vid for vid in base if vid not in self.changed) if changed else iter(base)
+
+        if facet in (FACET_MODEL, FACET_YEAR):
+            column = self.model_of if facet == FACET_MODEL else self.year_of
+            counter.update(map(column.__getitem__, vids))
+            counter.update(self._attr(vid, facet) for vid in changed)
+            counter.pop(0, None)
+            return dict(counter)
+
+        # 部品 × メーカーは「相手側で選ばれたもの」と同じ行だけ数える
+        if facet == FACET_PART and others.get(FACET_MAKER):
+            column, other_column, allowed = self.row_part, self.row_maker, set(others[FACET_MAKER])
+        elif facet == FACET_MAKER and others.get(FACET_PART):
+            column, other_column, allowed = self.row_maker, self.row_part, set(others[FACET_PART])
+        else:
+            column, other_column, allowed = (self.row_part, self.row_category, self.row_maker)[_ROW_COLUMN[facet]], None, None
+
+        # 車両ごとに重複を除いた値を1本の list に溜めて、最後にまとめて数える
+        starts, values = self.starts, []
+        if other_column is None:
+            for vid in vids:
+                values.extend(set(column[starts[vid]:starts[vid + 1]]))
+        else:
+            for vid in vids:
+                s, e = starts[vid], starts[vid + 1]
+                values.extend({v for v, o in zip(column[s:e], other_column[s:e]) if o in allowed})
+        counter.update(values)
+
+        col = _ROW_COLUMN[facet]
+        for vid in changed:
+            rows = self._rows(vid)
+            if other_column is not None:
+                other = _ROW_COLUMN[FACET_MAKER if facet == FACET_PART else FACET_PART]
+                rows = [row for row in rows if row[other] in allowed]
+            counter.update({row[col] for row in rows})
+
+        counter.pop(0, None)
+        return dict(counter)
+
+    def _bitmap_counts(self, facet: str, base: Bitmap, limit: int) -> Dict[int, int]:
+        """
+        件数の多い値から順に AND して数える
+        絞り込み後の件数は元の件数を超えないので、上位 limit 件が決まった時点で打ち切る
+        """
+        counts: Dict[int, int] = {}
+        best: List[int] = []  # 上位 limit 件の件数（min-heap）
+        for value in self.ranked[facet]:
+            if len(best) >= limit and self.counts[facet].get(value, 0) <= best[0]:
+                break
+            n = base.intersection_count(self.bitmaps[facet][value])
+            if not n:
+                continue
+            counts[value] = n
+            if len(best) < limit:
+                heapq.heappush(best, n)
+            elif n > best[0]:
+                heapq.heapreplace(best, n)
+        return counts
+
+
+# ----------------------------
+# プロセス内キャッシュ
+# ----------------------------
+logger = logging.getLogger(__name__)
+
+_index: Optional[FacetIndex] = None
+_lock = threading.Lock()
+_rebuilding = False
+# 作り直し中に変わった車両（新しい索引に入れ直す）
+_pending: set = set()
+
+
+def _ttl() -> float:
+    """
+    settings.FACET_INDEX_TTL 秒（既定 300）で作り直す
+    同じプロセスの変更は signals で即反映、他プロセスの変更はこの間隔で追いつく
+    """
+    return float(getattr(settings, "FACET_INDEX_TTL", 300))
+
+
+def _rebuild() -> None:
+    global _index, _rebuilding
+    try:
+        fresh = FacetIndex.build()
+        with _lock:
+            for vid in _pending:
+                fresh = fresh.refreshed(vid)
+            _index = fresh
+    except Exception:
+        logger.exception("facet index rebuild failed")
+    finally:
+        with _lock:
+            _rebuilding = False
+            _pending.clear()
+        connection.close()
+
+
+def get_index() -> FacetIndex:
+    """
+    プロセス内の索引
+    - 初回だけはその場で作る
+    - TTL を過ぎたら古い索引を返しつつ、裏のスレッドで作り直す（リクエストを待たせない）
+    """
+    global _index, _rebuilding
+    index = _index
+    if index is None:
+        with _lock:
+            if _index is None:
+                _index = FacetIndex.build()
+            return _index
+
+    if time.monotonic() - index.built_at >= _ttl():
+        with _lock:
+            if not _rebuilding:
+                _rebuilding = True
+                threading.Thread(target=_rebuild, name="facet-index-rebuild", daemon=True).start()
+    return index
+
+
+def on_vehicle_changed(vehicle_id: int) -> None:
+    """
+    1台入れ直した索引に差し替える（読んでいる途中のリクエストは古い索引のまま最後まで読める）
+    """
+    global _index
+    with _lock:
+        if _index is not None:
+            _index = _index.refreshed(vehicle_id)
+        if _rebuilding:
+            _pending.add(vehicle_id)
@@ -3,8 +3,11 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import UploadedFile
+from django.urls import reverse
 
-from .models import UserVehicle, VehiclePart, PartCategory, Part, Maker
+from .catalog import get_catalog
+from .models import UserVehicle, VehiclePart
+from .typeahead import KIND_MAKER, KIND_MODEL, get_index as get_typeahead_index
 
 
 # ----------------------------
@@ -78,12 +81,106 @@ class MultipleImageField(forms.Field):
         return value
 
 
+# ----------------------------
+# マスタ選択（全件の <select> を出さずに入力補完で選ぶ）
+# ----------------------------
+class TypeaheadSelect(forms.Widget):
+    """
+    hidden に id、見える input に名前を入れる（候補は api_typeahead から）
+    CatalogChoiceField と組み合わせて使う（検証は catalog で行う）
+    """
+    template_name = "vehicles/widgets/typeahead.html"
+
+    def __init__(self, kind: str, attrs=None):
+        self.kind = kind
+        super().__init__(attrs)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        item = get_typeahead_index().get(self.kind, value) if value else None
+        context["widget"].update({
+            "kind": self.kind,
+            "label": item.name if item else "",
+            "url": reverse("api_typeahead"),
+        })
+        return context
+
+
+class CatalogChoiceField(forms.ChoiceField):
+    """
+    マスタを catalog（apps.vehicles.catalog）から選ぶ
+    ModelChoiceField と同じく cleaned_data はモデルインスタンス。選択肢の描画も検証も DB に行かない
+
+    lookup: pk → インスタンス（無ければ None）
+    items:  選択肢に出すインスタンスの list（呼ばれたときに作る callable でもよい）
+    """
+
+    def __init__(self, *, lookup, items=(), empty_label="---------", **kwargs):
+        self.lookup = lookup
+        self.empty_label = empty_label
+        super().__init__(**kwargs)
+        self.set_items(items)
+
+    def set_items(self, items) -> None:
+        def choices():
+            objs = items() if callable(items) else items
+            return [("", self.empty_label)] + [(o.pk, str(o)) for o in objs]
+        # callable にしておくと描画するときまで作らない（typeahead の widget では作らない）
+        self.choices = choices
+
+    def prepare_value(self, value):
+        return getattr(value, "pk", value)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        obj = self.lookup(getattr(value, "pk", value))
+        if obj is None:
+            raise ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+        return obj
+
+    def validate(self, value):
+        # 選択肢にあるかは to_python で見ている（ChoiceField の文字列比較はしない）
+        forms.Field.validate(self, value)
+
+    def has_changed(self, initial, data):
+        if self.disabled:
+            return False
+        initial = "" if initial is None else str(self.prepare_value(initial))
+        data = "" if data is None else str(self.prepare_value(data))
+        return initial != data
+
+
+class CatalogModelForm(forms.ModelForm):
+    """
+    CatalogChoiceField を使う ModelForm
+    ✅ 存在確認は catalog で済んでいるので、モデル検証（FK ごとの exists クエリ）からは外す
+    """
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        exclude.update(
+            name for name, field in self.fields.items() if isinstance(field, CatalogChoiceField)
+        )
+        return exclude
+
+
 # ----------------------------
 # Step1: 最小登録フォーム
 # ----------------------------
-class VehicleQuickForm(forms.ModelForm):
+class VehicleQuickForm(CatalogModelForm):
     images = MultipleImageField(required=False, help_text="最大10枚（png/jpg/webp）")
 
+    # ✅ 車種はカタログから検証（DB に行かない）
+    model = CatalogChoiceField(
+        lookup=lambda pk: get_catalog().model(pk),
+        widget=TypeaheadSelect(KIND_MODEL, attrs={"placeholder": "車種名（例: スーパーカブ / super cub）"}),
+    )
+
     class Meta:
         model = UserVehicle
         fields = ["model", "title"]
@@ -112,12 +209,31 @@ class VehicleDetailForm(forms.ModelForm):
 # ----------------------------
 # パーツ追加フォーム
 # ----------------------------
-class VehiclePartForm(forms.ModelForm):
-    category = forms.ModelChoiceField(
-        queryset=PartCategory.objects.all(),
+def _part_in_category(catalog, pk, category_id):
+    part = catalog.part(pk)
+    return part if part and part.category_id == category_id else None
+
+
+class VehiclePartForm(CatalogModelForm):
+    """
+    カテゴリ / 部品 / メーカーの選択肢と検証は catalog（メモリ）から
+    1 request でフォームを何度作ってもマスタのクエリは出ない
+    """
+    category = CatalogChoiceField(
+        lookup=lambda pk: get_catalog().category(pk),
+        items=lambda: get_catalog().categories,
         required=False,
         empty_label="（カテゴリを選択）",
     )
+    part = CatalogChoiceField(
+        lookup=lambda pk: get_catalog().part(pk),
+        required=False,
+    )
+    maker = CatalogChoiceField(
+        lookup=lambda pk: get_catalog().maker(pk),
+        required=False,
+        widget=TypeaheadSelect(KIND_MAKER, attrs={"placeholder": "メーカー名（例: キタコ / kitaco）"}),
+    )
 
     class Meta:
         model = VehiclePart
@@ -125,26 +241,21 @@ class VehiclePartForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        catalog = get_catalog()
 
-        self.fields["maker"].queryset = Maker.objects.all().order_by("name")
-        self.fields["maker"].required = False
-
-        self.fields["part"].queryset = Part.objects.none()
-        self.fields["part"].required = False
-
-        cat = None
-        if self.data.get("category"):
-            try:
-                cat = PartCategory.objects.get(pk=int(self.data.get("category")))
-            except Exception:
-                cat = None
+        cat = catalog.category(self.data.get("category")) if self.data.get("category") else None
 
         if not cat and getattr(self.instance, "part_id", None):
-            cat = self.instance.part.category
+            part = catalog.part(self.instance.part_id)
+            cat = part.category if part else None
 
+        # 部品はカテゴリを選ぶまで空（選んだら api_parts_by_category で入れ替える）
+        self.fields["part"].lookup = (
+            (lambda pk, cat_id=cat.id: _part_in_category(catalog, pk, cat_id)) if cat else (lambda pk: None)
+        )
         if cat:
             self.fields["category"].initial = cat
-            self.fields["part"].queryset = Part.objects.filter(category=cat).order_by("name")
+            self.fields["part"].set_items(catalog.parts_by_category.get(cat.id, []))
 
     def clean(self):
         cleaned = super().clean()
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0009_remove_uservehicle_seat_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='uservehicle',
+            index=models.Index(fields=['-created_at', '-id'], name='uservehicle_feed_idx'),
+        ),
+    ]
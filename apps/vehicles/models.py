@@ -60,6 +60,8 @@ class UserVehicle(models.Model):
     description = models.TextField(blank=True, default="")
     custom_summary = models.TextField(blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
+    # ✅ 詳細ページの Last-Modified 用。画像 / パーツの変更でも進める（signals）
+    updated_at = models.DateTimeField(auto_now=True)
 
     # 一覧表示などを軽くするための「メイン画像ショートカット」
     main_image = models.ForeignKey(
@@ -73,6 +75,12 @@ class UserVehicle(models.Model):
     # 将来「車両スペック」を柔軟に増やす用（現状はフォームには出してない）
     specs = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        indexes = [
+            # ✅ 一覧の keyset ページング（新着順）用
+            models.Index(fields=["-created_at", "-id"], name="uservehicle_feed_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -0,0 +1,168 @@
+# apps/vehicles/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.accounts.signals import profile_pages
+from apps.common import versions
+from apps.common.page_cache import purge_pages
+from apps.common.search import schedule_index, unindex_object
+from apps.events.models import EventEntry
+from apps.pages import home_feed
+from apps.posts.models import Post
+from apps.teams.signals import member_team_pages
+
+from .catalog import bump_version as bump_catalog_version
+from .facets import on_vehicle_changed
+from .models import Maker, Part, PartCategory, UserVehicle, VehicleImage, VehicleModel, VehiclePart
+from .typeahead import KIND_MAKER, KIND_MODEL, KIND_PART, on_master_changed
+
+
+_KINDS = {Part: KIND_PART, Maker: KIND_MAKER, VehicleModel: KIND_MODEL}
+
+
+# ----------------------------
+# マスタ（部品カテゴリ / 部品 / メーカー / 車種）の変更 → カタログの version を上げる
+# ✅ typeahead はカタログから作り直すので、先にこちらを登録する（on_commit は登録順に走る）
+# ----------------------------
+@receiver(post_save, sender=PartCategory)
+@receiver(post_save, sender=Part)
+@receiver(post_save, sender=Maker)
+@receiver(post_save, sender=VehicleModel)
+@receiver(post_delete, sender=PartCategory)
+@receiver(post_delete, sender=Part)
+@receiver(post_delete, sender=Maker)
+@receiver(post_delete, sender=VehicleModel)
+def catalog_master_changed(sender, instance, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+# ----------------------------
+# マスタ（部品 / メーカー / 車種）の変更 → typeahead 索引を差分更新
+# ----------------------------
+@receiver(post_save, sender=Part)
+@receiver(post_save, sender=Maker)
+@receiver(post_save, sender=VehicleModel)
+@receiver(post_delete, sender=Part)
+@receiver(post_delete, sender=Maker)
+@receiver(post_delete, sender=VehicleModel)
+def typeahead_master_changed(sender, instance, **kwargs):
+    kind, pk = _KINDS[sender], instance.pk
+    transaction.on_commit(lambda: on_master_changed(kind, pk))
+
+
+# ----------------------------
+# 車両 / 車両パーツの変更 → ファセット索引の1台ぶんを入れ直す（このプロセス分）
+# ----------------------------
+@receiver(post_save, sender=UserVehicle)
+@receiver(post_delete, sender=UserVehicle)
+def facets_vehicle_changed(sender, instance, **kwargs):
+    vehicle_id = instance.pk
+    transaction.on_commit(lambda: on_vehicle_changed(vehicle_id))
+
+
+@receiver(post_save, sender=VehiclePart)
+@receiver(post_delete, sender=VehiclePart)
+def facets_vehicle_part_changed(sender, instance, **kwargs):
+    vehicle_id = instance.vehicle_id
+    transaction.on_commit(lambda: on_vehicle_changed(vehicle_id))
+
+
+# ----------------------------
+# 画像 / パーツの変更 → 車両の updated_at を進める（詳細ページの Last-Modified）
+# ----------------------------
+@receiver(post_save, sender=VehicleImage)
+@receiver(post_delete, sender=VehicleImage)
+@receiver(post_save, sender=VehiclePart)
+@receiver(post_delete, sender=VehiclePart)
+def touch_vehicle(sender, instance, **kwargs):
+    # update() なので UserVehicle の post_save は出ない（同じ transaction の中で書く）
+    if instance.vehicle_id:
+        UserVehicle.objects.filter(pk=instance.vehicle_id).update(updated_at=timezone.now())
+
+
+# ----------------------------
+# 検索索引の差分更新（commit 後に1件ずつ作り直す。パーツの品番が変わったら車両を作り直す）
+# ----------------------------
+@receiver(post_save, sender=UserVehicle)
+def search_index_on_save(sender, instance, **kwargs):
+    schedule_index(UserVehicle, instance.pk)
+
+
+@receiver(post_delete, sender=UserVehicle)
+def search_index_on_delete(sender, instance, **kwargs):
+    unindex_object(UserVehicle, instance.pk)
+
+
+@receiver(post_save, sender=VehiclePart)
+@receiver(post_delete, sender=VehiclePart)
+def search_index_vehicle_part(sender, instance, **kwargs):
+    if instance.vehicle_id:
+        schedule_index(UserVehicle, instance.vehicle_id)
+
+
+# ----------------------------
+# トップのスナップショット（apps.pages.home_feed）を捨てる
+# ----------------------------
+@receiver(post_save, sender=UserVehicle)
+@receiver(post_delete, sender=UserVehicle)
+def home_snapshot_on_change(sender, instance, **kwargs):
+    home_feed.invalidate()
+
+
+# ----------------------------
+# 未ログイン向けページキャッシュ（apps.common.page_cache）の消し込み
+# ----------------------------
+def _vehicle_pages(vehicle_id, owner_id=None):
+    """
+    車両が出ているページ: 詳細 / 持ち主のプロフィール / 持ち主のチーム / エントリー中のイベント / 紐づく投稿
+    """
+    if owner_id is None:
+        owner_id = UserVehicle.objects.filter(id=vehicle_id).values_list("owner_id", flat=True).first()
+
+    pages = [("vehicle_detail", {"pk": vehicle_id})]
+    pages += profile_pages([owner_id])
+    pages += member_team_pages([owner_id])
+    pages += [
+        ("event_detail", {"event_id": e})
+        for e in set(EventEntry.objects.filter(vehicle_id=vehicle_id).values_list("event_id", flat=True))
+    ]
+    pages += [
+        ("post_detail", {"pk": p})
+        for p in Post.objects.filter(vehicle_id=vehicle_id).values_list("id", flat=True)
+    ]
+    return pages
+
+
+@receiver(post_save, sender=UserVehicle)
+@receiver(post_delete, sender=UserVehicle)
+def page_cache_vehicle(sender, instance, **kwargs):
+    purge_pages(_vehicle_pages(instance.id, instance.owner_id))
+
+
+@receiver(post_save, sender=VehicleImage)
+@receiver(post_delete, sender=VehicleImage)
+@receiver(post_save, sender=VehiclePart)
+@receiver(post_delete, sender=VehiclePart)
+def page_cache_vehicle_child(sender, instance, **kwargs):
+    if instance.vehicle_id:
+        purge_pages(_vehicle_pages(instance.vehicle_id))
+
+
+# ----------------------------
+# 世代番号（apps.common.versions）を上げる（カードや詳細に出る子テーブルの変更でも上げる）
+# ----------------------------
+@receiver(post_save, sender=UserVehicle)
+@receiver(post_delete, sender=UserVehicle)
+def version_vehicle(sender, instance, **kwargs):
+    versions.bump(UserVehicle, instance.pk)
+
+
+@receiver(post_save, sender=VehicleImage)
+@receiver(post_delete, sender=VehicleImage)
+@receiver(post_save, sender=VehiclePart)
+@receiver(post_delete, sender=VehiclePart)
+def version_vehicle_child(sender, instance, **kwargs):
+    versions.bump(UserVehicle, instance.vehicle_id)
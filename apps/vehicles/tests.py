@@ -1,3 +1,315 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from . import catalog, typeahead
+from .cards import VehicleCard
+from .forms import CatalogChoiceField, VehiclePartForm
+
+from .facets import FACET_CATEGORY, FACET_MAKER, FACET_MODEL, FACET_PART, FacetIndex
+from .models import Maker, Part, PartCategory, UserVehicle, VehicleImage, VehicleModel, VehiclePart
+
+
+User = get_user_model()
+
+
+def _counts(values):
+    return {fv.value: fv.count for fv in values}
+
+
+class FacetIndexTests(TestCase):
+    """
+    ファセット索引（apps.vehicles.facets）の件数と差し替え
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", password="pw")
+        cls.model_a = VehicleModel.objects.create(maker="Honda", name="Super Cub", slug="super-cub")
+        cls.model_b = VehicleModel.objects.create(maker="Honda", name="CT125", slug="ct125")
+        cls.category = PartCategory.objects.create(name="マフラー", slug="muffler")
+        cls.part = Part.objects.create(category=cls.category, name="スリップオン", slug="slip-on")
+        cls.maker = Maker.objects.create(name="キタコ", slug="kitaco")
+
+        cls.with_parts = UserVehicle.objects.bulk_create(
+            [UserVehicle(owner=cls.owner, model=cls.model_a, title=f"a{i}") for i in range(30)]
+        )
+        VehiclePart.objects.bulk_create(
+            [VehiclePart(vehicle=v, part=cls.part, maker=cls.maker) for v in cls.with_parts]
+        )
+        # パーツ行の最後の車両より後に作られた、パーツの無い車両
+        cls.bare = UserVehicle.objects.create(owner=cls.owner, model=cls.model_b, title="b")
+
+    def test_vehicle_without_parts_after_last_part_row(self):
+        index = FacetIndex.build()
+        selection = {FACET_MODEL: [self.model_b.id]}
+
+        self.assertEqual(list(index.match(selection)), [self.bare.id])
+        for facet in (FACET_CATEGORY, FACET_PART, FACET_MAKER):
+            self.assertEqual(index.facet_counts(facet, selection), [])
+
+    def test_search_view_for_model_without_parts(self):
+        response = self.client.get("/vehicles/search/", {"model": self.model_b.id})
+        self.assertEqual(response.status_code, 200)
+
+    def test_refreshed_leaves_original_untouched(self):
+        index = FacetIndex.build()
+        VehiclePart.objects.create(vehicle=self.bare, part=self.part, maker=self.maker)
+
+        fresh = index.refreshed(self.bare.id)
+
+        self.assertEqual(index.counts[FACET_PART][self.part.id], 30)
+        self.assertNotIn(self.bare.id, index.bitmaps[FACET_PART][self.part.id])
+        self.assertEqual(fresh.counts[FACET_PART][self.part.id], 31)
+        self.assertIn(self.bare.id, fresh.bitmaps[FACET_PART][self.part.id])
+
+    def test_refreshed_matches_rebuild(self):
+        index = FacetIndex.build()
+
+        moved = self.with_parts[0]
+        VehiclePart.objects.filter(vehicle=moved).delete()
+        UserVehicle.objects.filter(pk=moved.pk).update(model=self.model_b, year=2020)
+        VehiclePart.objects.create(vehicle=self.bare, part=self.part, maker=self.maker)
+        deleted_id = self.with_parts[1].id
+        UserVehicle.objects.filter(pk=deleted_id).delete()
+
+        for vid in (moved.id, self.bare.id, deleted_id):
+            index = index.refreshed(vid)
+        rebuilt = FacetIndex.build()
+
+        self.assertEqual(index.counts, rebuilt.counts)
+        for facet in index.ranked:
+            self.assertEqual(
+                [index.counts[facet][v] for v in index.ranked[facet]],
+                sorted(rebuilt.counts[facet].values(), reverse=True),
+            )
+        self.assertEqual(list(index.all), list(rebuilt.all))
+
+        selection = {FACET_MODEL: [self.model_b.id]}
+        self.assertEqual(list(index.match(selection)), list(rebuilt.match(selection)))
+        self.assertEqual(
+            _counts(index.facet_counts(FACET_PART, selection)),
+            _counts(rebuilt.facet_counts(FACET_PART, selection)),
+        )
+        self.assertEqual(
+            _counts(index.facet_counts(FACET_MAKER, {**selection, FACET_PART: [self.part.id]})),
+            {self.maker.id: 1},
+        )
+
+
+class SharedVersionTests(TestCase):
+    """
+    プロセス間で共有する version（キャッシュから消えても前の番号に戻らない）
+    """
+
+    def assert_never_reused(self, module):
+        before = module.bump_version()
+        cache.delete(module.VERSION_KEY)
+        self.assertGreater(module.current_version(), before)
+
+        before = module.current_version()
+        cache.delete(module.VERSION_KEY)
+        self.assertGreater(module.bump_version(), before)
+
+    def test_typeahead_version(self):
+        self.assert_never_reused(typeahead)
+
+    def test_catalog_version(self):
+        self.assert_never_reused(catalog)
+
+    def test_typeahead_builds_from_loaded_catalog(self):
+        cache.clear()
+        VehicleModel.objects.create(maker="Honda", name="Super Cub", slug="super-cub")
+        catalog.get_catalog()
+
+        with self.assertNumQueries(0):
+            index = typeahead.PrefixIndex.build(typeahead.current_version())
+        self.assertEqual([item.name for item in index.lookup("super")], ["Honda Super Cub"])
+
+
+class TypeaheadLookupTests(TestCase):
+    """
+    typeahead の前方一致（かなの揺れ / ローマ字 / 語の途中から）
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cub = VehicleModel.objects.create(maker="Honda", name="スーパーカブ", slug="super-cub")
+        cls.hunter = VehicleModel.objects.create(maker="Honda", name="ハンターカブ", slug="hunter-cub")
+        cls.muffler = PartCategory.objects.create(name="マフラー", slug="muffler")
+        cls.other = PartCategory.objects.create(name="外装", slug="exterior")
+        cls.slip_on = Part.objects.create(category=cls.muffler, name="スリップオン", slug="slip-on")
+        cls.slip_guard = Part.objects.create(category=cls.other, name="スリップガード", slug="slip-guard")
+        cls.kitaco = Maker.objects.create(name="キタコ", slug="kitaco")
+
+    def setUp(self):
+        cache.clear()
+        self.index = typeahead.PrefixIndex.build(typeahead.current_version())
+
+    def names(self, q, **kwargs):
+        return sorted(item.name for item in self.index.lookup(q, **kwargs))
+
+    def test_kana_is_folded(self):
+        expected = ["Honda スーパーカブ"]
+        self.assertEqual(self.names("すーぱー"), expected)  # ひらがな
+        self.assertEqual(self.names("スーパー"), expected)  # カタカナ
+        self.assertEqual(self.names("ｽｰﾊﾟｰ"), expected)    # 半角カナ
+        self.assertEqual(self.names("ＳＵＰＥＲ"), expected)  # 全角英字（slug）
+
+    def test_romaji_matches_kana_names(self):
+        self.assertEqual(self.names("supaka"), ["Honda スーパーカブ"])
+        self.assertEqual(self.names("kita", kinds=(typeahead.KIND_MAKER,)), ["キタコ"])
+        self.assertEqual(self.names("surippu"), ["スリップオン", "スリップガード"])
+
+    def test_mid_word_match(self):
+        # "カブ" は語の途中だが、どちらの車種にも当たる
+        both = ["Honda スーパーカブ", "Honda ハンターカブ"]
+        self.assertEqual(self.names("カブ"), both)
+        self.assertEqual(self.names("ｶﾌﾞ"), both)
+        self.assertEqual(self.names("kabu"), both)
+        # 英字の語は語頭からだけ（"cub" は slug の 2 語目の頭）
+        self.assertEqual(self.names("cub"), both)
+        self.assertEqual(self.names("ub"), [])
+
+    def test_kind_and_category_filters(self):
+        self.assertEqual(self.names("すりっぷ", category_id=self.muffler.id), ["スリップオン"])
+        self.assertEqual(self.names("honda", kinds=(typeahead.KIND_PART,)), [])
+
+    def test_blank_query(self):
+        self.assertEqual(self.index.lookup("  "), [])
+
+
+class CatalogChoiceFieldTests(TestCase):
+    """
+    CatalogChoiceField: 検証も選択肢も catalog から（読み込み済みなら DB に行かない）
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.muffler = PartCategory.objects.create(name="マフラー", slug="muffler")
+        cls.other = PartCategory.objects.create(name="外装", slug="exterior")
+        cls.slip_on = Part.objects.create(category=cls.muffler, name="スリップオン", slug="slip-on")
+        cls.guard = Part.objects.create(category=cls.other, name="スリップガード", slug="slip-guard")
+        cls.kitaco = Maker.objects.create(name="キタコ", slug="kitaco")
+
+    def setUp(self):
+        cache.clear()
+        catalog.get_catalog()
+
+    def field(self, **kwargs):
+        return CatalogChoiceField(lookup=lambda pk: catalog.get_catalog().maker(pk), **kwargs)
+
+    def assert_invalid_choice(self, field, value):
+        with self.assertRaises(ValidationError) as ctx:
+            field.clean(value)
+        self.assertEqual(ctx.exception.code, "invalid_choice")
+
+    def test_valid_pk_resolves_to_instance(self):
+        field = self.field()
+        with self.assertNumQueries(0):
+            self.assertEqual(field.clean(str(self.kitaco.pk)), self.kitaco)
+            self.assertEqual(field.clean(self.kitaco), self.kitaco)
+
+    def test_unknown_or_malformed_pk(self):
+        field = self.field()
+        with self.assertNumQueries(0):
+            self.assert_invalid_choice(field, str(self.kitaco.pk + 100))
+            self.assert_invalid_choice(field, "abc")
+
+    def test_empty(self):
+        self.assertIsNone(self.field(required=False).clean(""))
+        with self.assertRaises(ValidationError) as ctx:
+            self.field().clean("")
+        self.assertEqual(ctx.exception.code, "required")
+
+    def test_choices_are_built_lazily_from_catalog(self):
+        field = CatalogChoiceField(
+            lookup=lambda pk: catalog.get_catalog().category(pk),
+            items=lambda: catalog.get_catalog().categories,
+            empty_label="（カテゴリ）",
+        )
+        with self.assertNumQueries(0):
+            choices = list(field.choices)
+        self.assertEqual(choices[0], ("", "（カテゴリ）"))
+        self.assertCountEqual(
+            choices[1:], [(self.muffler.pk, str(self.muffler)), (self.other.pk, str(self.other))]
+        )
+
+    def test_part_form_validates_without_queries(self):
+        data = {"category": self.muffler.pk, "part": self.slip_on.pk, "maker": self.kitaco.pk}
+        with self.assertNumQueries(0):
+            form = VehiclePartForm(data=data)
+            self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data["part"], self.slip_on)
+        self.assertEqual(form.cleaned_data["maker"], self.kitaco)
+
+    def test_part_form_rejects_part_from_other_category(self):
+        form = VehiclePartForm(data={"category": self.muffler.pk, "part": self.guard.pk})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()["part"][0].code, "invalid_choice")
+
+
+class VehicleCardTemplateTests(TestCase):
+    """
+    VehicleCard（.values() の列だけ）で描いたカードが、モデルで描いたものと同じになること
+    テンプレが読む属性がカードに足りなければ空になって差が出る
+    """
+
+    TEMPLATES = [
+        ("vehicles/_vehicle_card.html", "v"),
+        ("accounts/_profile_vehicle_card.html", "v"),
+        ("pages/_slider_vehicle_card.html", "obj"),
+        ("teams/_pinned_vehicle_card.html", "v"),
+        ("teams/_member_vehicle_card.html", "v"),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", password="pw")
+        cls.model = VehicleModel.objects.create(maker="Honda", name="Super Cub", slug="super-cub")
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def _vehicle(self, with_image: bool) -> UserVehicle:
+        vehicle = UserVehicle.objects.create(owner=self.owner, model=self.model, title="カブ")
+        if with_image:
+            buf = io.BytesIO()
+            Image.new("RGB", (64, 64)).save(buf, "JPEG")
+            VehicleImage.objects.create(
+                vehicle=vehicle, image=SimpleUploadedFile("a.jpg", buf.getvalue(), content_type="image/jpeg")
+            )
+        return vehicle
+
+    def assertSameCard(self, vehicle):
+        instance = UserVehicle.objects.select_related("model", "owner", "main_image").get(pk=vehicle.pk)
+        card = VehicleCard.fetch(UserVehicle.objects.filter(pk=vehicle.pk))[0]
+        for obj in (instance, card):
+            obj.like_count, obj.user_like = 3, True
+
+        for template, name in self.TEMPLATES:
+            with self.subTest(template):
+                self.assertHTMLEqual(
+                    render_to_string(template, {name: card}),
+                    render_to_string(template, {name: instance}),
+                )
+
+    def test_card_with_image(self):
+        vehicle = self._vehicle(with_image=True)
+        self.assertSameCard(vehicle)
+        card = VehicleCard.fetch(UserVehicle.objects.filter(pk=vehicle.pk))[0]
+        self.assertTrue(card.main_image.thumb)
+        self.assertIn(card.main_image.thumb.url, render_to_string("vehicles/_vehicle_card.html", {"v": card}))
+
+    def test_card_without_image(self):
+        self.assertSameCard(self._vehicle(with_image=False))
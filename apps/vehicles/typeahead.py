@@ -0,0 +1,298 @@
+# apps/vehicles/typeahead.py
+
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from apps.common.versions import bump_stamp, get_stamp
+
+from .catalog import get_catalog
+
+
+# ----------------------------
+# 正規化（かな / ローマ字）
+# ----------------------------
+_ROMAJI = {
+    "あ": "a", "い": "i", "う": "u", "え": "e", "お": "o",
+    "か": "ka", "き": "ki", "く": "ku", "け": "ke", "こ": "ko",
+    "さ": "sa", "し": "shi", "す": "su", "せ": "se", "そ": "so",
+    "た": "ta", "ち": "chi", "つ": "tsu", "て": "te", "と": "to",
+    "な": "na", "に": "ni", "ぬ": "nu", "ね": "ne", "の": "no",
+    "は": "ha", "ひ": "hi", "ふ": "fu", "へ": "he", "ほ": "ho",
+    "ま": "ma", "み": "mi", "む": "mu", "め": "me", "も": "mo",
+    "や": "ya", "ゆ": "yu", "よ": "yo",
+    "ら": "ra", "り": "ri", "る": "ru", "れ": "re", "ろ": "ro",
+    "わ": "wa", "を": "o", "ん": "n",
+    "が": "ga", "ぎ": "gi", "ぐ": "gu", "げ": "ge", "ご": "go",
+    "ざ": "za", "じ": "ji", "ず": "zu", "ぜ": "ze", "ぞ": "zo",
+    "だ": "da", "ぢ": "ji", "づ": "zu", "で": "de", "ど": "do",
+    "ば": "ba", "び": "bi", "ぶ": "bu", "べ": "be", "ぼ": "bo",
+    "ぱ": "pa", "ぴ": "pi", "ぷ": "pu", "ぺ": "pe", "ぽ": "po",
+    "ゔ": "vu",
+    "ぁ": "a", "ぃ": "i", "ぅ": "u", "ぇ": "e", "ぉ": "o",
+    "ゃ": "ya", "ゅ": "yu", "ょ": "yo",
+}
+
+# きゃ → kya など（2文字で1音）
+_ROMAJI_YOON = {
+    "きゃ": "kya", "きゅ": "kyu", "きょ": "kyo",
+    "しゃ": "sha", "しゅ": "shu", "しょ": "sho",
+    "ちゃ": "cha", "ちゅ": "chu", "ちょ": "cho",
+    "にゃ": "nya", "にゅ": "nyu", "にょ": "nyo",
+    "ひゃ": "hya", "ひゅ": "hyu", "ひょ": "hyo",
+    "みゃ": "mya", "みゅ": "myu", "みょ": "myo",
+    "りゃ": "rya", "りゅ": "ryu", "りょ": "ryo",
+    "ぎゃ": "gya", "ぎゅ": "gyu", "ぎょ": "gyo",
+    "じゃ": "ja", "じゅ": "ju", "じょ": "jo",
+    "びゃ": "bya", "びゅ": "byu", "びょ": "byo",
+    "ぴゃ": "pya", "ぴゅ": "pyu", "ぴょ": "pyo",
+    "ふぁ": "fa", "ふぃ": "fi", "ふぇ": "fe", "ふぉ": "fo",
+    "てぃ": "ti", "でぃ": "di", "うぃ": "wi", "うぇ": "we", "ゔぁ": "va",
+}
+
+
+def normalize(text: str) -> str:
+    """
+    NFKC + 小文字 + カタカナ → ひらがな + 空白を1つに
+    "ｽｰﾊﾟｰ カブ" → "すーぱー かぶ"
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = "".join(chr(ord(c) - 0x60) if "ァ" <= c <= "ヶ" else c for c in text)
+    return " ".join(text.split())
+
+
+def to_romaji(kana: str) -> str:
+    """
+    ひらがな → ヘボン式ローマ字（"かぶ" → "kabu"、"きゃぶ" → "kyabu"）
+    かな以外はそのまま。長音 "ー" は落とす（"すーぱー" → "supa"）
+    """
+    out = []
+    i = 0
+    double_next = False
+    while i < len(kana):
+        pair = kana[i:i + 2]
+        if pair in _ROMAJI_YOON:
+            roma = _ROMAJI_YOON[pair]
+            i += 2
+        elif kana[i] == "っ":
+            double_next = True
+            i += 1
+            continue
+        elif kana[i] == "ー":
+            i += 1
+            continue
+        else:
+            roma = _ROMAJI.get(kana[i], kana[i])
+            i += 1
+
+        if double_next:
+            roma = roma[0] + roma if roma[0].isalpha() else roma
+            double_next = False
+        out.append(roma)
+    return "".join(out)
+
+
+def _has_kana(text: str) -> bool:
+    return any("ぁ" <= c <= "ゖ" for c in text)
+
+
+def search_keys(*names: str) -> List[str]:
+    """
+    1つの名前から前方一致用のキーを作る
+    - 各語の先頭からのキー（"super cub" → "cub" でも当たる）
+    - 日本語の語は途中の文字からのキーも作る（"ハンターカブ" → "カブ" でも当たる）
+    - かなを含むキーはローマ字版も（"キャブ" → "kyabu"）
+    - 空白・記号を詰めたキー（"super-cub" → "supercub"）
+    """
+    keys = set()
+    for name in names:
+        words = normalize(name).replace("-", " ").split()
+        for wi, word in enumerate(words):
+            rest = " ".join(words[wi + 1:])
+            starts = range(max(1, len(word) - 1)) if not word.isascii() else [0]
+            for i in starts:
+                keys.add(f"{word[i:]} {rest}".strip())
+        if words:
+            keys.add("".join(words))
+
+    keys |= {to_romaji(k) for k in keys if _has_kana(k)}
+    return sorted(keys)
+
+
+def query_keys(q: str) -> List[str]:
+    base = normalize(q)
+    if not base:
+        return []
+    keys = {base, base.replace("-", " ")}
+    if _has_kana(base):
+        keys.add(to_romaji(base))
+    return sorted(keys)
+
+
+# ----------------------------
+# 索引（ソート済み配列 + bisect）
+# ----------------------------
+KIND_PART = "part"
+KIND_MAKER = "maker"
+KIND_MODEL = "model"
+KINDS = (KIND_PART, KIND_MAKER, KIND_MODEL)
+
+
+class Item(NamedTuple):
+    kind: str
+    id: int
+    name: str
+    category_id: Optional[int] = None  # Part のみ
+
+
+# マスタが変わるたびに上がる番号（プロセス間で共有）
+VERSION_KEY = "typeahead:version"
+
+
+def current_version() -> int:
+    return get_stamp(VERSION_KEY)
+
+
+def bump_version() -> int:
+    return bump_stamp(VERSION_KEY)
+
+
+def _items_for(kind: str, obj) -> Item:
+    if kind == KIND_PART:
+        return Item(KIND_PART, obj.id, obj.name, obj.category_id)
+    if kind == KIND_MAKER:
+        return Item(KIND_MAKER, obj.id, obj.name)
+    return Item(KIND_MODEL, obj.id, f"{obj.maker} {obj.name}")
+
+
+def _names_for(kind: str, obj) -> Tuple[str, ...]:
+    if kind == KIND_MODEL:
+        # "Honda Super Cub" でも "Super Cub" でも "super-cub"（slug）でも引ける
+        return (f"{obj.maker} {obj.name}", obj.name, obj.slug)
+    return (obj.name, obj.slug)
+
+
+def _model_for(kind: str):
+    from .models import Maker, Part, VehicleModel
+    return {KIND_PART: Part, KIND_MAKER: Maker, KIND_MODEL: VehicleModel}[kind]
+
+
+class PrefixIndex:
+    """
+    (key, kind, id) のソート済み配列。前方一致は bisect で先頭を探して走査するだけ
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[str, str, int]] = []
+        self.items: Dict[Tuple[str, int], Item] = {}
+        self.keys_of: Dict[Tuple[str, int], List[str]] = {}
+        self.version = 0
+
+    @classmethod
+    def build(cls, version: int) -> "PrefixIndex":
+        """
+        プロセス内のカタログ（apps.vehicles.catalog）に読み込み済みのマスタから作る（DB には行かない）
+        """
+        catalog = get_catalog()
+        rows = {
+            KIND_PART: catalog.parts.values(),
+            KIND_MAKER: catalog.makers,
+            KIND_MODEL: catalog.models,
+        }
+
+        index = cls()
+        index.version = version
+        for kind in KINDS:
+            for obj in rows[kind]:
+                index._add(kind, obj, sort=False)
+        index.entries.sort()
+        return index
+
+    def _add(self, kind: str, obj, *, sort: bool = True) -> None:
+        item = _items_for(kind, obj)
+        keys = search_keys(*_names_for(kind, obj))
+        self.items[(kind, obj.id)] = item
+        self.keys_of[(kind, obj.id)] = keys
+        for key in keys:
+            if sort:
+                insort(self.entries, (key, kind, obj.id))
+            else:
+                self.entries.append((key, kind, obj.id))
+
+    def _remove(self, kind: str, pk: int) -> None:
+        item = self.items.pop((kind, pk), None)
+        for key in self.keys_of.pop((kind, pk), []):
+            i = bisect_left(self.entries, (key, kind, pk))
+            if i < len(self.entries) and self.entries[i] == (key, kind, pk):
+                del self.entries[i]
+
+    def refresh(self, kind: str, pk: int) -> None:
+        """
+        1件だけ入れ直す（削除済みなら消すだけ）
+        """
+        self._remove(kind, pk)
+        obj = _model_for(kind).objects.filter(pk=pk).first()
+        if obj is not None:
+            self._add(kind, obj)
+
+    def lookup(self, q: str, *, kinds=KINDS, category_id: Optional[int] = None, limit: int = 10) -> List[Item]:
+        found: Dict[Tuple[str, int], Item] = {}
+        for prefix in query_keys(q):
+            i = bisect_left(self.entries, (prefix,))
+            while i < len(self.entries) and self.entries[i][0].startswith(prefix):
+                _, kind, pk = self.entries[i]
+                i += 1
+                if kind not in kinds or (kind, pk) in found:
+                    continue
+                item = self.items[(kind, pk)]
+                if category_id is not None and item.category_id != category_id:
+                    continue
+                found[(kind, pk)] = item
+
+        # 短い名前（より完全一致に近いもの）を先に
+        return sorted(found.values(), key=lambda it: (len(it.name), it.name))[:limit]
+
+    def get(self, kind: str, pk) -> Optional[Item]:
+        try:
+            return self.items.get((kind, int(pk)))
+        except (TypeError, ValueError):
+            return None
+
+
+_index: Optional[PrefixIndex] = None
+_lock = threading.Lock()
+
+
+def get_index() -> PrefixIndex:
+    """
+    プロセス内の索引。共有 version が進んでいたら（別プロセスで変更があったら）作り直す
+    """
+    global _index
+    version = current_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = PrefixIndex.build(version)
+        return _index
+
+
+def on_master_changed(kind: str, pk: int) -> None:
+    """
+    管理画面などでマスタが変わったとき（signals から呼ぶ）
+    - このプロセスの索引は1件だけ差し替える
+    - version を上げて、他プロセスには次のアクセスで作り直してもらう
+    """
+    with _lock:
+        index = _index
+        before = current_version()
+        after = bump_version()
+
+        # 自分の変更だけで version が1つ進んだときだけ差分で追従する
+        # （間に別プロセスの変更が挟まったら、次の get_index で作り直し）
+        if index is not None and index.version == before and after == before + 1:
+            index.refresh(kind, pk)
+            index.version = after
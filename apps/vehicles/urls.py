@@ -6,6 +6,8 @@ from . import views
 urlpatterns = [
     # list / detail
     path("", views.vehicle_list, name="vehicle_list"),
+    path("feed/", views.vehicle_feed, name="vehicle_feed"),
+    path("search/", views.vehicle_search, name="vehicle_search"),
     path("<int:pk>/", views.vehicle_detail, name="vehicle_detail"),
 
     # create (Step1) + confirm (YES/NO)
@@ -20,6 +22,7 @@ urlpatterns = [
 
     # parts API/AJAX
     path("api/parts/", views.api_parts_by_category, name="api_parts_by_category"),
+    path("api/typeahead/", views.api_typeahead, name="api_typeahead"),
     path("<int:vehicle_id>/parts/create/", views.vehicle_part_create, name="vehicle_part_create"),
     path("<int:vehicle_id>/parts/<int:part_id>/delete/", views.vehicle_part_delete, name="vehicle_part_delete"),
 
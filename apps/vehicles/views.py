@@ -1,22 +1,33 @@
 # apps/vehicles/views.py
 
+import hashlib
 import json
 
 from django.contrib import messages
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
+from django.core.paginator import Paginator
 from django.db.models import Prefetch
 from django.http import HttpResponseForbidden, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
-from django.views.decorators.http import require_GET, require_POST
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
 
 from .forms import VehiclePartForm, VehicleQuickForm, VehicleDetailForm
-from .models import Part, UserVehicle, VehicleImage, VehiclePart
+from .models import UserVehicle, VehicleImage, VehiclePart
 from .models import sync_vehicle_main_image
+from .cards import VehicleCard
+from .catalog import get_catalog
+from .facets import FACETS, get_index as get_facet_index
+from .typeahead import KINDS as TYPEAHEAD_KINDS, current_version as typeahead_version, get_index as get_typeahead_index
+from apps.common.page_cache import anonymous_page_cache, cards_etag, conditional_page, not_modified
+from apps.common.pagination import keyset_page
 from apps.common.utils import delete_queryset_with_files
+from apps.common.versions import get_version
 from django.contrib.contenttypes.models import ContentType
-from apps.interactions.models import Reaction, ReactionType
+from apps.interactions.summary import attach_reaction_summaries
 
 from apps.common.utils import (
     save_temp_uploads_multi,
@@ -168,36 +179,118 @@ def vehicle_create_confirm(request, pk: int):
     return render(request, "vehicles/vehicle_create_confirm.html", {"vehicle": vehicle})
 
 
-from django.contrib.contenttypes.models import ContentType
-from django.db.models import Count
+# 一覧 / 無限スクロール 1回あたりの件数
+FEED_PER_PAGE = 24
 
-def vehicle_list(request):
-    vehicles = list(
-        UserVehicle.objects
-        .select_related("model", "owner", "main_image")
-        .order_by("-created_at")
+
+def _vehicle_feed_page(request):
+    """
+    新着順の1ページ分（?cursor= で続きから）
+    何ページ目でも「index を1回たどる + リアクション集計1回」で済む
+    ✅ カードに要る列だけ取る（VehicleCard）。description / specs などは読まない
+    """
+    vehicles, next_cursor = keyset_page(
+        UserVehicle.objects.all(), request.GET.get("cursor"), FEED_PER_PAGE, fetch=VehicleCard.fetch
     )
 
     # ✅ Like数をまとめて集計（N+1回避）
-    ct = ContentType.objects.get_for_model(UserVehicle)
+    # vehicles に like_count を付与（テンプレで v.like_count を使える）
+    vehicles = attach_reaction_summaries(vehicles, request.user)
+    return vehicles, next_cursor
 
-    like_map = dict(
-        Reaction.objects.filter(
-            reaction_type=ReactionType.LIKE,
-            content_type=ct,
-            object_id__in=[v.id for v in vehicles],
-        )
-        .values("object_id")
-        .annotate(c=Count("id"))
-        .values_list("object_id", "c")
-    )
 
-    # vehicles に like_count を付与（テンプレで v.like_count を使える）
-    for v in vehicles:
-        v.like_count = like_map.get(v.id, 0)
+def vehicle_list(request):
+    vehicles, next_cursor = _vehicle_feed_page(request)
+    return render(request, "vehicles/vehicle_list.html", {
+        "vehicles": vehicles,
+        "next_cursor": next_cursor,
+    })
+
+
+@require_GET
+@cache_control(public=True, no_cache=True)
+def vehicle_feed(request):
+    """
+    無限スクロール用: 次ページのカード HTML と cursor を返す
+    ✅ カード（世代番号 / サムネ / like 数）と次の cursor が同じなら 304（HTML を作らない）
+    """
+    vehicles, next_cursor = _vehicle_feed_page(request)
+
+    etag = cards_etag("vehicle_feed", vehicles, next_cursor or "")
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    html = render_to_string("vehicles/_vehicle_cards.html", {"vehicles": vehicles}, request=request)
+    response = JsonResponse({"html": html, "next_cursor": next_cursor})
+    response["ETag"] = etag
+    return response
+
+
+# ファセット検索の1ページあたりの件数 / 各ファセットに出す値の数
+SEARCH_PER_PAGE = 24
+FACET_LIMIT = 30
+FACET_TITLES = {"model": "車種", "year": "年式", "category": "部品カテゴリ", "part": "部品", "maker": "メーカー"}
+
+
+def _facet_selection(request) -> dict:
+    """
+    ?model=1&part=3&part=4&maker=5 → {"model": [1], "part": [3, 4], "maker": [5]}
+    数字でない値は無視
+    """
+    selection = {}
+    for facet in FACETS:
+        values = [int(v) for v in request.GET.getlist(facet) if v.isdigit()]
+        if values:
+            selection[facet] = values
+    return selection
 
-    return render(request, "vehicles/vehicle_list.html", {"vehicles": vehicles})
 
+@require_GET
+def vehicle_search(request):
+    """
+    車種 / 年式 / 部品カテゴリ / 部品 / メーカー での絞り込み
+    例: ?model=<C125>&part=<キャブ>&maker=<KEIHIN> → KEIHIN のキャブを付けた C125
+    集合演算と件数はメモリ上の Bitmap（apps.vehicles.facets）で行い、
+    DB にはこのページに出す車両だけを取りに行く
+    """
+    index = get_facet_index()
+    selection = _facet_selection(request)
+
+    matched = index.match(selection)
+    page_obj = Paginator(matched, SEARCH_PER_PAGE).get_page(request.GET.get("page"))
+
+    ids = list(page_obj.object_list)
+    by_id = {v.id: v for v in VehicleCard.fetch(UserVehicle.objects.filter(id__in=ids))}
+    vehicles = attach_reaction_summaries([by_id[i] for i in ids if i in by_id], request.user)
+
+    facets = [
+        (facet, FACET_TITLES[facet], index.facet_counts(facet, selection, limit=FACET_LIMIT))
+        for facet in FACETS
+    ]
+
+    return render(request, "vehicles/vehicle_search.html", {
+        "vehicles": vehicles,
+        "page_obj": page_obj,
+        "facets": facets,
+        "selection": selection,
+        "total": page_obj.paginator.count,
+    })
+
+
+def _vehicle_validators(request, pk: int):
+    """
+    vehicle_detail の ETag / Last-Modified（1クエリ + 持ち主の世代番号）
+    """
+    row = UserVehicle.objects.filter(pk=pk).values_list("updated_at", "owner_id").first()
+    if row is None:
+        return None, ()
+    updated_at, owner_id = row
+    return updated_at, (get_version(get_user_model(), owner_id),)
+
+
+@conditional_page(_vehicle_validators)
+@anonymous_page_cache
 def vehicle_detail(request, pk: int):
     # 詳細は全画像が必要なので prefetch
     image_qs = VehicleImage.objects.order_by("sort_order", "id")
@@ -215,46 +308,19 @@ def vehicle_detail(request, pk: int):
         .order_by("part__category__sort_order", "part__name", "id")
     )
 
-    # ✅ Like / Favorite（postsと同じ）
+    # ✅ Like / Favorite（postsと同じ・1クエリ）
     ct = ContentType.objects.get_for_model(UserVehicle)
-
-    like_count = Reaction.objects.filter(
-        reaction_type=ReactionType.LIKE,
-        content_type=ct,
-        object_id=vehicle.id,
-    ).count()
-
-    fav_count = Reaction.objects.filter(
-        reaction_type=ReactionType.FAVORITE,
-        content_type=ct,
-        object_id=vehicle.id,
-    ).count()
-
-    user_like = False
-    user_fav = False
-    if request.user.is_authenticated:
-        user_like = Reaction.objects.filter(
-            user=request.user,
-            reaction_type=ReactionType.LIKE,
-            content_type=ct,
-            object_id=vehicle.id,
-        ).exists()
-        user_fav = Reaction.objects.filter(
-            user=request.user,
-            reaction_type=ReactionType.FAVORITE,
-            content_type=ct,
-            object_id=vehicle.id,
-        ).exists()
+    attach_reaction_summaries([vehicle], request.user)
 
     return render(request, "vehicles/vehicle_detail.html", {
         "vehicle": vehicle,
         "parts": parts,
 
         # ✅ reactions用
-        "like_count": like_count,
-        "fav_count": fav_count,
-        "user_like": user_like,
-        "user_fav": user_fav,
+        "like_count": vehicle.like_count,
+        "fav_count": vehicle.fav_count,
+        "user_like": vehicle.user_like,
+        "user_fav": vehicle.user_fav,
         "target": {"app_label": ct.app_label, "model": ct.model, "object_id": vehicle.id},
     })
 
@@ -331,14 +397,59 @@ def vehicle_edit(request, pk: int):
 # ----------------------------
 # Parts: API / AJAX create / delete
 # ----------------------------
+def _parts_etag(request):
+    # カタログの version が同じなら中身も同じ（マスタが変わると version が上がる）
+    category_id = request.GET.get("category_id", "")
+    return f'"parts-{get_catalog().version}-{category_id if category_id.isdigit() else ""}"'
+
+
 @require_GET
+@cache_control(public=True, no_cache=True)
+@condition(etag_func=_parts_etag)
 def api_parts_by_category(request):
+    """
+    カテゴリの部品一覧（パーツ追加フォームのセレクト用）
+    ✅ カタログ（メモリ）から返す。ETag が一致すれば 304（本文を作らない）
+    """
     category_id = request.GET.get("category_id")
-    if not category_id:
+    if not category_id or not category_id.isdigit():
         return JsonResponse({"results": []})
 
-    qs = Part.objects.filter(category_id=category_id).order_by("name")
-    return JsonResponse({"results": [{"id": p.id, "name": p.name} for p in qs]})
+    parts = get_catalog().parts_by_category.get(int(category_id), [])
+    return JsonResponse({"results": [{"id": p.id, "name": p.name} for p in parts]})
+
+
+TYPEAHEAD_LIMIT = 10
+
+
+def _typeahead_params(request):
+    q = request.GET.get("q", "")[:50]
+    kinds = tuple(k for k in request.GET.get("kind", "").split(",") if k in TYPEAHEAD_KINDS) or TYPEAHEAD_KINDS
+    category_id = request.GET.get("category_id", "")
+    category_id = int(category_id) if category_id.isdigit() else None
+    return q, kinds, category_id
+
+
+def _typeahead_etag(request):
+    # 索引の version が同じなら同じ入力には同じ候補（マスタが変わると version が上がる）
+    q, kinds, category_id = _typeahead_params(request)
+    digest = hashlib.md5(f"{q}|{','.join(kinds)}|{category_id or ''}".encode()).hexdigest()
+    return f'"typeahead-{typeahead_version()}-{digest}"'
+
+
+@require_GET
+@cache_control(public=True, no_cache=True)
+@condition(etag_func=_typeahead_etag)
+def api_typeahead(request):
+    """
+    部品 / メーカー / 車種の入力補完（前方一致・かな / ローマ字どちらでも）
+    ?q=<入力>&kind=part|maker|model（カンマ区切り可、省略で全部）&category_id=<部品カテゴリ>
+    ✅ ETag が一致すれば 304（索引を引かない）
+    """
+    q, kinds, category_id = _typeahead_params(request)
+
+    items = get_typeahead_index().lookup(q, kinds=kinds, category_id=category_id, limit=TYPEAHEAD_LIMIT)
+    return JsonResponse({"results": [{"id": it.id, "name": it.name, "kind": it.kind} for it in items]})
 
 
 @login_required